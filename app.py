@@ -1,10 +1,15 @@
 # Force-refresh deployment 2025-08-28-v10-GLOBAL-RELATED
-import sys, re, os, csv, glob, random, threading, unicodedata
+import sys, re, os, csv, random, threading, time, unicodedata
 from flask import Flask, render_template, request, jsonify
+from collections import OrderedDict
 from datetime import datetime, timedelta
-import pandas as pd
 import pytz
 
+import history_store
+import metrics
+import profiling
+from history_store import parse_price_to_float as _parse_price_to_float
+
 # --- Local Imports ---
 try:
     import scraper
@@ -21,18 +26,63 @@ app = Flask(__name__, template_folder="templates")
 
 # ---- Config ----
 USD_TO_EUR = float(os.environ.get("USD_TO_EUR", "0.86"))
+TCG_CARDS_MAX_IDS = 100  # /api/tcg/cards batch size
+
+# ---------- Metrics ----------
+# Request timing plus /metrics (see metrics.py); the collectors below expose the
+# counters the modules already keep, read only when /metrics is scraped.
+metrics.init_app(app)
+
+@metrics.register_collector
+def _api_cache_metrics():
+    stats = scraper_pokemon.api_cache_stats()
+    events = ("hits", "misses", "expired", "evicted", "coalesced", "fetches", "errors", "timeouts")
+    return [
+        ("api_cache_events_total", "counter", "pokemontcg.io response cache and _fetch_json events.",
+         [({"event": e}, stats[e]) for e in events]),
+        ("api_cache_entries", "gauge", "Cached pokemontcg.io responses.", [({}, stats["size"])]),
+        ("api_inflight_fetches", "gauge", "Upstream fetches in progress.", [({}, stats["inflight"])]),
+    ]
 
-# ---------- Generic helpers ----------
-def parse_date_from_filename(name):
-    for fmt in ("%d %m %Y", "%Y-%m-%d", "%d-%m-%Y", "%m-%d-%Y"):
-        try: return datetime.strptime(name, fmt)
-        except ValueError: pass
-    return None
+@metrics.register_collector
+def _enrichment_metrics():
+    stats = scraper_pokemon.enrichment_stats()
+    return [
+        ("card_enrichment_entries", "gauge", "Cards with cached price enrichment.", [({}, stats["cards"])]),
+        ("card_enrichment_pending", "gauge", "Card enrichment refreshes in progress.", [({}, stats["pending"])]),
+    ]
+
+@metrics.register_collector
+def _greek_prices_metrics():
+    status = scraper.reload_status()
+    return [
+        ("greek_prices_reloads_total", "counter", "Greek prices file (re)loads in this process.",
+         [({}, status["reloads"])]),
+        ("greek_prices_reload_failures_total", "counter", "Failed background reloads of the Greek prices file.",
+         [({}, status["reload_failures"])]),
+        ("greek_prices_items", "gauge", "Listings in the loaded Greek prices file.", [({}, status["items"])]),
+        ("greek_search_memo_ids", "gauge", "Item ids held by the search hit and suggestion memos.",
+         [({}, status["memo_ids"])]),
+        ("greek_prices_age_seconds", "gauge", "Seconds since the Greek prices file was loaded.",
+         [({}, status["seconds_since_reload"])] if status["path"] else []),
+    ]
+
+@metrics.register_collector
+def _price_override_metrics():
+    stats = data_loader.PRICE_LOAD_STATS
+    return [
+        ("price_overrides_loads_total", "counter", "Card price sheet loads.", [({}, stats["loads"])]),
+        ("price_overrides_load_failures_total", "counter", "Card price sheet loads that hit a read error.",
+         [({}, stats["failures"])]),
+        ("price_overrides_rows", "gauge", "Rows read by the last price sheet load.", [({}, stats["rows"])]),
+        ("price_overrides_load_seconds", "gauge", "Duration of the last price sheet load.", [({}, stats["seconds"])]),
+    ]
 
-def normalize_title_for_history(title):
-    if not isinstance(title, str): return ""
-    return re.sub(r'[^a-z0-9]', '', title.lower())
+# ---------- Profiling ----------
+# Single requests can be profiled with a token when PROFILE_TOKEN is set (see profiling.py).
+profiling.init_app(app)
 
+# ---------- Generic helpers ----------
 def _upgrade_image(url: str, level: int = 1) -> str:
     if not url: return url
     try:
@@ -52,47 +102,6 @@ def _upgrade_image(url: str, level: int = 1) -> str:
         pass
     return url
 
-def _parse_price_to_float(s: str) -> float | None:
-    """Robustly parse a price string that could be in US/UK or European format."""
-    if s is None: return None
-    
-    original_str = str(s).strip()
-    
-    # Clean up string
-    clean_s = original_str.replace("€", "").replace("$", "")
-    if not clean_s:
-        return None
-
-    last_dot_pos = clean_s.rfind('.')
-    last_comma_pos = clean_s.rfind(',')
-    
-    # Determine number format and clean the string
-    if last_comma_pos > last_dot_pos:
-        # European format (e.g., "1.234,56"): dot is thousands, comma is decimal
-        clean_s = clean_s.replace('.', '').replace(',', '.')
-    else:
-        # US format (e.g., "1,234.56"): comma is thousands, dot is decimal
-        clean_s = clean_s.replace(',', '')
-        
-    try:
-        price = float(clean_s)
-
-        # Sanity check for a likely scraping error, e.g., "51,99" becomes "51,999".
-        # This heuristic checks if the original string was in the format "dd,ddd".
-        parts = original_str.replace("€", "").replace("$", "").split(',')
-        if (price > 1000 and 
-            original_str.count(',') == 1 and 
-            original_str.count('.') == 0 and 
-            len(parts) == 2 and len(parts[1]) == 3 and
-            len(parts[0]) > 1):
-             # This pattern likely means "xx,yyy" should have been "xx.yy".
-             # We correct this by dividing by 1000.
-             return price / 1000.0
-        
-        return price
-    except (ValueError, TypeError):
-        return None
-
 def _normalize_sealed_row(row: dict) -> dict:
     norm = {re.sub(r"\s+", "_", (k or "").strip().lower()): (v or "").strip()
             for k, v in row.items()}
@@ -132,6 +141,17 @@ TYPE_SYNONYMS = {
 }
 TYPE_LOOKUP = {syn: canon for canon, syns in TYPE_SYNONYMS.items() for syn in syns}
 ALLOWED_TYPES = set(TYPE_SYNONYMS.keys())
+# Longest phrase first, so "booster box" wins over "box".
+_TYPE_PHRASES = sorted(TYPE_LOOKUP.keys(), key=len, reverse=True)
+_TYPE_WORDS = set(TYPE_LOOKUP.keys()) | {
+    "booster","trainer","box","pack","bundle","display","case",
+    "tin","deck","sleeves","binder","collection","blister","etb"
+}
+TYPE_RANK = {
+    "booster pack": 6, "booster box": 6, "booster bundle": 5,
+    "elite trainer box": 5, "blister": 4, "collection": 4,
+    "tin": 3, "binder": 2, "deck": 2, "sleeves": 1,
+}
 
 def _ascii_fold(s: str) -> str:
     s = unicodedata.normalize("NFKD", str(s or "")).encode("ascii", "ignore").decode("utf-8")
@@ -145,7 +165,7 @@ _SKUISH = re.compile(r"^(?:sv\d+|s?v?\d+|pok\d+|pkm\d+|tcg\d+|sku\d+|upc\d+|ean\
 
 def _canonical_type(text: str) -> str | None:
     t = _ascii_fold(text)
-    for phrase in sorted(TYPE_LOOKUP.keys(), key=len, reverse=True):
+    for phrase in _TYPE_PHRASES:
         if phrase in t: return TYPE_LOOKUP[phrase]
     for tok in _tokens(t):
         if tok in TYPE_LOOKUP: return TYPE_LOOKUP[tok]
@@ -155,10 +175,7 @@ def _canonical_type(text: str) -> str | None:
 
 def _keywords(text: str, drop_types=True) -> set[str]:
     words = set(_tokens(text))
-    type_words = set(TYPE_LOOKUP.keys()) | {
-        "booster","trainer","box","pack","bundle","display","case",
-        "tin","deck","sleeves","binder","collection","blister","etb"
-    } if drop_types else set()
+    type_words = _TYPE_WORDS if drop_types else set()
     kept = set()
     for w in words:
         if w in GENERIC or w in type_words: continue
@@ -193,6 +210,166 @@ def _build_ebay_query(set_name: str, canon_type: str) -> str:
     q = " ".join(parts) + " -japanese -korean -chinese -jp -kr -cn"
     return re.sub(r"\s+", " ", q).strip()
 
+# ---------- Sealed product catalog ----------
+# Parsed + normalized once per CSV version and published as a single dict, so a
+# reload swaps the whole catalog and requests never see a half-built one.
+_SEALED_CATALOG = None
+_SEALED_LOCK = threading.Lock()
+
+def _sealed_csv_path():
+    override = os.environ.get("SEALED_PRICES_FILE", "").strip()
+    if override:
+        return override if os.path.exists(override) else None
+    candidates = [
+        os.path.join(app.root_path, "sealed_item_prices", "tcg_sealed_prices.csv"),
+        os.path.join(app.root_path, "Sealed_Item_prices", "tcg_sealed_prices.csv"),
+        os.path.join(app.root_path, "tcg_sealed_prices.csv"),
+    ]
+    return next((p for p in candidates if os.path.exists(p)), None)
+
+GLOBAL_RELATED_CACHE_SIZE = 512
+
+def _related_features(r: dict):
+    """Per-row inputs of /api/global-related scoring, or None if the row can never match."""
+    set_name   = r.get("set_name", "") or ""
+    item_title = r.get("item_title", "") or ""
+    joined     = f"{item_title} {set_name}"
+
+    # English only
+    if _is_non_english(joined):
+        return None
+
+    # Only sealed product types we care about
+    row_type = _canonical_type(joined) or ""
+    if row_type and row_type not in ALLOWED_TYPES:
+        return None
+
+    display_title = (set_name or "").strip()
+    if item_title and _ascii_fold(item_title) not in _ascii_fold(set_name):
+        display_title = (display_title + " — " + item_title).strip(" —")
+
+    return {
+        "kws": frozenset(_keywords(joined)),
+        "type": row_type,
+        "type_bonus": TYPE_RANK.get(row_type, 0) / 10.0,
+        "set_name": set_name,
+        "title": display_title or (item_title or set_name or "Item"),
+        "price": f"€{(r.get('price_eur') or 0):.2f}",
+        "image_url": r.get("image_url_hd") or r.get("image_url"),
+    }
+
+def _build_sealed_catalog(csv_path, sig):
+    with open(csv_path, "r", encoding="utf-8-sig", newline="") as f:
+        rows = [_normalize_sealed_row(row) for row in csv.DictReader(f)]
+
+    # /api/global-related: features of eligible rows + keyword -> positions (row order)
+    related = [feat for feat in map(_related_features, rows) if feat]
+    kw_index = {}
+    for pos, feat in enumerate(related):
+        for kw in feat["kws"]:
+            kw_index.setdefault(kw, []).append(pos)
+
+    return {
+        "path": csv_path, "sig": sig, "rows": rows,
+        # Exactly what jsonify(rows) would send, serialized once.
+        "json": app.json.response(rows).get_data(),
+        "related": related, "kw_index": kw_index,
+        # signature tokens -> /api/global-related items (LRU, lives with this catalog)
+        "related_memo": OrderedDict(), "related_memo_lock": threading.Lock(),
+    }
+
+def _get_sealed_catalog():
+    """Current catalog, rebuilt when the CSV's path/mtime/size changes; None if no CSV."""
+    global _SEALED_CATALOG
+    csv_path = _sealed_csv_path()
+    if not csv_path:
+        return None
+    st = os.stat(csv_path)
+    sig = (st.st_mtime_ns, st.st_size)
+    catalog = _SEALED_CATALOG
+    if catalog and catalog["path"] == csv_path and catalog["sig"] == sig:
+        return catalog
+    with _SEALED_LOCK:
+        catalog = _SEALED_CATALOG
+        if catalog and catalog["path"] == csv_path and catalog["sig"] == sig:
+            return catalog
+        try:
+            catalog = _build_sealed_catalog(csv_path, sig)
+        except Exception as e:
+            if not _SEALED_CATALOG: raise
+            print(f"Error reloading sealed products CSV at {csv_path}, serving previous copy: {e}")
+            return _SEALED_CATALOG
+        _SEALED_CATALOG = catalog
+        print(f"Loaded {len(catalog['rows'])} sealed products from: {csv_path}")
+        return catalog
+
+# ---------- Trending snapshot registry ----------
+# The newest "Top 100 trending/<run>/pokemon_wizard_prices.csv", parsed once and
+# kept in memory; the directory is re-scanned at most every TRENDING_POLL_SECONDS.
+TRENDING_DIR = os.environ.get("TRENDING_DIR", "Top 100 trending")
+TRENDING_POLL_SECONDS = float(os.environ.get("TRENDING_POLL_SECONDS", "30"))
+_TRENDING = None
+_TRENDING_LOCK = threading.Lock()
+
+def _latest_trending_csv():
+    latest_file, latest_time = None, 0
+    if os.path.isdir(TRENDING_DIR):
+        for item in os.listdir(TRENDING_DIR):
+            item_path = os.path.join(TRENDING_DIR, item)
+            if os.path.isdir(item_path):
+                try:
+                    csv_path = os.path.join(item_path, 'pokemon_wizard_prices.csv')
+                    if os.path.exists(csv_path):
+                        mtime = os.path.getmtime(csv_path)
+                        if mtime > latest_time: latest_time, latest_file = mtime, csv_path
+                except Exception:
+                    pass
+    return latest_file, latest_time
+
+def _read_trending_cards(csv_path):
+    cards = []
+    try:
+        with open(csv_path, 'r', encoding='utf-8') as f:
+            cards = list(csv.DictReader(f))
+    except Exception as e:
+        print(f"Error reading CSV file {csv_path}: {e}")
+    return cards
+
+def _trending_page_rows(cards):
+    """Copies of the rows with the numbers the page sorts on parsed once, the way |float did."""
+    rows = []
+    for card in cards:
+        row = dict(card)
+        try: row["price_value"] = float((card.get("price") or "").replace("$", ""))
+        except ValueError: row["price_value"] = 0.0
+        try: row["price_trend_value"] = float(card.get("price_trend") or 0)
+        except ValueError: row["price_trend_value"] = 0.0
+        rows.append(row)
+    return rows
+
+def _get_trending_snapshot():
+    """Latest snapshot {"path", "mtime", "cards", "checked"}; only the first call waits on disk."""
+    global _TRENDING
+    snap = _TRENDING
+    now = time.monotonic()
+    if snap is not None and now - snap["checked"] < TRENDING_POLL_SECONDS:
+        return snap
+    if not _TRENDING_LOCK.acquire(blocking=snap is None):
+        return snap
+    try:
+        latest_file, latest_time = _latest_trending_csv()
+        if snap is not None and (snap["path"], snap["mtime"]) == (latest_file, latest_time):
+            snap = dict(snap, checked=now)
+        else:
+            cards = _read_trending_cards(latest_file) if latest_file else []
+            snap = {"path": latest_file, "mtime": latest_time, "cards": cards, "checked": now}
+            if latest_file:
+                print(f"Loaded {len(cards)} trending cards from: {latest_file}")
+        _TRENDING = snap
+        return snap
+    finally:
+        _TRENDING_LOCK.release()
+
 # ---------- Pages ----------
 @app.route("/")
 def index():
@@ -221,27 +398,12 @@ def wallpapers_page():
 
 @app.route("/top100")
 def top_100_page():
-    trending_dir = "Top 100 trending"
-    latest_file, latest_time = None, 0
-    if os.path.isdir(trending_dir):
-        for item in os.listdir(trending_dir):
-            item_path = os.path.join(trending_dir, item)
-            if os.path.isdir(item_path):
-                try:
-                    csv_path = os.path.join(item_path, 'pokemon_wizard_prices.csv')
-                    if os.path.exists(csv_path):
-                        mtime = os.path.getmtime(csv_path)
-                        if mtime > latest_time: latest_time, latest_file = mtime, csv_path
-                except Exception:
-                    pass
-    cards = []
-    if latest_file:
-        try:
-            with open(latest_file, 'r', encoding='utf-8') as f:
-                cards = list(csv.DictReader(f))
-        except Exception as e:
-            print(f"Error reading CSV file {latest_file}: {e}")
-    return render_template("top100.html", cards=cards)
+    snap = _get_trending_snapshot()
+    html = snap.get("html")
+    if html is None:
+        # The page only depends on the snapshot, so render it once per snapshot.
+        html = snap["html"] = render_template("top100.html", cards=_trending_page_rows(snap["cards"]))
+    return html
 
 @app.route("/global-prices")
 def sealed_products_page():
@@ -249,22 +411,14 @@ def sealed_products_page():
 
 @app.route("/api/sealed-products")
 def api_sealed_products():
-    candidates = [
-        os.path.join(app.root_path, "sealed_item_prices", "tcg_sealed_prices.csv"),
-        os.path.join(app.root_path, "Sealed_Item_prices", "tcg_sealed_prices.csv"),
-        os.path.join(app.root_path, "tcg_sealed_prices.csv"),
-    ]
-    csv_path = next((p for p in candidates if os.path.exists(p)), None)
-    if not csv_path:
-        return jsonify({"error": "Data file not found."}), 404
     try:
-        with open(csv_path, "r", encoding="utf-8-sig", newline="") as f:
-            reader = csv.DictReader(f)
-            out = [_normalize_sealed_row(row) for row in reader]
-        return jsonify(out)
+        catalog = _get_sealed_catalog()
     except Exception as e:
-        print(f"Error reading sealed products CSV at {csv_path}: {e}")
+        print(f"Error reading sealed products CSV: {e}")
         return jsonify({"error": "Failed to read product data."}), 500
+    if not catalog:
+        return jsonify({"error": "Data file not found."}), 404
+    return app.response_class(catalog["json"], mimetype=app.json.mimetype)
 
 # ------------------------------------------------------------------
 # Global Related: 8 English sealed items for the set in the title
@@ -276,93 +430,77 @@ def api_global_related():
         return jsonify({"items": []})
 
     sig_list = _signature_tokens(title)         # e.g., ["journey", "together"]
-    sig = set(sig_list)
-    if not sig:
+    if not sig_list:
         return jsonify({"items": []})
 
-    # locate CSV
-    candidates = [
-        os.path.join(app.root_path, "sealed_item_prices", "tcg_sealed_prices.csv"),
-        os.path.join(app.root_path, "Sealed_Item_prices", "tcg_sealed_prices.csv"),
-        os.path.join(app.root_path, "tcg_sealed_prices.csv"),
-    ]
-    csv_path = next((p for p in candidates if os.path.exists(p)), None)
-    if not csv_path:
-        return jsonify({"items": []})
-
-    type_rank = {
-        "booster pack": 6, "booster box": 6, "booster bundle": 5,
-        "elite trainer box": 5, "blister": 4, "collection": 4,
-        "tin": 3, "binder": 2, "deck": 2, "sleeves": 1,
-    }
-
-    results_and = []   # rows that match ALL signature tokens
-    results_or  = []   # rows that match at least ONE signature token
-
     try:
-        with open(csv_path, "r", encoding="utf-8-sig", newline="") as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                r = _normalize_sealed_row(row)
-                set_name   = r.get("set_name", "") or ""
-                item_title = r.get("item_title", "") or ""
-                joined     = f"{item_title} {set_name}"
-
-                # English only
-                if _is_non_english(joined):
-                    continue
-
-                # Only sealed product types we care about
-                row_type = _canonical_type(joined) or ""
-                if row_type and row_type not in ALLOWED_TYPES:
-                    continue
-
-                row_kws = _keywords(joined)
-                overlap = sig & row_kws
-                if not overlap:
-                    continue
-
-                # scoring
-                score = 10.0 * (1 if sig.issubset(row_kws) else 0) \
-                        + 3.0 * len(overlap) \
-                        + (type_rank.get(row_type, 0) / 10.0)
-
-                display_title = (set_name or "").strip()
-                if item_title and _ascii_fold(item_title) not in _ascii_fold(set_name):
-                    display_title = (display_title + " — " + item_title).strip(" —")
-
-                ebay_q   = _build_ebay_query(set_name or " ".join(sig_list), row_type)
-                ebay_url = "https://www.ebay.com/sch/i.html?_nkw=" + re.sub(r"\s+", "+", ebay_q)
-
-                pack = {
-                    "title": display_title or (item_title or set_name or "Item"),
-                    "price": f"€{(r.get('price_eur') or 0):.2f}",
-                    "image_url": r.get("image_url_hd") or r.get("image_url"),
-                    "url": ebay_url
-                }
-
-                if sig.issubset(row_kws):
-                    results_and.append((score, pack))
-                else:
-                    results_or.append((score, pack))
+        catalog = _get_sealed_catalog()
+        if not catalog:
+            return jsonify({"items": []})
+        items = _global_related_items(catalog, tuple(sig_list))
     except Exception as e:
         print(f"Error in /api/global-related: {e}")
         return jsonify({"error": "Failed to process related items."}), 500
+    return jsonify({"items": items})
+
+def _global_related_items(catalog, sig_list):
+    """Up to 8 packs for the signature tokens, memoized per catalog."""
+    memo, lock = catalog["related_memo"], catalog["related_memo_lock"]
+    with lock:
+        if sig_list in memo:
+            memo.move_to_end(sig_list)
+            return memo[sig_list]
+
+    sig = set(sig_list)
+    related, kw_index = catalog["related"], catalog["kw_index"]
+
+    # Only rows sharing at least one signature token, scored in CSV order.
+    candidates = set()
+    for kw in sig:
+        candidates.update(kw_index.get(kw, ()))
+
+    results_and = []   # rows that match ALL signature tokens
+    results_or  = []   # rows that match at least ONE signature token
+    for pos in sorted(candidates):
+        feat = related[pos]
+        row_kws = feat["kws"]
+        overlap = sig & row_kws
+        is_all = sig.issubset(row_kws)
+
+        # scoring
+        score = 10.0 * (1 if is_all else 0) \
+                + 3.0 * len(overlap) \
+                + feat["type_bonus"]
+        (results_and if is_all else results_or).append((score, feat))
 
     # Prefer AND matches; if fewer than 8, fill with OR matches.
     results_and.sort(key=lambda t: t[0], reverse=True)
     results_or.sort(key=lambda t: t[0], reverse=True)
-    merged = [p for _, p in results_and[:8]]
-    if len(merged) < 8:
-        needed = 8 - len(merged)
-        merged += [p for _, p in results_or[:needed]]
-
-    return jsonify({"items": merged})
+    chosen = [f for _, f in results_and[:8]]
+    if len(chosen) < 8:
+        needed = 8 - len(chosen)
+        chosen += [f for _, f in results_or[:needed]]
+
+    merged = []
+    for feat in chosen:
+        ebay_q   = _build_ebay_query(feat["set_name"] or " ".join(sig_list), feat["type"])
+        ebay_url = "https://www.ebay.com/sch/i.html?_nkw=" + re.sub(r"\s+", "+", ebay_q)
+        merged.append({
+            "title": feat["title"],
+            "price": feat["price"],
+            "image_url": feat["image_url"],
+            "url": ebay_url
+        })
+
+    with lock:
+        memo[sig_list] = merged
+        while len(memo) > GLOBAL_RELATED_CACHE_SIZE:
+            memo.popitem(last=False)
+    return merged
 
 # ---------- Market / history / other routes (unchanged) ----------
 @app.route("/api/market-status")
 def api_market_status():
-    history_dir = "Greek_Prices_History"
     categories = {
         "Booster Packs": ["Booster Pack"],
         "Booster Box": ["Booster Box"],
@@ -376,42 +514,16 @@ def api_market_status():
         "Decks": ["Deck"]
     }
     cutoff_date = datetime.now() - timedelta(days=30)
-    all_data = []
-    files = glob.glob(os.path.join(history_dir, "*.xlsx")) + glob.glob(os.path.join(history_dir, "*.csv"))
-    for file_path in files:
-        try:
-            file_datetime = parse_date_from_filename(os.path.splitext(os.path.basename(file_path))[0])
-            if not file_datetime or file_datetime < cutoff_date:
-                continue
-            df = pd.read_csv(file_path, encoding='utf-8-sig') if file_path.endswith('.csv') else pd.read_excel(file_path)
-            df.columns = [str(c).lower().strip() for c in df.columns]
-            df['date'] = file_datetime
-            all_data.append(df)
-        except Exception as e:
-            print(f"Skipping history file {file_path}: {e}")
-    if not all_data:
+    recent_files = history_store.files_since(cutoff_date)
+    if not recent_files:
         return jsonify({"error": "No recent history data found"}), 404
-    full_history = pd.concat(all_data, ignore_index=True)
-    title_col = next((c for c in ['item_title', 'title', 'name'] if c in full_history.columns), None)
-    price_col = next((c for c in ['price', 'current_price'] if c in full_history.columns), None)
-    if not title_col or not price_col:
+    if not any(f["has_cols"] for f in recent_files):
         return jsonify({"error": "Could not find title/price columns"}), 500
-    
-    full_history[price_col] = full_history[price_col].apply(_parse_price_to_float)
-    
-    full_history.dropna(subset=[price_col], inplace=True)
+    changes_by_category = history_store.category_price_changes(list(categories.items()), cutoff_date)
     market_status = []
-    for category_name, keywords in categories.items():
-        cat_df = full_history[full_history[title_col].str.contains('|'.join(keywords), case=False, na=False)]
-        if cat_df.empty: continue
-        changes = []
-        for _, group in cat_df.groupby(title_col):
-            if len(group) > 1:
-                group = group.sort_values('date')
-                start_price = group.iloc[0][price_col]
-                end_price   = group.iloc[-1][price_col]
-                if start_price > 0:
-                    changes.append(((end_price - start_price) / start_price) * 100)
+    for category_name in categories:
+        if category_name not in changes_by_category: continue
+        changes = changes_by_category[category_name]
         status, explanation = 'yellow', '(Prices Stable)'
         if changes:
             avg_change = sum(changes) / len(changes)
@@ -424,34 +536,8 @@ def api_market_status():
 def api_price_history():
     item_title = request.args.get("title", "").strip()
     if not item_title: return jsonify({"error": "Missing item title"}), 400
-    normalized_search_title = normalize_title_for_history(item_title)
-    history_dir = "Greek_Prices_History"
-    price_history = []
-    if not os.path.isdir(history_dir): return jsonify({"error": "History directory not found"}), 500
-    files = glob.glob(os.path.join(history_dir, "*.xlsx")) + glob.glob(os.path.join(history_dir, "*.csv"))
-    for file_path in files:
-        try:
-            filename = os.path.basename(file_path)
-            date_str = os.path.splitext(filename)[0]
-            file_datetime = parse_date_from_filename(date_str)
-            if not file_datetime: continue
-            file_date = file_datetime.strftime("%Y-%m-%d")
-            df = pd.read_csv(file_path, encoding='utf-8-sig') if file_path.lower().endswith('.csv') else pd.read_excel(file_path)
-            df.columns = [str(c).lower().strip() for c in df.columns]
-            title_col = next((c for c in ['item_title', 'title', 'name'] if c in df.columns), None)
-            price_col = next((c for c in ['price', 'current_price'] if c in df.columns), None)
-            if not title_col or not price_col: continue
-            df['normalized_title'] = df[title_col].apply(normalize_title_for_history)
-            item_row = df[df['normalized_title'] == normalized_search_title]
-            if not item_row.empty:
-                price_str = str(item_row.iloc[0][price_col])
-                price_val = _parse_price_to_float(price_str)
-                if price_val is not None:
-                    price_history.append({"date": file_date, "price": price_val})
-        except Exception as e:
-            print(f"Could not process file {file_path}: {e}")
-    price_history.sort(key=lambda x: x['date'])
-    return jsonify(price_history)
+    if not os.path.isdir(history_store.HISTORY_DIR): return jsonify({"error": "History directory not found"}), 500
+    return jsonify(history_store.price_history(item_title))
 
 @app.route("/api/related-products")
 def api_related_products():
@@ -466,9 +552,8 @@ def api_home():
     sort = request.args.get("sort", "bestsellers")
     page = max(1, int(request.args.get("page", 1)))
     page_size = 24
-    all_items = scraper.search_products_all("", sort=sort)
-    start, end = (page - 1) * page_size, (page - 1) * page_size + page_size
-    return jsonify({"items": all_items[start:end], "has_more": end < len(all_items), "total": len(all_items)})
+    items, total = scraper.search_products_page("", sort=sort, page=page, page_size=page_size)
+    return jsonify({"items": items, "has_more": page * page_size < total, "total": total})
 
 @app.route("/api/search")
 def api_search():
@@ -477,9 +562,12 @@ def api_search():
     sort = request.args.get("sort", "bestsellers")
     page = max(1, int(request.args.get("page", 1)))
     page_size = 24
-    all_items = scraper.search_products_all(q, sort=sort)
-    start, end = (page - 1) * page_size, (page - 1) * page_size + page_size
-    return jsonify({"items": all_items[start:end], "has_more": end < len(all_items), "total": len(all_items)})
+    items, total = scraper.search_products_page(q, sort=sort, page=page, page_size=page_size)
+    return jsonify({"items": items, "has_more": page * page_size < total, "total": total})
+
+@app.route("/api/greek-prices/status")
+def api_greek_prices_status():
+    return jsonify(scraper.reload_status())
 
 @app.route("/api/suggest")
 def api_suggest():
@@ -501,6 +589,15 @@ def api_tcg_card():
     if not data: return jsonify({"error": "Not found"}), 404
     return jsonify(data)
 
+@app.route("/api/tcg/cards")
+def api_tcg_cards():
+    ids = [i.strip() for i in (request.args.get("ids") or "").split(",") if i.strip()]
+    if not ids: return jsonify({"error": "Missing ids"}), 400
+    if len(ids) > TCG_CARDS_MAX_IDS: return jsonify({"error": f"At most {TCG_CARDS_MAX_IDS} ids per request"}), 400
+    cards = scraper_pokemon.get_cards_details(ids) or []
+    found = {c["id"] for c in cards}
+    return jsonify({"cards": cards, "missing": [i for i in dict.fromkeys(ids) if i not in found]})
+
 @app.route("/api/tcg/related")
 def api_tcg_related():
     set_id = (request.args.get("setId") or "").strip()
@@ -513,27 +610,25 @@ def api_tcg_related():
 
 @app.route("/api/tcg/random-trending")
 def api_tcg_random_trending():
-    trending_dir = "Top 100 trending"
-    latest_file, latest_time = None, 0
-    if os.path.isdir(trending_dir):
-        for item in os.listdir(trending_dir):
-            item_path = os.path.join(trending_dir, item)
-            if os.path.isdir(item_path):
-                try:
-                    csv_path = os.path.join(item_path, 'pokemon_wizard_prices.csv')
-                    if os.path.exists(csv_path):
-                        mtime = os.path.getmtime(csv_path)
-                        if mtime > latest_time: latest_time, latest_file = mtime, csv_path
-                except Exception:
-                    pass
-    cards = []
-    if latest_file:
+    cards = _get_trending_snapshot()["cards"]
+    return jsonify({"cards": random.sample(cards, 10) if len(cards) > 10 else cards})
+
+# ---------- Preload (gunicorn) ----------
+def prepare_for_fork():
+    """Build the lazily-loaded stores in the gunicorn master so forked workers share them.
+
+    Starts no threads: the Greek prices watcher is started per worker on first use.
+    """
+    t0 = time.perf_counter()
+    for name, load in (("greek prices", scraper._reload_if_changed),
+                       ("price history", history_store.get_state),
+                       ("sealed catalog", _get_sealed_catalog),
+                       ("trending", _get_trending_snapshot)):
         try:
-            with open(latest_file, 'r', encoding='utf-8') as f:
-                cards = list(csv.DictReader(f))
+            load()
         except Exception as e:
-            print(f"Error reading CSV file {latest_file}: {e}")
-    return jsonify({"cards": random.sample(cards, 10) if len(cards) > 10 else cards})
+            print(f"[preload] Could not preload {name}, workers will load it on demand: {e}")
+    print(f"[preload] Stores ready for fork in {time.perf_counter() - t0:.2f}s")
 
 if __name__ == "__main__":
     app.run(debug=True, use_reloader=True)
@@ -0,0 +1,95 @@
+# benchmarks/bench_card_details.py
+# Replays /api/tcg/card traffic against fake_pokemontcg.py, so latency,
+# throughput and cache behaviour of the card-detail path can be measured with
+# no network.
+#
+#   python benchmarks/bench_card_details.py [--requests 2000] [--threads 8] [--cards 500]
+#       [--latency-ms 150] [--jitter-ms 100] [--error-rate 0.02] [--rate-limit 0] [--seed 42]
+#
+# Card ids are drawn from a skewed (Zipf-like) popularity over --cards random
+# local cards, like a handful of chase cards getting most of the views.
+
+import argparse
+import collections
+import os
+import random
+import sys
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+import app as app_module  # noqa: E402
+import data_loader  # noqa: E402
+import scraper_pokemon  # noqa: E402
+from fake_pokemontcg import FakePokemonTCG  # noqa: E402
+
+def _replay(client, ids, threads):
+    latencies, states, statuses = [], collections.Counter(), collections.Counter()
+    lock = threading.Lock()
+    chunks = [ids[k::threads] for k in range(threads)]
+
+    def run(chunk):
+        local = []
+        for card_id in chunk:
+            t0 = time.perf_counter()
+            resp = client.get(f"/api/tcg/card?id={card_id}")
+            local.append((time.perf_counter() - t0, resp.status_code,
+                          (resp.get_json() or {}).get("enrichment")))
+        with lock:
+            for dt, status, state in local:
+                latencies.append(dt)
+                statuses[status] += 1
+                states[state] += 1
+
+    workers = [threading.Thread(target=run, args=(c,)) for c in chunks]
+    t0 = time.perf_counter()
+    for w in workers: w.start()
+    for w in workers: w.join()
+    return time.perf_counter() - t0, sorted(latencies), states, statuses
+
+def _pct(samples, p):
+    return samples[min(len(samples) - 1, int(len(samples) * p))] * 1e3
+
+def main():
+    ap = argparse.ArgumentParser(description="/api/tcg/card replay against the local pokemontcg.io fake")
+    ap.add_argument("--requests", type=int, default=2000)
+    ap.add_argument("--threads", type=int, default=8)
+    ap.add_argument("--cards", type=int, default=500)
+    ap.add_argument("--latency-ms", type=float, default=150.0)
+    ap.add_argument("--jitter-ms", type=float, default=100.0)
+    ap.add_argument("--error-rate", type=float, default=0.02)
+    ap.add_argument("--rate-limit", type=float, default=0.0)
+    ap.add_argument("--seed", type=int, default=42)
+    args = ap.parse_args()
+
+    fake = FakePokemonTCG(latency_ms=args.latency_ms, jitter_ms=args.jitter_ms, error_rate=args.error_rate,
+                          rate_limit=args.rate_limit, seed=args.seed)
+    scraper_pokemon.BASE_URL = fake.start()
+
+    rng = random.Random(args.seed)
+    pool = rng.sample([c["id"] for c in data_loader._card_data], args.cards)
+    weights = [1.0 / (k + 1) for k in range(len(pool))]
+    ids = rng.choices(pool, weights=weights, k=args.requests)
+
+    app_module.app.logger.disabled = True  # failing requests are counted under statuses
+    client = app_module.app.test_client()
+    elapsed, lat, states, statuses = _replay(client, ids, args.threads)
+
+    print(f"{args.requests} requests, {args.threads} threads, {args.cards} distinct cards; "
+          f"fake: {args.latency_ms:.0f}+{args.jitter_ms:.0f} ms, errors {args.error_rate:.0%}, "
+          f"rate limit {args.rate_limit or 'off'}")
+    print(f"  latency p50 {_pct(lat, 0.50):7.2f} ms  p95 {_pct(lat, 0.95):7.2f} ms  "
+          f"p99 {_pct(lat, 0.99):7.2f} ms  max {lat[-1] * 1e3:7.2f} ms")
+    print(f"  throughput {args.requests / elapsed:8.1f} req/s")
+    print(f"  statuses {dict(statuses)}  enrichment {dict(states)}")
+    time.sleep(0.1)  # let in-flight refreshes land before reading counters
+    print(f"  upstream {fake.stats}")
+    print(f"  api cache {scraper_pokemon.api_cache_stats()}")
+    print(f"  enrichment cache {scraper_pokemon.enrichment_stats()}")
+    fake.stop()
+
+if __name__ == "__main__":
+    main()
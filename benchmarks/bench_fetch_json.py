@@ -0,0 +1,139 @@
+# benchmarks/bench_fetch_json.py
+# scraper_pokemon._fetch_json against a local stand-in HTTP server: per-call
+# requests.get vs. the pooled session, single-flight on a burst of identical
+# misses, and LRU eviction on a cache smaller than the key space.
+#
+#   python benchmarks/bench_fetch_json.py [--calls 300] [--latency-ms 20] [--burst 32]
+#
+# The stand-in answers /v2/cards/<id> with a small JSON body after a fixed delay
+# and counts requests and TCP connections, so reuse and coalescing are visible
+# in what the server saw rather than inferred from timings.
+
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+import scraper_pokemon  # noqa: E402
+
+class _Counters:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.connections = 0
+
+    def reset(self):
+        with self.lock:
+            self.requests = self.connections = 0
+
+COUNTS = _Counters()
+LATENCY = {"s": 0.02}
+
+class _StandIn(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, like the real API
+    disable_nagle_algorithm = True  # headers and body go out in separate writes
+
+    def setup(self):
+        super().setup()
+        with COUNTS.lock:
+            COUNTS.connections += 1
+
+    def do_GET(self):
+        with COUNTS.lock:
+            COUNTS.requests += 1
+        time.sleep(LATENCY["s"])
+        card_id = self.path.rsplit("/", 1)[-1].split("?")[0]
+        body = json.dumps({"data": {"id": card_id, "cardmarket": {"url": f"https://example.invalid/{card_id}"}}}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+def _legacy_fetch(url):
+    """The pre-session call, kept here as the baseline (no cache)."""
+    r = requests.get(url, headers=scraper_pokemon.HEADERS, timeout=2.0)
+    r.raise_for_status()
+    return r.json()
+
+def _reset_cache(max_size):
+    with scraper_pokemon.API_CACHE_LOCK:
+        scraper_pokemon.API_CACHE.clear()
+        for k in scraper_pokemon.API_CACHE_STATS:
+            scraper_pokemon.API_CACHE_STATS[k] = 0
+    scraper_pokemon.API_CACHE_MAX = max_size
+
+def main():
+    ap = argparse.ArgumentParser(description="_fetch_json: pooling, single-flight and eviction")
+    ap.add_argument("--calls", type=int, default=300)
+    ap.add_argument("--latency-ms", type=float, default=20.0)
+    ap.add_argument("--burst", type=int, default=32)
+    args = ap.parse_args()
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _StandIn)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_address[1]}/v2"
+
+    # 1) Connection reuse: distinct ids so every call misses the cache.
+    LATENCY["s"] = 0.0
+    print(f"{args.calls} sequential uncached fetches (no server delay):")
+    COUNTS.reset()
+    t0 = time.perf_counter()
+    for k in range(args.calls):
+        _legacy_fetch(f"{base}/cards/legacy-{k}")
+    legacy = time.perf_counter() - t0
+    print(f"  requests.get   {legacy / args.calls * 1e3:7.2f} ms/call  {COUNTS.connections:5} connections")
+    _reset_cache(10 * args.calls)
+    COUNTS.reset()
+    t0 = time.perf_counter()
+    for k in range(args.calls):
+        scraper_pokemon._fetch_json(f"{base}/cards/pooled-{k}", is_single_item=True)
+    pooled = time.perf_counter() - t0
+    print(f"  pooled session {pooled / args.calls * 1e3:7.2f} ms/call  {COUNTS.connections:5} connections")
+
+    # 2) Single-flight: a burst of identical misses while the server is slow.
+    LATENCY["s"] = args.latency_ms / 1000.0
+    _reset_cache(1024)
+    COUNTS.reset()
+    start = threading.Barrier(args.burst)
+    results = []
+    def worker():
+        start.wait()
+        results.append(scraper_pokemon._fetch_json(f"{base}/cards/hot", is_single_item=True))
+    threads = [threading.Thread(target=worker) for _ in range(args.burst)]
+    for t in threads: t.start()
+    for t in threads: t.join()
+    stats = scraper_pokemon.api_cache_stats()
+    same = all(r == results[0] for r in results) and results[0] is not None
+    print(f"{args.burst} concurrent identical misses ({args.latency_ms:.0f} ms server delay):")
+    print(f"  upstream requests {COUNTS.requests}, coalesced {stats['coalesced']}, all callers got the body: {same}")
+
+    # 3) Bounded cache: cycle over more keys than fit, then re-read the recent ones.
+    LATENCY["s"] = 0.0
+    cap = 64
+    _reset_cache(cap)
+    for k in range(4 * cap):
+        scraper_pokemon._fetch_json(f"{base}/cards/lru-{k}", is_single_item=True)
+    for k in range(3 * cap, 4 * cap):
+        scraper_pokemon._fetch_json(f"{base}/cards/lru-{k}", is_single_item=True)
+    stats = scraper_pokemon.api_cache_stats()
+    print(f"LRU with max_size={cap} after {4 * cap} distinct keys + {cap} recent re-reads:")
+    print(f"  size {stats['size']}, evicted {stats['evicted']}, hits {stats['hits']}, misses {stats['misses']}")
+
+    server.shutdown()
+
+if __name__ == "__main__":
+    main()
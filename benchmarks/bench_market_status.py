@@ -0,0 +1,161 @@
+# benchmarks/bench_market_status.py
+# End-to-end /api/market-status latency: the old per-request pandas pipeline vs.
+# the history_store aggregates, at 1x / 10x / 100x the bundled history.
+#
+#   python benchmarks/bench_market_status.py [--scales 1,10,100] [--runs 5] [--seed 42]
+#
+# History size scales by number of daily files: the 5 bundled days are cycled
+# (prices jittered, seeded) and dated backwards from today, so 100x is 500 days
+# of which the latest 30 fall inside the endpoint's window. Only the columns the
+# endpoint reads are written, to keep the synthetic tree small.
+
+import argparse
+import csv
+import glob
+import os
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+import pandas as pd  # noqa: E402
+from flask import jsonify  # noqa: E402
+
+import app as app_module  # noqa: E402
+import history_store  # noqa: E402
+
+SAMPLE_DIR = "Greek_Prices_History"
+_LEGACY_DIR = {"path": SAMPLE_DIR}
+
+def _legacy_market_status():
+    """The pre-store handler, kept here as the baseline."""
+    history_dir = _LEGACY_DIR["path"]
+    categories = {
+        "Booster Packs": ["Booster Pack"], "Booster Box": ["Booster Box"],
+        "Elite Trainer Box": ["Elite Trainer Box", "ETB"], "Binders": ["Binder"],
+        "Collections": ["Collection"], "Tins": ["Tin"], "Blisters": ["Blister"],
+        "Sleeves": ["Sleeves"], "Booster Bundles": ["Booster Bundle"], "Decks": ["Deck"]
+    }
+    cutoff_date = datetime.now() - timedelta(days=30)
+    all_data = []
+    files = glob.glob(os.path.join(history_dir, "*.xlsx")) + glob.glob(os.path.join(history_dir, "*.csv"))
+    for file_path in files:
+        try:
+            file_datetime = history_store.parse_date_from_filename(os.path.splitext(os.path.basename(file_path))[0])
+            if not file_datetime or file_datetime < cutoff_date:
+                continue
+            df = pd.read_csv(file_path, encoding='utf-8-sig') if file_path.endswith('.csv') else pd.read_excel(file_path)
+            df.columns = [str(c).lower().strip() for c in df.columns]
+            df['date'] = file_datetime
+            all_data.append(df)
+        except Exception as e:
+            print(f"Skipping history file {file_path}: {e}")
+    if not all_data:
+        return jsonify({"error": "No recent history data found"}), 404
+    full_history = pd.concat(all_data, ignore_index=True)
+    title_col = next((c for c in ['item_title', 'title', 'name'] if c in full_history.columns), None)
+    price_col = next((c for c in ['price', 'current_price'] if c in full_history.columns), None)
+    full_history[price_col] = full_history[price_col].apply(history_store.parse_price_to_float)
+    full_history.dropna(subset=[price_col], inplace=True)
+    market_status = []
+    for category_name, keywords in categories.items():
+        cat_df = full_history[full_history[title_col].str.contains('|'.join(keywords), case=False, na=False)]
+        if cat_df.empty: continue
+        changes = []
+        for _, group in cat_df.groupby(title_col):
+            if len(group) > 1:
+                group = group.sort_values('date')
+                start_price = group.iloc[0][price_col]
+                end_price   = group.iloc[-1][price_col]
+                if start_price > 0:
+                    changes.append(((end_price - start_price) / start_price) * 100)
+        status, explanation = 'yellow', '(Prices Stable)'
+        if changes:
+            avg_change = sum(changes) / len(changes)
+            if   avg_change >  2.5: status, explanation = 'green', '(Prices Rising)'
+            elif avg_change < -2.5: status, explanation = 'red',   '(Prices Lowering)'
+        market_status.append({"category": category_name, "status": status, "explanation": explanation})
+    return jsonify(market_status)
+
+def _read_sample_days():
+    days = []
+    for path in sorted(glob.glob(os.path.join(SAMPLE_DIR, "*.csv"))):
+        with open(path, encoding="utf-8-sig", newline="") as f:
+            days.append([(r["website"], r["item_title"], r["price"]) for r in csv.DictReader(f)])
+    return days
+
+def _write_day(path, rows, rng):
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        w = csv.writer(f)
+        w.writerow(["website", "item_title", "price"])
+        for site, title, price in rows:
+            v = history_store.parse_price_to_float(price)
+            if v is not None and rng.random() < 0.3:
+                price = f"{v * rng.uniform(0.9, 1.1):.2f}".replace(".", ",") + "€"
+            w.writerow([site, title, price])
+
+def _build_history(dirname, n_days, days, rng):
+    today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    for d in range(1, n_days + 1):
+        day = today - timedelta(days=d)
+        _write_day(os.path.join(dirname, day.strftime("%d %m %Y") + ".csv"), days[d % len(days)], rng)
+
+def _timed_get(client, url):
+    t0 = time.perf_counter()
+    resp = client.get(url)
+    return time.perf_counter() - t0, resp
+
+def main():
+    ap = argparse.ArgumentParser(description="/api/market-status before/after at scaled history sizes")
+    ap.add_argument("--scales", default="1,10,100")
+    ap.add_argument("--runs", type=int, default=5)
+    ap.add_argument("--seed", type=int, default=42)
+    args = ap.parse_args()
+
+    app_module.app.add_url_rule("/_bench/market-status-legacy", view_func=_legacy_market_status)
+    client = app_module.app.test_client()
+    days = _read_sample_days()
+    rng = random.Random(args.seed)
+
+    print(f"{'scale':>5} {'files':>5}  {'legacy p50':>11}  {'store cold':>11}  "
+          f"{'store p50':>10}  {'+1 day':>10}  same")
+    for scale in (int(s) for s in args.scales.split(",")):
+        tmp = tempfile.mkdtemp(prefix="bench_history_")
+        try:
+            hist_dir = os.path.join(tmp, "history")
+            os.makedirs(hist_dir)
+            _build_history(hist_dir, len(days) * scale, days, rng)
+
+            _LEGACY_DIR["path"] = hist_dir
+            legacy = [_timed_get(client, "/_bench/market-status-legacy") for _ in range(args.runs)]
+
+            history_store.HISTORY_DIR = hist_dir
+            history_store.STORE_DIR = os.path.join(tmp, "store")
+            history_store._STATE = None
+            history_store._MARKET_AGGS.clear()
+            history_store._CATEGORY_MASKS.clear()
+            cold, resp = _timed_get(client, "/api/market-status")
+            warm = [_timed_get(client, "/api/market-status")[0] for _ in range(args.runs)]
+
+            # A new day lands: the next poll ingests it and extends the aggregate.
+            _write_day(os.path.join(hist_dir, datetime.now().strftime("%d %m %Y") + ".csv"), days[0], rng)
+            history_store._LAST_POLL = 0.0
+            added, _ = _timed_get(client, "/api/market-status")
+
+            same = resp.get_json() == legacy[0][1].get_json()
+            print(f"{scale:>4}x {len(days) * scale:>5}  "
+                  f"{statistics.median(t for t, _ in legacy) * 1000:9.1f}ms  "
+                  f"{cold * 1000:9.1f}ms  {statistics.median(warm) * 1000:8.2f}ms  "
+                  f"{added * 1000:8.1f}ms  {same}")
+        finally:
+            shutil.rmtree(tmp, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
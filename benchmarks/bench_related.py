@@ -0,0 +1,60 @@
+# benchmarks/bench_related.py
+# Latency of data_loader.get_local_related_cards: full _card_data scan vs. the
+# (set_id, rarity) index.
+#
+#   python benchmarks/bench_related.py [--lookups 2000] [--seed 42]
+
+import argparse
+import os
+import random
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+import data_loader  # noqa: E402
+
+def _related_by_scan(set_id, rarity, current_card_id, count=5):
+    """The pre-index implementation, kept here as the baseline."""
+    if not all([set_id, rarity, current_card_id]):
+        return []
+    related = []
+    for card in data_loader._card_data:
+        if (card.get('set') and
+            card['set'].get('id') == set_id and
+            card.get('rarity') == rarity and
+            card.get('id') != current_card_id):
+            related.append(card)
+    if len(related) > count:
+        return random.sample(related, count)
+    return related
+
+def _time(fn, lookups):
+    samples = []
+    for card in lookups:
+        t0 = time.perf_counter()
+        fn(card['set']['id'], card.get('rarity'), card['id'], count=8)
+        samples.append(time.perf_counter() - t0)
+    samples.sort()
+    return samples[len(samples) // 2], samples[int(len(samples) * 0.95)]
+
+def main():
+    ap = argparse.ArgumentParser(description="get_local_related_cards: scan vs index")
+    ap.add_argument("--lookups", type=int, default=2000)
+    ap.add_argument("--seed", type=int, default=42)
+    args = ap.parse_args()
+
+    data_loader._load_price_data = lambda: None
+    data_loader.load_data()
+    rng = random.Random(args.seed)
+    lookups = [c for c in rng.sample(data_loader._card_data, args.lookups) if c.get('rarity')]
+
+    print(f"get_local_related_cards over {len(lookups)} random cards (p50 / p95):")
+    for label, fn in (("scan", _related_by_scan), ("index", data_loader.get_local_related_cards)):
+        p50, p95 = _time(fn, lookups)
+        print(f"  {label:<6} {p50 * 1e6:10.1f} us  {p95 * 1e6:10.1f} us")
+
+if __name__ == "__main__":
+    main()
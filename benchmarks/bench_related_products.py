@@ -0,0 +1,108 @@
+# benchmarks/bench_related_products.py
+# Latency of scraper.get_related_products: the old score-everything-and-sort
+# scan vs. the token index + bounded heap, on synthetic Greek catalogs.
+#
+#   python benchmarks/bench_related_products.py [--sizes 10000,1000000] [--lookups 200]
+#                                               [--legacy-lookups 5] [--seed 42]
+#
+# Catalogs are built in memory from the bundled Greek_Prices_History rows: each
+# listing is a real row whose title gets a variant/code suffix and whose URL
+# gets a distinct query string, so titles share the real vocabulary.
+
+import argparse
+import glob
+import os
+import random
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+import scraper  # noqa: E402
+
+def _related_by_scan(items, title, original_url, limit=6):
+    """The pre-index implementation, kept here as the baseline."""
+    q = (title or "").casefold().strip()
+    toks = {t for t in q.split() if len(t) > 3}
+    if not toks:
+        return []
+    canon_original_url = scraper._canon_url(original_url)
+
+    def score_item(it):
+        if not it or not it.get("title"): return 0
+        if scraper._canon_url(it.get("url", "")) == canon_original_url: return 0
+        item_title = (it["title"] or "").casefold()
+        return sum(1 for t in toks if t in item_title)
+
+    scored_items = [(score_item(it), it) for it in items]
+    scored_items.sort(key=lambda x: x[0], reverse=True)
+    related = [item for score, item in scored_items if score > 0]
+    return related[:limit]
+
+def _sample_rows():
+    rows, seen = [], set()
+    for path in sorted(glob.glob(os.path.join("Greek_Prices_History", "*.csv"))):
+        for it in scraper._load_items_from_file(path):
+            if it["url"] not in seen:
+                seen.add(it["url"])
+                rows.append(it)
+    return rows
+
+def _catalog(rows, size, rng):
+    items = []
+    for k in range(size):
+        base = rows[k % len(rows)]
+        it = dict(base)
+        it["title"] = f"{base['title']} V{rng.randrange(size // 20 + 1)} #{k}"
+        it["url"] = f"{base['url']}{'&' if '?' in base['url'] else '?'}v={k}"
+        items.append(it)
+    return items
+
+def _time(fn, cases):
+    samples = []
+    for title, url in cases:
+        t0 = time.perf_counter()
+        fn(title, url)
+        samples.append(time.perf_counter() - t0)
+    samples.sort()
+    return samples[len(samples) // 2], samples[int(len(samples) * 0.95)]
+
+def main():
+    ap = argparse.ArgumentParser(description="get_related_products: scan vs index")
+    ap.add_argument("--sizes", default="10000,1000000")
+    ap.add_argument("--lookups", type=int, default=200)
+    ap.add_argument("--legacy-lookups", type=int, default=5,
+                    help="lookups for the scan baseline (it takes seconds per call at 1M)")
+    ap.add_argument("--seed", type=int, default=42)
+    args = ap.parse_args()
+
+    rows = _sample_rows()
+    print(f"get_related_products(limit=8), {len(rows)} distinct sample rows (p50 / p95):")
+    for size in (int(s) for s in args.sizes.split(",")):
+        rng = random.Random(args.seed)
+        items = _catalog(rows, size, rng)
+        t0 = time.perf_counter()
+        scraper._VIEW = scraper._build_view(items, path="<bench>")
+        scraper._WATCHER_PID = os.getpid()  # keep _ensure_loaded from touching disk
+        build = time.perf_counter() - t0
+
+        picks = [items[rng.randrange(size)] for _ in range(args.lookups)]
+        cases = [(it["title"], it["url"]) for it in picks]
+        legacy_cases = cases[:args.legacy_lookups]
+        same = all(_related_by_scan(items, t, u, 8) == scraper.get_related_products(t, u, 8)
+                   for t, u in legacy_cases)
+        scan = _time(lambda t, u: _related_by_scan(items, t, u, 8), legacy_cases)
+        cold = _time(lambda t, u: scraper.get_related_products(t, u, 8), cases)
+        warm = _time(lambda t, u: scraper.get_related_products(t, u, 8), cases)
+
+        print(f"  {size:>9,} listings (index built in {build:.1f}s), same results: {same}")
+        print(f"    scan        {scan[0] * 1e3:10.2f} ms  {scan[1] * 1e3:10.2f} ms  ({len(legacy_cases)} lookups)")
+        print(f"    index cold  {cold[0] * 1e3:10.2f} ms  {cold[1] * 1e3:10.2f} ms")
+        print(f"    index warm  {warm[0] * 1e3:10.2f} ms  {warm[1] * 1e3:10.2f} ms")
+        del items, picks
+        scraper._VIEW = scraper._build_view([])
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+# benchmarks/bench_search_memo.py
+# Memory held by scraper's per-view search memos (token hit sets and suggestion
+# candidates) under a stream of distinct short queries, the worst case for
+# them: every two-letter fragment matches a large share of the catalog.
+#
+#   python benchmarks/bench_search_memo.py [--size 300000] [--queries 1024] [--seed 42]
+#
+# The catalog is built like bench_related_products.py's (real Greek rows with
+# variant suffixes). Prints RSS and the ids held before and after the queries,
+# the per-query latency, and exits non-zero if a memo went over its budget.
+
+import argparse
+import glob
+import os
+import random
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+import scraper  # noqa: E402
+
+def _rss_mib():
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024.0
+    return 0.0
+
+def _catalog(size, rng):
+    rows, seen = [], set()
+    for path in sorted(glob.glob(os.path.join("Greek_Prices_History", "*.csv"))):
+        for it in scraper._load_items_from_file(path):
+            if it["url"] not in seen:
+                seen.add(it["url"])
+                rows.append(it)
+    items = []
+    for k in range(size):
+        base = rows[k % len(rows)]
+        it = dict(base)
+        it["title"] = f"{base['title']} V{rng.randrange(size // 20 + 1)} #{k}"
+        it["url"] = f"{base['url']}{'&' if '?' in base['url'] else '?'}v={k}"
+        items.append(it)
+    return items
+
+def _queries(items, n, rng):
+    """Distinct two-character fragments of titles, then repeats once they run out."""
+    frags = sorted({w[k:k + 2] for it in items[:5000] for w in it["title"].casefold().split()
+                    for k in range(len(w) - 1)})
+    rng.shuffle(frags)
+    return [frags[k % len(frags)] for k in range(n)]
+
+def main():
+    ap = argparse.ArgumentParser(description="scraper search memo memory under short queries")
+    ap.add_argument("--size", type=int, default=300000)
+    ap.add_argument("--queries", type=int, default=1024)
+    ap.add_argument("--seed", type=int, default=42)
+    args = ap.parse_args()
+
+    rng = random.Random(args.seed)
+    scraper._VIEW = view = scraper._build_view(_catalog(args.size, rng), path="<bench>")
+    scraper._WATCHER_PID = os.getpid()  # keep _ensure_loaded from touching disk
+    queries = _queries(view["items"], args.queries, rng)
+
+    before = _rss_mib()
+    samples = []
+    for q in queries:
+        t0 = time.perf_counter()
+        scraper.suggest_titles(q)
+        scraper.search_products_page(q)
+        samples.append(time.perf_counter() - t0)
+    samples.sort()
+    after = _rss_mib()
+
+    hits, suggest = view["hits"], view["suggest"]
+    print(f"{args.size:,} listings, {len(queries)} queries ({len(set(queries))} distinct), "
+          f"suggest + first search page per query")
+    print(f"  latency p50 {samples[len(samples) // 2] * 1e3:.2f} ms, p95 {samples[int(len(samples) * 0.95)] * 1e3:.2f} ms")
+    print(f"  hit memo      {len(hits.entries):5d} entries, {hits.ids:>10,} ids (budget {hits.max_ids:,})")
+    print(f"  suggest memo  {len(suggest.entries):5d} entries, {suggest.ids:>10,} ids (budget {suggest.max_ids:,})")
+    print(f"  RSS {before:.0f} -> {after:.0f} MiB")
+    if hits.ids > hits.max_ids or suggest.ids > suggest.max_ids:
+        sys.exit("memo over budget")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+# benchmarks/bench_startup.py
+# Startup-time comparison for data_loader.load_data: JSON parse vs. card snapshot.
+#
+#   python benchmarks/bench_startup.py [--runs 5]
+#
+# Each run is a fresh interpreter so nothing is shared between measurements.
+# Price loading is stubbed out so only the card corpus is timed.
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_CHILD = r"""
+import time
+import data_loader
+data_loader._load_price_data = lambda: None
+t0 = time.perf_counter()
+data_loader.load_data()
+print("ELAPSED", time.perf_counter() - t0, len(data_loader._card_data))
+"""
+
+def _run_once(snapshot_path):
+    env = dict(os.environ, CARD_SNAPSHOT_PATH=snapshot_path)
+    out = subprocess.run([sys.executable, "-c", _CHILD], cwd=ROOT, env=env,
+                         capture_output=True, text=True, check=True).stdout
+    for line in out.splitlines():
+        if line.startswith("ELAPSED"):
+            _, secs, n = line.split()
+            return float(secs), int(n)
+    raise RuntimeError(f"child produced no timing:\n{out}")
+
+def main():
+    ap = argparse.ArgumentParser(description="load_data startup: JSON vs snapshot")
+    ap.add_argument("--runs", type=int, default=5)
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        snap = os.path.join(tmp, "cards_snapshot.pickle")
+        results = {
+            "json (no snapshot)": [_run_once("")[0] for _ in range(args.runs)],
+        }
+        _run_once(snap)  # build the snapshot
+        results["snapshot"] = [_run_once(snap)[0] for _ in range(args.runs)]
+
+    base = statistics.median(results["json (no snapshot)"])
+    print(f"load_data() startup, {args.runs} runs each (median / min):")
+    for label, secs in results.items():
+        med = statistics.median(secs)
+        print(f"  {label:<20} {med * 1000:8.1f} ms  {min(secs) * 1000:8.1f} ms  ({base / med:4.1f}x)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,286 @@
+# benchmarks/bench_suite.py
+# Offline microbenchmarks for the data_loader, scraper and app hot paths, with
+# fixed seeds, p50/p95/ops-per-second per case and a JSON report for comparing
+# runs.
+#
+#   python benchmarks/bench_suite.py [--seed 42] [--runs 3] [--only search,scraper]
+#                                    [--out .cache/bench/run.json] [--compare old.json]
+#
+# Every case is a list of inputs timed one call at a time; each round calls every
+# input once and --runs rounds are recorded after one untimed warm-up round (its
+# first call is reported as first_ms, which is the cold cost for cached paths).
+# Heavy cases (load_data, _load_price_data) run --heavy-runs times without warm-up.
+#
+# The scraper cases need a Greek prices file: GREEK_PRICES_FILE / GREEK_PRICES_DIR
+# if set, otherwise the bundled Greek_Prices_History days merged into .cache/.
+# The app cases read history from a copy of the bundled days re-dated to the
+# last few days (as bench_market_status.py does), so /api/market-status has
+# data inside its 30-day window; every timed request must answer 200.
+
+import argparse
+import csv
+import glob
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+import data_loader  # noqa: E402
+import history_store  # noqa: E402
+import scraper  # noqa: E402
+import app as app_module  # noqa: E402  (loads cards and prices)
+
+MERGED_GREEK_FILE = os.path.join(".cache", "bench_greek_prices.csv")
+DATED_HISTORY_DIR = os.path.join(".cache", "bench_history")
+
+# ---------- Timing ----------
+def _measure(fn, inputs, runs, warmup=True):
+    first = None
+    if warmup:
+        t0 = time.perf_counter()
+        fn(*inputs[0])
+        first = time.perf_counter() - t0
+        for args in inputs[1:]:
+            fn(*args)
+    samples = []
+    for _ in range(runs):
+        for args in inputs:
+            t0 = time.perf_counter()
+            fn(*args)
+            samples.append(time.perf_counter() - t0)
+    if first is None:
+        first = samples[0]
+    samples_sorted = sorted(samples)
+    return {
+        "calls": len(samples),
+        "inputs": len(inputs),
+        "first_ms": first * 1e3,
+        "p50_ms": statistics.median(samples_sorted) * 1e3,
+        "p95_ms": samples_sorted[min(len(samples_sorted) - 1, int(len(samples_sorted) * 0.95))] * 1e3,
+        "mean_ms": statistics.fmean(samples) * 1e3,
+        "ops_per_s": len(samples) / sum(samples) if sum(samples) else float("inf"),
+    }
+
+# ---------- Inputs ----------
+def _card_sample(rng, n):
+    return rng.sample(data_loader._card_data, min(n, len(data_loader._card_data)))
+
+def _search_inputs(rng):
+    cards = _card_sample(rng, 200)
+    names = [c.get("name") or "" for c in cards]
+    short = [(n[:2],) for n in names[:60] if len(n) >= 2]
+    typed = []
+    for n in names[:20]:
+        typed.extend((n[:k],) for k in range(1, len(n) + 1))
+    numbers = []
+    for c in cards[:60]:
+        num = c.get("number") or ""
+        numbers.append((num,))
+        numbers.append((f"{c.get('name', '')} {num}",))
+        total = (c.get("set") or {}).get("printedTotal")
+        if total:
+            numbers.append((f"{num}/{total}",))
+    return {"short": short, "typed_prefix": typed, "number": numbers}
+
+def _override_inputs(rng):
+    linked = [c for c in data_loader._card_data
+              if data_loader._price_by_card_id.get(c["id"], (None, ""))[1] == "found"]
+    cards = rng.sample(linked, min(200, len(linked)))
+    hits = [(c.get("name"), (c.get("set") or {}).get("name"), c.get("number")) for c in cards]
+    # Same cards, spelled the way price sheets do: variant tag, '#' and zero padding.
+    fallbacks = []
+    for name, set_name, number in hits:
+        num = str(number or "")
+        padded = f"#{num.zfill(3)}" if num.isdigit() else f"#{num}"
+        fallbacks.append((f"{name} [Reverse Holo]", set_name, padded))
+    # Real names and numbers in a set no sheet has: exercises the fuzzy set path.
+    misses = [(name, f"Mystery Expansion {rng.randrange(1000)}", number) for name, _, number in hits]
+    return {"hit": hits, "fallback": fallbacks, "fuzzy_miss": misses}
+
+def _history_titles(rng, n):
+    titles = set()
+    for path in sorted(glob.glob(os.path.join("Greek_Prices_History", "*.csv"))):
+        with open(path, encoding="utf-8-sig", newline="") as f:
+            titles.update(r.get("item_title") or "" for r in csv.DictReader(f))
+    titles.discard("")
+    return rng.sample(sorted(titles), min(n, len(titles)))
+
+def _ensure_greek_file():
+    if scraper._chosen_path():
+        return scraper._chosen_path()
+    os.makedirs(os.path.dirname(MERGED_GREEK_FILE), exist_ok=True)
+    header, rows = None, []
+    for path in sorted(glob.glob(os.path.join("Greek_Prices_History", "*.csv"))):
+        with open(path, encoding="utf-8-sig", newline="") as f:
+            reader = csv.reader(f)
+            h = next(reader, None)
+            header = header or h
+            rows.extend(reader)
+    with open(MERGED_GREEK_FILE, "w", encoding="utf-8", newline="") as f:
+        w = csv.writer(f)
+        w.writerow(header)
+        w.writerows(rows)
+    scraper.EXCEL_FILE = MERGED_GREEK_FILE
+    return MERGED_GREEK_FILE
+
+def _use_dated_history():
+    """Copy the bundled history days to DATED_HISTORY_DIR, dated yesterday and back, and point history_store at it."""
+    shutil.rmtree(DATED_HISTORY_DIR, ignore_errors=True)
+    os.makedirs(DATED_HISTORY_DIR)
+    today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    samples = sorted(glob.glob(os.path.join("Greek_Prices_History", "*.csv")),
+                     key=lambda p: history_store.parse_date_from_filename(os.path.splitext(os.path.basename(p))[0]))
+    for d, path in enumerate(reversed(samples), start=1):
+        day = today - timedelta(days=d)
+        shutil.copyfile(path, os.path.join(DATED_HISTORY_DIR, day.strftime("%d %m %Y") + ".csv"))
+    history_store.HISTORY_DIR = DATED_HISTORY_DIR
+    history_store.STORE_DIR = DATED_HISTORY_DIR + "_store"
+    history_store._STATE = None
+    history_store._LAST_POLL = 0.0
+    history_store._MARKET_AGGS.clear()
+    history_store._CATEGORY_MASKS.clear()
+
+# ---------- Cases ----------
+def _reset_cards():
+    data_loader._card_data, data_loader._card_dict, data_loader._set_dict = [], {}, {}
+
+def group_load(args, rng):
+    out = {}
+    out["load_data"] = _measure(lambda: (_reset_cards(), data_loader.load_data()), [()], args.heavy_runs, warmup=False)
+    out["_load_price_data"] = _measure(data_loader._load_price_data, [()], args.heavy_runs, warmup=False)
+    return out
+
+def group_search(args, rng):
+    return {f"search_local_cards/{kind}": _measure(data_loader.search_local_cards, inputs, args.runs)
+            for kind, inputs in _search_inputs(rng).items()}
+
+def group_override(args, rng):
+    return {f"get_price_override/{kind}": _measure(data_loader.get_price_override, inputs, args.runs)
+            for kind, inputs in _override_inputs(rng).items()}
+
+def group_scraper(args, rng):
+    _ensure_greek_file()
+    scraper._ensure_loaded()
+    items = scraper._VIEW["items"]
+    sample = rng.sample(items, min(60, len(items)))
+    words = sorted({w for it in sample for w in it["title"].split() if len(w) > 3})
+    queries = [(" ".join(rng.sample(words, rng.choice((1, 2)))), sort)
+               for sort in scraper.SORT_ORDERS for _ in range(15)]
+    typed = []
+    for it in sample[:10]:
+        t = it["title"]
+        typed.extend((t[:k],) for k in range(1, min(len(t), 30) + 1) if t[:k].strip())
+    related = [(it["title"], it["url"], 8) for it in sample]
+    return {
+        "scraper.search_products_all": _measure(scraper.search_products_all, queries, args.runs),
+        "scraper.search_products_page": _measure(scraper.search_products_page, queries, args.runs),
+        "scraper.suggest_titles": _measure(scraper.suggest_titles, typed, args.runs),
+        "scraper.get_related_products": _measure(scraper.get_related_products, related, args.runs),
+    }
+
+def group_app(args, rng):
+    _use_dated_history()
+    client = app_module.app.test_client()
+    titles = _history_titles(rng, 40)
+
+    def get(url, params=None):
+        resp = client.get(url, query_string=params)
+        resp.get_data()
+        # Never time an error path as if it were the endpoint.
+        if resp.status_code != 200:
+            raise RuntimeError(f"{url} {params or ''} -> {resp.status_code}: {resp.get_data(as_text=True)[:200]}")
+
+    return {
+        "GET /api/price-history": _measure(get, [("/api/price-history", {"title": t}) for t in titles], args.runs),
+        "GET /api/market-status": _measure(get, [("/api/market-status",)] * 10, args.runs),
+        "GET /api/global-related": _measure(get, [("/api/global-related", {"title": t}) for t in titles], args.runs),
+        "GET /api/sealed-products": _measure(get, [("/api/sealed-products",)] * 10, args.runs),
+    }
+
+GROUPS = {
+    "load": group_load,
+    "search": group_search,
+    "override": group_override,
+    "scraper": group_scraper,
+    "app": group_app,
+}
+
+# ---------- Report ----------
+def _git_rev():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except Exception:
+        return None
+
+def _print_results(results, baseline=None):
+    base = (baseline or {}).get("results", {})
+    print(f"{'case':<40} {'calls':>6} {'p50 ms':>10} {'p95 ms':>10} {'ops/s':>11} {'first ms':>10}"
+          + ("  p50 vs base" if base else ""))
+    for name, r in results.items():
+        line = (f"{name:<40} {r['calls']:>6} {r['p50_ms']:>10.3f} {r['p95_ms']:>10.3f} "
+                f"{r['ops_per_s']:>11.1f} {r['first_ms']:>10.3f}")
+        if name in base and base[name]["p50_ms"]:
+            line += f"  {r['p50_ms'] / base[name]['p50_ms']:>6.2f}x"
+        print(line)
+
+def main():
+    ap = argparse.ArgumentParser(description="Offline microbenchmarks with a JSON report")
+    ap.add_argument("--seed", type=int, default=42)
+    ap.add_argument("--runs", type=int, default=3, help="timed rounds over each case's inputs")
+    ap.add_argument("--heavy-runs", type=int, default=3, help="runs of load_data / _load_price_data")
+    ap.add_argument("--only", default="", help=f"comma-separated groups: {','.join(GROUPS)}")
+    ap.add_argument("--out", default=os.path.join(".cache", "bench", datetime.now().strftime("%Y%m%d-%H%M%S") + ".json"))
+    ap.add_argument("--compare", default="", help="earlier report to show p50 ratios against")
+    args = ap.parse_args()
+
+    selected = [g.strip() for g in args.only.split(",") if g.strip()] or list(GROUPS)
+    unknown = [g for g in selected if g not in GROUPS]
+    if unknown:
+        ap.error(f"unknown group(s): {', '.join(unknown)}")
+
+    results = {}
+    for group in selected:
+        # Each group gets its own seeded RNG so --only runs use the same inputs.
+        rng = random.Random(f"{args.seed}:{group}")
+        results.update(GROUPS[group](args, rng))
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "git_rev": _git_rev(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "seed": args.seed,
+            "runs": args.runs,
+            "heavy_runs": args.heavy_runs,
+            "groups": selected,
+            "cards": len(data_loader._card_data),
+            "greek_items": len(scraper._VIEW["items"]),
+        },
+        "results": results,
+    }
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+    print()
+    _print_results(results, baseline)
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.out)), exist_ok=True)
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nWrote {args.out}")
+
+if __name__ == "__main__":
+    main()
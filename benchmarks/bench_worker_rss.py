@@ -0,0 +1,203 @@
+# benchmarks/bench_worker_rss.py
+# Per-worker memory of a real gunicorn deployment, with and without preload:
+# starts `gunicorn app:app` for each mode, replays a mixed request load, and
+# reads /proc/<pid>/smaps_rollup of the master and every worker after boot and
+# after the traffic.
+#
+#   python benchmarks/bench_worker_rss.py [--workers 4] [--requests 4000] [--modes separate,preload,freeze]
+#
+# Modes (all use gunicorn.conf.py from the repo root):
+#   separate  GUNICORN_PRELOAD=0                      every worker imports app.py itself
+#   preload   GUNICORN_PRELOAD=1 GUNICORN_GC_FREEZE=0 built once in the master, no gc.freeze()
+#   freeze    GUNICORN_PRELOAD=1 GUNICORN_GC_FREEZE=1 the default
+#
+# Linux only. Card detail requests go to fake_pokemontcg.py, so no network is
+# needed. Uses GREEK_PRICES_FILE / GREEK_PRICES_DIR if set, otherwise the
+# newest Greek_Prices_History day as the Greek prices file.
+
+import argparse
+import glob
+import os
+import random
+import signal
+import socket
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+from fake_pokemontcg import FakePokemonTCG  # noqa: E402
+
+MODES = {
+    "separate": {"GUNICORN_PRELOAD": "0"},
+    "preload": {"GUNICORN_PRELOAD": "1", "GUNICORN_GC_FREEZE": "0"},
+    "freeze": {"GUNICORN_PRELOAD": "1", "GUNICORN_GC_FREEZE": "1"},
+}
+FIELDS = ("Rss", "Pss", "Shared_Clean", "Shared_Dirty", "Private_Clean", "Private_Dirty")
+
+# ---------- /proc ----------
+def _smaps(pid):
+    """smaps_rollup fields in MiB."""
+    out = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) >= 2 and parts[0].rstrip(":") in FIELDS:
+                out[parts[0].rstrip(":")] = int(parts[1]) / 1024.0
+    out["Private"] = out.get("Private_Clean", 0.0) + out.get("Private_Dirty", 0.0)
+    return out
+
+def _children(pid):
+    kids = []
+    for stat in glob.glob("/proc/[0-9]*/stat"):
+        try:
+            with open(stat) as f:
+                fields = f.read().rsplit(")", 1)[1].split()
+        except OSError:
+            continue
+        if int(fields[1]) == pid:
+            kids.append(int(stat.split("/")[2]))
+    return sorted(kids)
+
+# ---------- Traffic ----------
+def _workload(cards, n, seed):
+    rng = random.Random(seed)
+    ids = list(cards)
+    titles = []
+    history = sorted(glob.glob(os.path.join("Greek_Prices_History", "*.csv")))
+    if history:
+        import csv
+        with open(history[-1], encoding="utf-8-sig", newline="") as f:
+            titles = [r["item_title"] for r in csv.DictReader(f) if r.get("item_title")]
+    words = sorted({w for t in titles for w in t.split() if len(w) > 3}) or ["booster"]
+    urls = []
+    for _ in range(n):
+        card = cards[rng.choice(ids)]
+        kind = rng.random()
+        if kind < 0.30:
+            urls.append(("/api/tcg/card", {"id": card["id"]}))
+        elif kind < 0.50:
+            name = card["name"]
+            urls.append(("/api/tcg/suggest", {"q": name[:rng.randint(2, max(2, len(name)))]}))
+        elif kind < 0.60:
+            urls.append(("/api/tcg/related", {"setId": card["set"]["id"], "rarity": card.get("rarity") or "",
+                                              "cardId": card["id"]}))
+        elif kind < 0.75:
+            urls.append(("/api/search", {"q": rng.choice(words), "sort": rng.choice(["bestsellers", "price_asc"])}))
+        elif kind < 0.82:
+            urls.append(("/api/suggest", {"q": rng.choice(words)[:4]}))
+        elif kind < 0.88 and titles:
+            urls.append(("/api/price-history", {"title": rng.choice(titles)}))
+        elif kind < 0.93 and titles:
+            urls.append(("/api/global-related", {"title": rng.choice(titles)}))
+        else:
+            urls.append((rng.choice(["/api/market-status", "/api/sealed-products", "/top100"]), None))
+    return urls
+
+def _replay(base, urls, threads):
+    def run(chunk):
+        s = requests.Session()
+        bad = 0
+        for path, params in chunk:
+            # A fresh connection per request so the workers share the load.
+            r = s.get(base + path, params=params, headers={"Connection": "close"}, timeout=60)
+            bad += r.status_code >= 500
+        return bad
+    with ThreadPoolExecutor(threads) as pool:
+        return sum(pool.map(run, [urls[k::threads] for k in range(threads)]))
+
+# ---------- Runs ----------
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def _wait_ready(base, proc, workers, timeout=300):
+    t0 = time.time()
+    while time.time() - t0 < timeout:
+        if proc.poll() is not None:
+            raise RuntimeError("gunicorn exited during startup")
+        try:
+            if requests.get(base + "/api/greek-prices/status", timeout=5).ok and len(_children(proc.pid)) >= workers:
+                # Touch every worker so lazily-initialized state exists before the "boot" reading.
+                for _ in range(workers * 4):
+                    requests.get(base + "/api/greek-prices/status", headers={"Connection": "close"}, timeout=30)
+                return time.time() - t0
+        except requests.RequestException:
+            pass
+        time.sleep(0.5)
+    raise RuntimeError("gunicorn did not become ready")
+
+def _summary(proc_pid):
+    master = _smaps(proc_pid)
+    workers = [_smaps(pid) for pid in _children(proc_pid)]
+    avg = {k: sum(w[k] for w in workers) / len(workers) for k in workers[0]}
+    total_pss = master["Pss"] + sum(w["Pss"] for w in workers)
+    return master, avg, total_pss, len(workers)
+
+def _run_mode(mode, args, env_base, urls):
+    port = _free_port()
+    base = f"http://127.0.0.1:{port}"
+    env = dict(env_base, **MODES[mode])
+    proc = subprocess.Popen([sys.executable, "-m", "gunicorn", "app:app", "-b", f"127.0.0.1:{port}",
+                             "-w", str(args.workers), "--timeout", "300", "--log-level", "warning"],
+                            cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        boot_s = _wait_ready(base, proc, args.workers)
+        time.sleep(1.0)
+        boot = _summary(proc.pid)
+        t0 = time.perf_counter()
+        errors = _replay(base, urls, args.threads)
+        elapsed = time.perf_counter() - t0
+        time.sleep(1.0)
+        after = _summary(proc.pid)
+    finally:
+        proc.send_signal(signal.SIGTERM)
+        proc.wait(60)
+    return {"boot_s": boot_s, "boot": boot, "after": after, "errors": errors,
+            "req_per_s": len(urls) / elapsed}
+
+def _print(mode, r):
+    print(f"\n{mode}: ready in {r['boot_s']:.1f} s, {r['req_per_s']:.0f} req/s, {r['errors']} 5xx")
+    print(f"  {'':14} {'Rss':>8} {'Pss':>8} {'Shared':>8} {'Private':>8}   (MiB)")
+    for label in ("boot", "after"):
+        master, avg, total_pss, n = r[label]
+        shared = avg["Shared_Clean"] + avg["Shared_Dirty"]
+        print(f"  worker {label:<7} {avg['Rss']:8.1f} {avg['Pss']:8.1f} {shared:8.1f} {avg['Private']:8.1f}"
+              f"   master Rss {master['Rss']:.1f}, total Pss ({n} workers + master) {total_pss:.1f}")
+
+def main():
+    ap = argparse.ArgumentParser(description="gunicorn per-worker RSS/PSS with and without preload")
+    ap.add_argument("--workers", type=int, default=4)
+    ap.add_argument("--requests", type=int, default=4000)
+    ap.add_argument("--threads", type=int, default=4)
+    ap.add_argument("--modes", default=",".join(MODES))
+    ap.add_argument("--seed", type=int, default=42)
+    args = ap.parse_args()
+
+    modes = [m.strip() for m in args.modes.split(",") if m.strip()]
+    unknown = [m for m in modes if m not in MODES]
+    if unknown:
+        ap.error(f"unknown mode(s): {', '.join(unknown)}")
+
+    fake = FakePokemonTCG(seed=args.seed)
+    env = dict(os.environ, POKEMON_TCG_BASE_URL=fake.start())
+    if not (env.get("GREEK_PRICES_FILE") or env.get("GREEK_PRICES_DIR")):
+        days = sorted(glob.glob(os.path.join(ROOT, "Greek_Prices_History", "*.csv")), key=os.path.getmtime)
+        if days:
+            env["GREEK_PRICES_FILE"] = days[-1]
+    urls = _workload(fake.cards, args.requests, args.seed)
+
+    print(f"{args.workers} workers, {args.requests} requests over {args.threads} client threads")
+    for mode in modes:
+        _print(mode, _run_mode(mode, args, env, urls))
+    fake.stop()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,240 @@
+# benchmarks/gen_scale_data.py
+# Writes synthetic data files at production-like scale, in the exact layouts the
+# loaders read, for load and capacity testing:
+#
+#   python benchmarks/gen_scale_data.py --out .cache/scale [--greek-listings 1000000]
+#       [--history-days 365] [--history-items 3000] [--price-rows 500000]
+#       [--sealed-rows 20000] [--trending-rows 100] [--only greek,history,...] [--seed 42]
+#
+# Output (then export the printed variables and start the app as usual):
+#   <out>/greek prices/greek_prices.csv               scraper (GREEK_PRICES_DIR)
+#   <out>/Greek_Prices_History/DD MM YYYY.csv         history_store (GREEK_HISTORY_DIR)
+#   <out>/prices/tcg_prices.csv                       data_loader (CARD_PRICES_DIR)
+#   <out>/sealed_item_prices/tcg_sealed_prices.csv    /api/sealed-products (SEALED_PRICES_FILE)
+#   <out>/Top 100 trending/<run>/pokemon_wizard_prices.csv   /top100 (TRENDING_DIR)
+#
+# Vocabulary comes from the bundled samples and the local card corpus: Greek
+# titles from Greek_Prices_History, card names/numbers from the card JSON, set
+# names and [variant] tags from prices/tcg_prices.csv. Prices keep each
+# source's format: "58,00€" (bestprice), "93,50 €" (skroutz), "$1,984.28"
+# (price sheets), and card titles end in "#60"-style numbers.
+
+import argparse
+import csv
+import glob
+import json
+import os
+import random
+import re
+import sys
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+from data_loader import DATA_PATH, SETS_PATH  # noqa: E402
+from history_store import parse_price_to_float  # noqa: E402
+
+PARTS = ("greek", "history", "prices", "sealed", "trending")
+SEALED_TYPES = ("Booster Box", "Booster Pack", "Elite Trainer Box", "Booster Bundle", "Collection",
+                "Tin", "Blister Pack", "Sleeves", "Binder", "Theme Deck", "Build & Battle Box")
+PRODUCT_CODE_RE = re.compile(r"\(?POK\d{5,6}\)?")
+
+# ---------- Formats ----------
+def _eur(v, site):
+    """Greek shop format: '1.234,56€' on bestprice, '1.234,56 €' on skroutz."""
+    s = f"{v:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
+    return f"{s} €" if site == "skroutz" else f"{s}€"
+
+def _usd(v):
+    return f"${v:,.2f}"
+
+def _slug(title):
+    return re.sub(r"[^a-z0-9]+", "-", title.lower()).strip("-")[:80] or "item"
+
+def _price(rng, base):
+    return max(0.5, base * rng.lognormvariate(0, 0.25))
+
+# ---------- Vocabulary ----------
+class Vocab:
+    def __init__(self, rng):
+        self.rng = rng
+        self.greek = []  # (title, price) from the history samples
+        seen = set()
+        for path in sorted(glob.glob(os.path.join("Greek_Prices_History", "*.csv"))):
+            with open(path, encoding="utf-8-sig", newline="") as f:
+                for r in csv.DictReader(f):
+                    title, price = (r.get("item_title") or "").strip(), parse_price_to_float(r.get("price"))
+                    if title and price and title not in seen:
+                        seen.add(title)
+                        self.greek.append((PRODUCT_CODE_RE.sub("", title).strip(), price))
+
+        self.sets, self.cards = {}, []  # set id -> name; (name, number, set name, rarity)
+        for path in glob.glob(os.path.join(SETS_PATH, "*.json")):
+            with open(path, encoding="utf-8") as f:
+                for s in json.load(f):
+                    self.sets[s["id"]] = s["name"]
+        for path in sorted(glob.glob(os.path.join(DATA_PATH, "*.json"))):
+            set_name = self.sets.get(os.path.splitext(os.path.basename(path))[0])
+            if not set_name:
+                continue
+            with open(path, encoding="utf-8") as f:
+                for c in json.load(f):
+                    self.cards.append((c.get("name") or "", c.get("number") or "", set_name, c.get("rarity") or "Common"))
+
+        games, tags = Counter(), Counter()
+        with open(os.path.join("prices", "tcg_prices.csv"), encoding="utf-8-sig", newline="") as f:
+            for r in csv.DictReader(f):
+                games[r["game"]] += 1
+                tags.update(re.findall(r"\[(.*?)\]", r["card_title"]))
+        self.games = list(games) + [f"Pokemon {n}" for n in self.sets.values()]
+        self.tags = [t for t, _ in tags.most_common(40)] or ["Reverse Holo"]
+
+        if not self.greek or not self.cards:
+            sys.exit("Sample data missing: need Greek_Prices_History/*.csv and the card JSON corpus.")
+
+    def greek_listing(self, k):
+        title, base = self.rng.choice(self.greek)
+        return f"{title} (POK{100000 + k % 900000})", base
+
+    def card_title(self):
+        name, number, set_name, rarity = self.rng.choice(self.cards)
+        tag = f" [{self.rng.choice(self.tags)}]" if self.rng.random() < 0.3 else ""
+        return f"{name}{tag} #{number}", set_name, rarity
+
+# ---------- Writers ----------
+def _writer(path, header):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    f = open(path, "w", encoding="utf-8", newline="")
+    w = csv.writer(f)
+    w.writerow(header)
+    return f, w
+
+def _greek_row(vocab, rng, k, price=None):
+    site = "skroutz" if rng.random() < 0.4 else "bestprice"
+    title, base = vocab.greek_listing(k)
+    price = _price(rng, base) if price is None else price
+    if site == "skroutz":
+        url = f"https://www.skroutz.gr/s/{50000000 + k}/{_slug(title)}.html"
+        img = f"https://a.scdn.gr/images/sku_main_images/{k:08d}/large_{_slug(title)}.jpeg"
+    else:
+        url = f"https://www.bestprice.gr/to/{190000000 + k}/{_slug(title)}.html?from=cat"
+        img = f"https://bbpcdn.pstatic.gr/bpimg0/{k:08d}/{_slug(title)}.webp"
+    return site, title, _eur(price, site), img, url
+
+def gen_greek(args, vocab, rng, out, today):
+    path = os.path.join(out, "greek prices", "greek_prices.csv")
+    f, w = _writer(path, ["website", "item_title", "price", "image_url", "product_url", "date"])
+    with f:
+        for k in range(args.greek_listings):
+            w.writerow([*_greek_row(vocab, rng, k), today.strftime("%d/%m/%Y")])
+    return path
+
+def gen_history(args, vocab, rng, out, today):
+    # A fixed product universe whose prices random-walk from day to day.
+    products = [list(_greek_row(vocab, rng, k)) + [None] for k in range(args.history_items)]
+    for p in products:
+        p[5] = parse_price_to_float(p[2])
+    dirname = os.path.join(out, "Greek_Prices_History")
+    for d in range(args.history_days, 0, -1):
+        day = today - timedelta(days=d - 1)
+        f, w = _writer(os.path.join(dirname, day.strftime("%d %m %Y") + ".csv"),
+                       ["website", "item_title", "price", "image_url", "product_url", "date"])
+        with f:
+            for p in products:
+                p[5] = max(0.5, p[5] * rng.uniform(0.97, 1.035))
+                if rng.random() < 0.9:  # not every shop lists every product every day
+                    w.writerow([p[0], p[1], _eur(p[5], p[0]), p[3], p[4], day.strftime("%d/%m/%Y")])
+    return dirname
+
+def gen_prices(args, vocab, rng, out, today):
+    path = os.path.join(out, "prices", "tcg_prices.csv")
+    f, w = _writer(path, ["game", "card_title", "unguided_price", "psa9_price", "psa10_price", "date"])
+    with f:
+        for _ in range(args.price_rows):
+            title, set_name, _ = vocab.card_title()
+            game = f"Pokemon {set_name}" if rng.random() < 0.6 else rng.choice(vocab.games)
+            raw = rng.lognormvariate(0.5, 1.3)
+            cells = [_usd(raw) if rng.random() < 0.9 else ""]
+            cells.append(_usd(raw * rng.uniform(2, 8)) if rng.random() < 0.6 else "")
+            cells.append(_usd(raw * rng.uniform(6, 40)) if rng.random() < 0.6 else "")
+            w.writerow([game, title, *cells, today.strftime("%d/%m/%Y")])
+    return path
+
+def gen_sealed(args, vocab, rng, out, today):
+    path = os.path.join(out, "sealed_item_prices", "tcg_sealed_prices.csv")
+    f, w = _writer(path, ["set_name", "item_title", "raw_price", "image_url"])
+    with f:
+        for k in range(args.sealed_rows):
+            set_name = rng.choice(vocab.games)
+            if rng.random() < 0.7:
+                title = rng.choice(SEALED_TYPES)
+                if rng.random() < 0.15:
+                    title += f" [{rng.choice(('Black Logo', 'Pokemon Center', 'Sealed Case', '1st Edition'))}]"
+                price = rng.lognormvariate(4, 1)
+            else:
+                title = vocab.card_title()[0]
+                price = rng.lognormvariate(0.5, 1.3)
+            w.writerow([set_name, title, _usd(price), f"https://storage.googleapis.com/images.pricecharting.com/synthetic{k}/60.jpg"])
+    return path
+
+def gen_trending(args, vocab, rng, out, today):
+    run = today.strftime("%Y-%m-%d_%H-%M-%S")
+    path = os.path.join(out, "Top 100 trending", run, "pokemon_wizard_prices.csv")
+    f, w = _writer(path, ["website", "item_title", "price", "image_url", "product_url", "date",
+                          "card_type", "rarity", "set_name", "price_trend"])
+    with f:
+        for k in range(args.trending_rows):
+            name, _, set_name, rarity = rng.choice(vocab.cards)
+            pid = 80000 + k
+            w.writerow(["pokemonwizard", name, _usd(rng.lognormvariate(3, 1.2)),
+                        f"https://tcgplayer-cdn.tcgplayer.com/product/{pid}_200w.jpg",
+                        f"https://www.pokemonwizard.com/cards/{pid}/{_slug(name)}",
+                        today.strftime("%d/%m/%Y"), rng.choice(("Normal", "Holofoil", "Reverse Holofoil")),
+                        rarity, set_name, f"{rng.uniform(-40, 180):.2f}"])
+    return os.path.join(out, "Top 100 trending")
+
+GENERATORS = {"greek": gen_greek, "history": gen_history, "prices": gen_prices,
+              "sealed": gen_sealed, "trending": gen_trending}
+ENV_VARS = {"greek": "GREEK_PRICES_DIR", "history": "GREEK_HISTORY_DIR", "prices": "CARD_PRICES_DIR",
+            "sealed": "SEALED_PRICES_FILE", "trending": "TRENDING_DIR"}
+
+def main():
+    ap = argparse.ArgumentParser(description="Generate synthetic data at production scale")
+    ap.add_argument("--out", default=os.path.join(".cache", "scale"))
+    ap.add_argument("--greek-listings", type=int, default=1_000_000)
+    ap.add_argument("--history-days", type=int, default=365)
+    ap.add_argument("--history-items", type=int, default=3000, help="products tracked per history day")
+    ap.add_argument("--price-rows", type=int, default=500_000)
+    ap.add_argument("--sealed-rows", type=int, default=20_000)
+    ap.add_argument("--trending-rows", type=int, default=100)
+    ap.add_argument("--only", default="", help=f"comma-separated parts: {','.join(PARTS)}")
+    ap.add_argument("--seed", type=int, default=42)
+    args = ap.parse_args()
+
+    parts = [p.strip() for p in args.only.split(",") if p.strip()] or list(PARTS)
+    unknown = [p for p in parts if p not in GENERATORS]
+    if unknown:
+        ap.error(f"unknown part(s): {', '.join(unknown)}")
+
+    vocab = Vocab(random.Random(args.seed))
+    out = os.path.abspath(args.out)
+    today = datetime.now().replace(microsecond=0)
+    exports = []
+    for part in parts:
+        t0 = time.perf_counter()
+        # Per-part RNG so regenerating one part leaves the others' content unchanged.
+        rng = random.Random(f"{args.seed}:{part}")
+        vocab.rng = rng
+        target = GENERATORS[part](args, vocab, rng, out, today)
+        env = ENV_VARS[part]
+        value = os.path.dirname(target) if part in ("greek", "prices") else target
+        exports.append(f'export {env}="{value}"')
+        print(f"{part:<9} {time.perf_counter() - t0:7.1f}s  {target}")
+    print("\n" + "\n".join(exports))
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,16 @@
 # data_loader.py
 # Unified, deduped loader with robust normalization and Gold Star handling
 
+import csv
+import gc
+import itertools
 import json
 import os
+import pickle
 import re
+import time
+from array import array
+from bisect import bisect_right
 from unicodedata import normalize
 from difflib import SequenceMatcher
 
@@ -16,24 +23,62 @@ try:
 except Exception:
     pd = None  # type: ignore
 
+try:
+    import openpyxl  # type: ignore
+except Exception:
+    openpyxl = None  # type: ignore
+
 # --- Paths (same as before) ---------------------------------------------------
 DATA_PATH  = os.path.join('pokemon-tcg-data-master', 'cards', 'en')
 SETS_PATH  = os.path.join('pokemon-tcg-data-master', 'sets', 'en')
-PRICES_DIR = os.path.join('prices')
+PRICES_DIR = os.environ.get('CARD_PRICES_DIR', os.path.join('prices'))
+
+# Pickled snapshot of the normalized card corpus (set CARD_SNAPSHOT_PATH="" to disable)
+SNAPSHOT_PATH = os.environ.get(
+    "CARD_SNAPSHOT_PATH",
+    os.path.join('.cache', 'cards_snapshot.pickle')
+).strip()
+# Bump whenever the card normalization below changes so old snapshots are rebuilt.
+_SNAPSHOT_VERSION = 1
 
 # --- In-memory stores ---------------------------------------------------------
 _card_data = []
 _card_dict = {}
 _set_dict  = {}
 
+# Search index over _card_data (built by _build_search_index). Request paths
+# work on card positions and these compact arrays, and only touch the card
+# dicts they return: reading an object writes its refcount, which would copy
+# the page into every forked gunicorn worker (see gunicorn.conf.py).
+_search_postings = {}            # token -> array of card positions for name + set tokens
+_search_vocab = []               # distinct tokens, in _search_vocab_blob order
+_search_vocab_blob = ''          # '\n'.join(_search_vocab), scanned for partial tokens
+_search_vocab_offsets = []       # start offset of each vocab token inside the blob
+_cards_by_number_digits = {}     # digits-only number -> array of card positions
+_search_card_tokens = []         # card position -> (name token set, set token set)
+_search_card_ties = b''          # card position -> rarity tie-break (0..3)
+
+# (set_id, rarity) -> array of card positions, for related-card lookups
+_cards_by_set_rarity = {}
+_card_pos = {}                   # card id -> position in _card_data
+
 # Price lookup globals
 _price_map = {}                  # (name_norm, set_norm, num_norm) -> {market, psa9, psa10, ...}
 _price_index = set()             # set of (name_norm, num_norm) that exist in CSV (any set)
 _by_name_num = {}                # (name_norm, num_norm) -> list[(set_norm, val)]
 _price_index_by_setnum = {}      # (set_norm, num_norm) -> [(name_norm, prices)]  (kept if you use it elsewhere)
+_price_by_card_id = {}           # card id -> (price dict | None, reason), see get_price_override_ex
+PRICE_LOAD_STATS = {"loads": 0, "failures": 0, "rows": 0, "seconds": 0.0}  # last load's rows/seconds
+
+# Fuzzy set resolution, computed once per price load (see _build_set_aliases)
+_SET_MATCH_THRESHOLD = 0.72
+_local_set_norms = frozenset()   # normalized set names present in _card_data
+_set_alias = {}                  # csv set_norm -> (best local set_norm, score) when score >= threshold
+_unmatched_price_sets = []       # csv set_norms with no local set at or above the threshold
 
 # --- Normalization ------------------------------------------------------------
 _alnum = re.compile(r'[^a-z0-9]+')
+_WS_RE = re.compile(r'\s+')
 
 # Words/markers that should *not* be part of the name key.
 # (Added "gold star" family here)
@@ -46,6 +91,13 @@ _VARIANT_WORDS = {
     'gold star', 'gold-star', 'goldstar'
 }
 
+# Compiled once; applied in the same order _strip_variant_tags always used.
+_VARIANT_WORD_RES = [
+    re.compile(r'(?:^|\s|[-–—])' + re.escape(w) + r'(?:$|\b)', re.IGNORECASE)
+    for w in _VARIANT_WORDS
+]
+_BRACKET_RE = re.compile(r'\[(.*?)\]')
+
 _GOLD_STAR_RE = re.compile(r'\bgold\s*-\s*star\b|\bgold\s*star\b|\bgoldstar\b', re.IGNORECASE)
 
 def _unescape_decode(s: str) -> str:
@@ -64,7 +116,7 @@ def _ascii_lower(s: str) -> str:
 def _tokenize(s: str) -> str:
     s = _ascii_lower(s)
     s = _alnum.sub(' ', s)
-    s = re.sub(r'\s+', ' ', s).strip()
+    s = _WS_RE.sub(' ', s).strip()
     return s
 
 def _strip_variant_tags(text: str) -> str:
@@ -84,13 +136,13 @@ def _strip_variant_tags(text: str) -> str:
         return m.group(0)
 
     # remove [ ... ] chunks that are variant-y
-    s = re.sub(r'\[(.*?)\]', _repl, s)
+    s = _BRACKET_RE.sub(_repl, s)
 
     # also drop loose variant words that appear as prefix/suffix
-    for w in list(_VARIANT_WORDS):
-        s = re.sub(r'(?:^|\s|[-–—])' + re.escape(w) + r'(?:$|\b)', ' ', s, flags=re.IGNORECASE)
+    for rx in _VARIANT_WORD_RES:
+        s = rx.sub(' ', s)
 
-    s = re.sub(r'\s+', ' ', s).strip()
+    s = _WS_RE.sub(' ', s).strip()
     return s
 
 def _normalize_set(text: str) -> str:
@@ -158,13 +210,93 @@ def _set_similarity(a: str, b: str) -> float:
     seq = SequenceMatcher(None, a, b).ratio()
     return 0.6 * jac + 0.4 * seq
 
-# --- Load local sets & cards --------------------------------------------------
-def load_data():
-    """Load local JSON for sets and cards, then price data."""
-    global _card_data, _card_dict, _set_dict
-    if _card_data:
+def _best_local_set(csv_set: str, local_sets):
+    """
+    Highest _set_similarity(local, csv_set) over local_sets (first wins on ties).
+    quick_ratio() bounds ratio() from above, so hopeless pairs skip the full diff.
+    """
+    tb = _token_set(csv_set)
+    sm = SequenceMatcher(None)
+    sm.set_seq2(csv_set)
+    best, best_score = None, 0.0
+    for local in local_sets:
+        ta = _token_set(local)
+        jac = (len(ta & tb) / max(1, len(ta | tb))) if (ta and tb) else 0.0
+        sm.set_seq1(local)
+        if 0.6 * jac + 0.4 * sm.quick_ratio() <= best_score:
+            continue
+        score = 0.6 * jac + 0.4 * sm.ratio()
+        if score > best_score:
+            best, best_score = local, score
+    return best, best_score
+
+# --- Card corpus snapshot -----------------------------------------------------
+def _source_fingerprint():
+    """(dir, filename, mtime_ns, size) for every set/card JSON file load_data reads."""
+    fp = []
+    for dirname in (SETS_PATH, DATA_PATH):
+        if not os.path.isdir(dirname):
+            continue
+        for filename in sorted(os.listdir(dirname)):
+            if not filename.endswith('.json'):
+                continue
+            try:
+                st = os.stat(os.path.join(dirname, filename))
+            except OSError:
+                continue
+            fp.append((dirname, filename, st.st_mtime_ns, st.st_size))
+    return tuple(fp)
+
+def _read_snapshot(fingerprint):
+    """Return (card_data, card_dict, set_dict) from the snapshot if it is still current."""
+    if not SNAPSHOT_PATH or not os.path.isfile(SNAPSHOT_PATH):
+        return None
+    # Unpickling ~20k nested dicts triggers many gen-0 collections; skip them.
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        with open(SNAPSHOT_PATH, 'rb') as f:
+            payload = pickle.load(f)
+    except Exception as e:
+        print(f"Warning: Ignoring unreadable card snapshot {SNAPSHOT_PATH}: {e}")
+        return None
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+    if (not isinstance(payload, dict)
+            or payload.get('version') != _SNAPSHOT_VERSION
+            or payload.get('fingerprint') != fingerprint):
+        return None
+    return payload['card_data'], payload['card_dict'], payload['set_dict']
+
+def _write_snapshot(fingerprint):
+    """Persist the normalized stores; written to a temp file and swapped in atomically."""
+    if not SNAPSHOT_PATH or not _card_data:
         return
+    payload = {
+        'version': _SNAPSHOT_VERSION,
+        'fingerprint': fingerprint,
+        'card_data': _card_data,
+        'card_dict': _card_dict,
+        'set_dict': _set_dict,
+    }
+    tmp_path = f"{SNAPSHOT_PATH}.{os.getpid()}.tmp"
+    try:
+        os.makedirs(os.path.dirname(SNAPSHOT_PATH) or '.', exist_ok=True)
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(payload, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, SNAPSHOT_PATH)
+        print(f"Wrote card snapshot to: {SNAPSHOT_PATH}")
+    except Exception as e:
+        print(f"Warning: Could not write card snapshot {SNAPSHOT_PATH}: {e}")
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
 
+# --- Load local sets & cards --------------------------------------------------
+def _load_cards_from_json():
+    """Parse the set/card JSON files and normalize every card into the stores."""
     # Sets
     print(f"Loading sets from: {SETS_PATH}")
     if os.path.isdir(SETS_PATH):
@@ -203,14 +335,86 @@ def load_data():
                 except json.JSONDecodeError:
                     print(f"Warning: Could not decode JSON from card file {filename}")
 
+def load_data():
+    """Load local sets and cards (from the snapshot when still current), then price data."""
+    global _card_data, _card_dict, _set_dict
+    if _card_data:
+        return
+
+    fingerprint = _source_fingerprint()
+    snapshot = _read_snapshot(fingerprint)
+    if snapshot:
+        _card_data, _card_dict, _set_dict = snapshot
+        print(f"Loaded card snapshot from: {SNAPSHOT_PATH}")
+    else:
+        _load_cards_from_json()
+        _write_snapshot(fingerprint)
+
     if not _card_data:
         print("Warning: No card data was loaded.")
     else:
         print(f"Successfully loaded {len(_card_data)} cards and {len(_set_dict)} sets into memory.")
 
+    _build_search_index()
+    _build_related_index()
     _load_price_data()  # load/refresh prices after cards
     # (Structure mirrors your original file.) :contentReference[oaicite:3]{index=3}
 
+# --- Local search index -------------------------------------------------------
+def _build_search_index():
+    """Index name/set tokens and number digits of every card by its _card_data position."""
+    global _search_postings, _search_vocab, _search_vocab_blob, _search_vocab_offsets
+    global _cards_by_number_digits, _search_card_tokens, _search_card_ties
+    postings = {}
+    by_digits = {}
+    card_tokens = []
+    ties = bytearray(len(_card_data))
+    set_tokens_by_name = {}
+    for pos, card in enumerate(_card_data):
+        name_tokens = frozenset(card['_normalized_name'].split())
+        set_tokens = set_tokens_by_name.get(card['_normalized_set'])
+        if set_tokens is None:
+            set_tokens = frozenset(card['_normalized_set'].split())
+            set_tokens_by_name[card['_normalized_set']] = set_tokens
+        card_tokens.append((name_tokens, set_tokens))
+        for tok in name_tokens | set_tokens:
+            postings.setdefault(tok, []).append(pos)
+        digits = card['_normalized_number_digits']
+        if digits:
+            by_digits.setdefault(digits, []).append(pos)
+        rarity = (card.get('rarity') or '').lower()
+        tie = 0
+        if 'rare' in rarity:  tie = 1
+        if 'holo' in rarity:  tie = 2
+        if 'ultra' in rarity: tie = 3
+        ties[pos] = tie
+
+    vocab = sorted(postings)
+    offsets = []
+    at = 0
+    for tok in vocab:
+        offsets.append(at)
+        at += len(tok) + 1
+
+    _search_postings = {tok: array('i', p) for tok, p in postings.items()}
+    _search_vocab = vocab
+    _search_vocab_blob = '\n'.join(vocab)
+    _search_vocab_offsets = array('i', offsets)
+    _cards_by_number_digits = {d: array('i', p) for d, p in by_digits.items()}
+    _search_card_tokens = card_tokens
+    _search_card_ties = bytes(ties)
+
+def _vocab_containing(fragment: str):
+    """Yield every indexed token that contains `fragment` (same test as `fragment in token`)."""
+    blob, offsets = _search_vocab_blob, _search_vocab_offsets
+    i = blob.find(fragment)
+    while i != -1:
+        idx = bisect_right(offsets, i) - 1
+        yield _search_vocab[idx]
+        # Resume at the next token so each token is reported once.
+        nxt = offsets[idx + 1] if idx + 1 < len(offsets) else len(blob)
+        i = blob.find(fragment, nxt)
+
 # --- Local search helpers (unchanged logic, tidied) ---------------------------
 def search_local_cards(query, limit=12):
     """Score and rank local cards by query."""
@@ -223,63 +427,71 @@ def search_local_cards(query, limit=12):
     if not search_tokens and not search_num_digits:
         return []
 
+    # Candidate cards and their partial text match counts (name + set).
+    # Without text tokens only an exact number match can score above zero.
+    text_match_counts = {}
+    if search_tokens:
+        for s_token in search_tokens:
+            matched = set()
+            for c_token in _vocab_containing(s_token):
+                matched.update(_search_postings[c_token])
+            for pos in matched:
+                text_match_counts[pos] = text_match_counts.get(pos, 0) + 1
+    else:
+        for pos in _cards_by_number_digits.get(search_num_digits, ()):
+            text_match_counts[pos] = 0
+
+    # Cards whose number equals the query digits, from the index instead of the card.
+    number_hits = set(_cards_by_number_digits.get(search_num_digits, ())) if search_num_digits else ()
+
     results_with_scores = []
-    for card in _card_data:
+    for pos in sorted(text_match_counts):
+        text_match_count = text_match_counts[pos]
         score = 0.0
-        name_tokens = set(card['_normalized_name'].split())
-        set_tokens  = set(card['_normalized_set'].split())
-        num_digits  = card['_normalized_number_digits']
-
-        # partial text matches (name + set)
-        all_tokens = name_tokens | set_tokens
-        text_match_count = 0
-        if search_tokens:
-            for s_token in search_tokens:
-                for c_token in all_tokens:
-                    if s_token in c_token:
-                        text_match_count += 1
-                        break
-        if search_tokens and text_match_count == 0:
-            continue
+        name_tokens, set_tokens = _search_card_tokens[pos]
+        # Membership tests only: the card's token strings are never referenced.
+        name_hits = sum(1 for t in search_tokens if t in name_tokens)
 
         score += 50 * text_match_count
-        score += 30 * len(search_tokens & name_tokens)
-        score += 20 * len(search_tokens & set_tokens)
+        score += 30 * name_hits
+        score += 20 * sum(1 for t in search_tokens if t in set_tokens)
 
-        if search_num_digits and num_digits == search_num_digits:
+        if pos in number_hits:
             score += 50
 
-        unmatched_tokens = len(name_tokens - search_tokens)
+        unmatched_tokens = len(name_tokens) - name_hits
         score -= 5 * unmatched_tokens
 
         if score > 0:
-            rarity = (card.get('rarity') or '').lower()
-            tie = 0
-            if 'rare' in rarity:  tie = 1
-            if 'holo' in rarity:  tie = 2
-            if 'ultra' in rarity: tie = 3
-            results_with_scores.append((score, tie, card))
+            results_with_scores.append((score, _search_card_ties[pos], pos))
 
     results_with_scores.sort(key=lambda x: (x[0], x[1]), reverse=True)
-    return [c for _, __, c in results_with_scores[:limit]]
+    return [_card_data[pos] for _, __, pos in results_with_scores[:limit]]
 
 def get_local_card_by_id(card_id):
     return _card_dict.get(card_id)
 
+def _build_related_index():
+    """Group card positions by (set id, rarity) in _card_data order."""
+    global _cards_by_set_rarity, _card_pos
+    index = {}
+    for pos, card in enumerate(_card_data):
+        set_id = (card.get('set') or {}).get('id')
+        rarity = card.get('rarity')
+        if set_id and rarity:
+            index.setdefault((set_id, rarity), []).append(pos)
+    _cards_by_set_rarity = {key: array('i', p) for key, p in index.items()}
+    _card_pos = {card['id']: pos for pos, card in enumerate(_card_data)}  # ids are unique, as in _card_dict
+
 def get_local_related_cards(set_id, rarity, current_card_id, count=5):
     if not all([set_id, rarity, current_card_id]):
         return []
-    related = []
-    for card in _card_data:
-        if (card.get('set') and
-            card['set'].get('id') == set_id and
-            card.get('rarity') == rarity and
-            card.get('id') != current_card_id):
-            related.append(card)
+    current = _card_pos.get(current_card_id, -1)
+    related = [pos for pos in _cards_by_set_rarity.get((set_id, rarity), ()) if pos != current]
     if len(related) > count:
         import random
-        return random.sample(related, count)
-    return related
+        related = random.sample(related, count)
+    return [_card_data[pos] for pos in related]
 
 # --- Price overrides: public API ---------------------------------------------
 def get_price_override(name, set_name, number):
@@ -289,13 +501,36 @@ def get_price_override(name, set_name, number):
       2) fallbacks: raw-name & digits-only number
       3) fuzzy set match limited to rows sharing the same (name, number)
     """
-    global _price_map, _price_index
-    name_norm = _name_norm(name)
-    set_norm  = _normalize_set(set_name)
-    num_norm  = _normalize_number(number)
+    return _lookup_price(_name_norm(name), _name_norm_raw(name),
+                         _normalize_set(set_name), _normalize_number(number))
+
+def get_price_override_ex(name, set_name, number):
+    """
+    Same as get_price_override but returns (value, reason)
+    reason ∈ {'found', 'unmatched_set', 'absent_in_csv'}
+    """
+    return _lookup_price_ex(_name_norm(name), _name_norm_raw(name),
+                            _normalize_set(set_name), _normalize_number(number))
+
+def get_card_price_override_ex(card_id):
+    """(value, reason) for a local card id, from the table built when prices load."""
+    hit = _price_by_card_id.get(card_id)
+    if hit is not None:
+        return hit
+    card = _card_dict.get(card_id)
+    if not card:
+        return None, 'absent_in_csv'
+    return get_price_override_ex(card.get('name'), (card.get('set') or {}).get('name'), card.get('number'))
 
+def get_card_price_override(card_id):
+    """Price dict for a local card id, or None; O(1) once prices are loaded."""
+    return get_card_price_override_ex(card_id)[0]
+
+# --- Price lookup internals ---------------------------------------------------
+def _lookup_price(name_norm, name_raw, set_norm, num_norm):
+    """get_price_override on already-normalized inputs."""
     # Exact + standard fallbacks
-    for nm in (name_norm, _name_norm_raw(name)):
+    for nm in (name_norm, name_raw):
         for nn in (num_norm, _digits_only(num_norm)):
             if not nn:
                 continue
@@ -304,38 +539,43 @@ def get_price_override(name, set_name, number):
                 return v
 
     # Fuzzy set, but only among rows with same (name, number)
-    nm_candidates = {name_norm, _name_norm_raw(name)}
+    nm_candidates = {name_norm, name_raw}
     nn_candidates = {num_norm, _digits_only(num_norm)}
     nn_candidates = {x for x in nn_candidates if x}
 
     best = None
     best_score = 0.0
-    for nm_k in nm_candidates:
-        for nn_k in nn_candidates:
-            for (set_k, val) in _by_name_num.get((nm_k, nn_k), []):
-                score = _set_similarity(set_norm, set_k)
-                if score > best_score:
-                    best_score = score
-                    best = val
-
-    if best and best_score >= 0.72:
+    if set_norm in _local_set_norms:
+        # Rows count only if their CSV set resolved to this local set.
+        for nm_k in nm_candidates:
+            for nn_k in nn_candidates:
+                for (set_k, val) in _by_name_num.get((nm_k, nn_k), []):
+                    alias = _set_alias.get(set_k)
+                    if alias and alias[0] == set_norm and alias[1] > best_score:
+                        best_score = alias[1]
+                        best = val
+    else:
+        for nm_k in nm_candidates:
+            for nn_k in nn_candidates:
+                for (set_k, val) in _by_name_num.get((nm_k, nn_k), []):
+                    score = _set_similarity(set_norm, set_k)
+                    if score > best_score:
+                        best_score = score
+                        best = val
+
+    if best and best_score >= _SET_MATCH_THRESHOLD:
         return best
 
     return None  # not found
 
-def get_price_override_ex(name, set_name, number):
-    """
-    Same as get_price_override but returns (value, reason)
-    reason ∈ {'found', 'unmatched_set', 'absent_in_csv'}
-    """
-    global _price_map, _price_index
-    val = get_price_override(name, set_name, number)
+def _lookup_price_ex(name_norm, name_raw, set_norm, num_norm):
+    """get_price_override_ex on already-normalized inputs."""
+    val = _lookup_price(name_norm, name_raw, set_norm, num_norm)
     if val is not None:
         return val, 'found'
 
-    nm_vars = {_name_norm(name), _name_norm_raw(name)}
-    nn_raw  = _normalize_number(number)
-    nn_vars = {nn_raw, _digits_only(nn_raw)}
+    nm_vars = {name_norm, name_raw}
+    nn_vars = {num_norm, _digits_only(num_norm)}
     nn_vars = {x for x in nn_vars if x}
 
     exists_any = any(((nm, nn) in _price_index) for nm in nm_vars for nn in nn_vars)
@@ -344,6 +584,45 @@ def get_price_override_ex(name, set_name, number):
     else:
         return None, 'absent_in_csv'
 
+def get_price_set_report():
+    """CSV set names matched to local sets (with score) and those left unmatched."""
+    return {
+        "matched": {csv_set: {"local_set": local, "score": round(score, 3)}
+                    for csv_set, (local, score) in sorted(_set_alias.items())},
+        "unmatched": list(_unmatched_price_sets),
+    }
+
+def _build_set_aliases(csv_sets):
+    """Map each normalized CSV set to its best local set once per price load.
+
+    Returns (local set norms, alias, unmatched) for the caller to publish
+    together with the price maps they were built for.
+    """
+    local_sets = sorted({card['_normalized_set'] for card in _card_data})
+    alias = {}
+    unmatched = []
+    for csv_set in sorted(csv_sets):
+        local, score = _best_local_set(csv_set, local_sets)
+        if local is not None and score >= _SET_MATCH_THRESHOLD:
+            alias[csv_set] = (local, score)
+        else:
+            unmatched.append(csv_set)
+    print(f"Resolved {len(alias)} of {len(csv_sets)} price sets to local sets; "
+          f"{len(unmatched)} unmatched (see get_price_set_report()).")
+    return frozenset(local_sets), alias, unmatched
+
+def _link_card_prices():
+    """Resolve every local card against the current price indexes in one pass."""
+    global _price_by_card_id
+    table = {}
+    for card in _card_data:
+        table[card['id']] = _lookup_price_ex(
+            card['_normalized_name'], _name_norm_raw(card.get('name')),
+            card['_normalized_set'], card['_normalized_number'])
+    _price_by_card_id = table
+    found = sum(1 for v, _ in table.values() if v is not None)
+    print(f"Linked prices for {found} of {len(table)} local cards.")
+
 def refresh_price_data():
     _load_price_data()
 
@@ -405,129 +684,165 @@ def _insert_price_key(price_map, key, price_obj, score):
         new_obj['_score'] = score
         price_map[key] = new_obj
 
+# Header names accepted for each price-file field, in precedence order.
+_PRICE_COLUMNS = {
+    'name':  ('name', 'card name', 'card', 'title', 'card_title'),
+    'set':   ('set', 'set name', 'game'),
+    'num':   ('number', 'no', '#'),
+    'raw':   ('raw price', 'raw', 'price', 'unguided_price'),
+    'psa9':  ('psa 9 price', 'psa9 price', 'psa9', 'psa9_price'),
+    'psa10': ('psa 10 price', 'psa10 price', 'psa10', 'psa10_price'),
+}
+
+def _resolve_price_columns(header):
+    """Column index per field: first candidate present wins, first such header cell wins."""
+    keys = [str(h).strip().lower() for h in header]
+    cols = {}
+    for field, cands in _PRICE_COLUMNS.items():
+        cols[field] = next((keys.index(c) for c in cands if c in keys), None)
+    return cols
+
+def _iter_price_file(path):
+    """Yield the header and then every data row of a CSV/XLSX as lists of strings."""
+    if path.lower().endswith('.csv'):
+        with open(path, encoding='utf-8-sig', newline='') as f:
+            yield from csv.reader(f)
+        return
+    if openpyxl is not None:
+        wb = openpyxl.load_workbook(path, read_only=True, data_only=True)
+        try:
+            for values in wb.active.iter_rows(values_only=True):
+                yield ['' if v is None else str(v) for v in values]
+        finally:
+            wb.close()
+        return
+    if pd is not None:
+        df = pd.read_excel(path, dtype=str, keep_default_na=False)
+        yield [str(c) for c in df.columns]
+        yield from df.itertuples(index=False, name=None)
+        return
+    raise RuntimeError("Cannot read Excel without openpyxl or pandas")
+
 def _load_price_data():
-    """Read the newest CSV/XLSX from PRICES_DIR and build lookup indexes."""
-    global _price_map, _price_index, _by_name_num
-    _price_map = {}
-    _price_index = set()
-    _by_name_num = {}
+    """Stream the newest CSV/XLSX from PRICES_DIR and build lookup indexes."""
+    global _price_map, _price_index, _by_name_num, _price_by_card_id
+    global _local_set_norms, _set_alias, _unmatched_price_sets
 
     path = _find_latest_price_file()
     if not path:
         print(f"No price file found in {PRICES_DIR}. Skipping overrides.")
+        aliases = _build_set_aliases(set())
+        (_price_map, _price_index, _by_name_num, _price_by_card_id,
+         _local_set_norms, _set_alias, _unmatched_price_sets) = ({}, set(), {}, {}, *aliases)
         return
 
     print(f"Loading price overrides from: {path}")
+    t0 = time.perf_counter()
+
+    # Built locally and published at the end, so lookups never see a half-built map.
+    price_map = {}
+    price_index = set()
+    by_name_num = {}
+    csv_sets = set()
+    set_norms = {}   # set name -> normalized; a few hundred distinct sets across all rows
+    loaded = 0
 
-    # Read rows
-    rows = []
     try:
-        if pd is None:
-            raise RuntimeError("pandas not available")
-        if path.lower().endswith('.csv'):
-            df = pd.read_csv(path)
-        else:
-            df = pd.read_excel(path, engine='openpyxl')
-        rows = df.to_dict(orient='records')
-        currency = _detect_currency_from_rows(rows)
-    except Exception as e:
-        print(f"WARNING: Failed to read via pandas ({e}). Trying basic CSV reader.")
-        currency = "EUR"
-        try:
-            import csv
-            if path.lower().endswith('.csv'):
-                with open(path, encoding='utf-8') as f:
-                    reader = csv.DictReader(f)
-                    rows = list(reader)
-                    currency = _detect_currency_from_rows(rows)
-            else:
-                print("Cannot read Excel without pandas/openpyxl.")
-                rows = []
-        except Exception as e2:
-            print(f"WARNING: Fallback CSV read failed: {e2}")
-            rows = []
-
-    # column resolver
-    def _col(d, *cands):
-        for c in cands:
-            for k in list(d.keys()):
-                if str(k).strip().lower() == str(c).strip().lower():
-                    return k
-        return None
+        rows = _iter_price_file(path)
+        header = next(rows, [])
+        cols = _resolve_price_columns(header)
+        name_i, set_i, num_i = cols['name'], cols['set'], cols['num']
+        raw_i, psa9_i, psa10_i = cols['raw'], cols['psa9'], cols['psa10']
+
+        # Currency is sniffed from the first few rows, as before.
+        head_rows = [row for _, row in zip(range(5), rows)]
+        currency = _detect_currency_from_rows([dict(zip(header, row)) for row in head_rows])
+
+        def _cell(row, i):
+            return row[i] if i is not None and i < len(row) else ""
+
+        for row in itertools.chain(head_rows, rows):
+            card_name  = _cell(row, name_i).strip()
+            set_name   = _cell(row, set_i).strip()
+            number_raw = _cell(row, num_i).strip()
+
+            # Decode encodings early (e.g., Champion%27S Path)
+            card_name = _unescape_decode(card_name)
+
+            # If number missing, pull "#..." from name
+            if not number_raw and "#" in card_name:
+                parts = card_name.rsplit("#", 1)
+                if len(parts) == 2:
+                    card_name  = parts[0].strip()
+                    number_raw = parts[1].strip()
+
+            raw_price   = _parse_price(_cell(row, raw_i))   if raw_i   is not None else None
+            psa9_price  = _parse_price(_cell(row, psa9_i))  if psa9_i  is not None else None
+            psa10_price = _parse_price(_cell(row, psa10_i)) if psa10_i is not None else None
+
+            set_info = set_norms.get(set_name)
+            if set_info is None:
+                decoded = _unescape_decode(set_name)
+                if decoded.lower().startswith("pokemon "):
+                    decoded = decoded.split(" ", 1)[1].strip()
+                set_info = (bool(decoded), _normalize_set(decoded))
+                set_norms[set_name] = set_info
+
+            if not card_name or not set_info[0] or not number_raw:
+                continue
 
-    loaded = 0
-    for row in rows:
-        name_k   = _col(row, 'name', 'card name', 'card', 'title', 'card_title')
-        set_k    = _col(row, 'set', 'set name', 'game')
-        num_k    = _col(row, 'number', 'no', '#')
-        raw_k    = _col(row, 'raw price', 'raw', 'price', 'unguided_price')
-        psa9_k   = _col(row, 'psa 9 price', 'psa9 price', 'psa9', 'psa9_price')
-        psa10_k  = _col(row, 'psa 10 price', 'psa10 price', 'psa10', 'psa10_price')
-
-        card_name  = (row.get(name_k) or "").strip() if name_k else ""
-        set_name   = (row.get(set_k) or "").strip()  if set_k  else ""
-        number_raw = str(row.get(num_k) or "").strip() if num_k else ""
-
-        # Decode encodings early (e.g., Champion%27S Path)
-        card_name = _unescape_decode(card_name)
-        set_name  = _unescape_decode(set_name)
-
-        if set_name.lower().startswith("pokemon "):
-            set_name = set_name.split(" ", 1)[1].strip()
-
-        # If number missing, pull "#..." from name
-        if not number_raw and "#" in card_name:
-            parts = card_name.rsplit("#", 1)
-            if len(parts) == 2:
-                card_name  = parts[0].strip()
-                number_raw = parts[1].strip()
-
-        raw_price   = _parse_price(row.get(raw_k))  if raw_k  else None
-        psa9_price  = _parse_price(row.get(psa9_k)) if psa9_k else None
-        psa10_price = _parse_price(row.get(psa10_k))if psa10_k else None
-
-        if not card_name or not set_name or not number_raw:
-            continue
+            name_norm_base = _name_norm(card_name)     # variant-stripped
+            name_norm_raw  = _name_norm_raw(card_name) # raw-tokenized
+            set_norm       = set_info[1]
+            num_norm       = _normalize_number(number_raw)
+            num_digits     = _digits_only(num_norm)
+            csv_sets.add(set_norm)
+
+            price_obj = {
+                "market": raw_price,
+                "psa9": psa9_price,
+                "psa10": psa10_price,
+                "currency": currency or "EUR",
+                "source": "excel"
+            }
+
+            # Prefer non-variant rows + richer rows
+            is_variant = _row_is_variant(card_name)
+            richness   = (1 if raw_price is not None else 0) + (2 if psa9_price is not None else 0) + (3 if psa10_price is not None else 0)
+            score      = richness + (2 if not is_variant else 0)
+
+            # Index with both base and raw names
+            for nm in {name_norm_base, name_norm_raw}:
+                price_index.add((nm, num_norm))
+                _insert_price_key(price_map, (nm, set_norm, num_norm), price_obj, score)
+                by_name_num.setdefault((nm, num_norm), []).append((set_norm, price_obj))
+
+                # digits-only fallback (e.g., H6 -> 6)
+                if num_digits and num_digits != num_norm:
+                    _insert_price_key(price_map, (nm, set_norm, num_digits), price_obj, score - 0.10)
 
-        name_norm_base = _name_norm(card_name)     # variant-stripped
-        name_norm_raw  = _name_norm_raw(card_name) # raw-tokenized
-        set_norm       = _normalize_set(set_name)
-        num_norm       = _normalize_number(number_raw)
-
-        price_obj = {
-            "market": raw_price,
-            "psa9": psa9_price,
-            "psa10": psa10_price,
-            "currency": currency or "EUR",
-            "source": "excel"
-        }
-
-        # Prefer non-variant rows + richer rows
-        is_variant = _row_is_variant(card_name)
-        richness   = (1 if raw_price is not None else 0) + (2 if psa9_price is not None else 0) + (3 if psa10_price is not None else 0)
-        score      = richness + (2 if not is_variant else 0)
-
-        # Index with both base and raw names
-        for nm in {name_norm_base, name_norm_raw}:
-            _price_index.add((nm, num_norm))
-            _insert_price_key(_price_map, (nm, set_norm, num_norm), price_obj, score)
-            _by_name_num.setdefault((nm, num_norm), []).append((set_norm, price_obj))
-
-            # digits-only fallback (e.g., H6 -> 6)
-            num_digits = _digits_only(num_norm)
-            if num_digits and num_digits != num_norm:
-                _insert_price_key(_price_map, (nm, set_norm, num_digits), price_obj, score - 0.10)
-
-            # --- Gold Star fallback: also index a version with 'gold star' removed ---
-            nm_no_gold = _GOLD_STAR_RE.sub(' ', nm).strip()
-            if nm_no_gold != nm:
-                nm_no_gold = re.sub(r'\s+', ' ', nm_no_gold)
-                _price_index.add((nm_no_gold, num_norm))
-                _insert_price_key(_price_map, (nm_no_gold, set_norm, num_norm), price_obj, score - 0.05)
+                # --- Gold Star fallback: also index a version with 'gold star' removed ---
+                nm_no_gold = _GOLD_STAR_RE.sub(' ', nm).strip()
+                if nm_no_gold != nm:
+                    nm_no_gold = _WS_RE.sub(' ', nm_no_gold)
+                    price_index.add((nm_no_gold, num_norm))
+                    _insert_price_key(price_map, (nm_no_gold, set_norm, num_norm), price_obj, score - 0.05)
 
-                if num_digits and num_digits != num_norm:
-                    _insert_price_key(_price_map, (nm_no_gold, set_norm, num_digits), price_obj, score - 0.15)
+                    if num_digits and num_digits != num_norm:
+                        _insert_price_key(price_map, (nm_no_gold, set_norm, num_digits), price_obj, score - 0.15)
 
-        loaded += 1
+            loaded += 1
+    except Exception as e:
+        # Nothing half-read is published: the previous maps and aliases stay in place.
+        PRICE_LOAD_STATS["failures"] += 1
+        print(f"WARNING: Failed to read price file {path}: {e}. Keeping the previously loaded prices.")
+        return
 
     print(f"Loaded {loaded} price override rows (with fallback keys).")
+    PRICE_LOAD_STATS.update(loads=PRICE_LOAD_STATS["loads"] + 1, rows=loaded,
+                            seconds=time.perf_counter() - t0)
+    aliases = _build_set_aliases(csv_sets)
+    # One statement, so lookups see the maps and the set aliases built for them together.
+    (_price_map, _price_index, _by_name_num,
+     _local_set_norms, _set_alias, _unmatched_price_sets) = (price_map, price_index, by_name_num, *aliases)
+    _link_card_prices()
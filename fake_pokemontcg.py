@@ -0,0 +1,232 @@
+# fake_pokemontcg.py — local stand-in for the api.pokemontcg.io endpoints we call
+# Serves /v2/cards/<id> and /v2/cards?q=... from the bundled card JSON, with
+# optional latency, error and rate-limit injection, so the card-detail path can
+# be measured offline:
+#
+#   python fake_pokemontcg.py --port 8765 --latency-ms 80 --jitter-ms 40 \
+#       --error-rate 0.02 --rate-limit 30
+#   POKEMON_TCG_BASE_URL=http://127.0.0.1:8765/v2 python app.py
+#
+# Prices and marketplace links are synthesized per card id (stable across runs);
+# the real corpus has no price data.
+
+import argparse, json, os, random, re, threading, time, zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+from data_loader import DATA_PATH, SETS_PATH
+
+MAX_PAGE_SIZE = 250
+
+# ---------- Corpus ----------
+def _load_cards(data_path=DATA_PATH, sets_path=SETS_PATH):
+    """API-shaped card records (set embedded, prices and links added), keyed by id."""
+    sets = {}
+    if os.path.isdir(sets_path):
+        for fn in os.listdir(sets_path):
+            if fn.endswith(".json"):
+                with open(os.path.join(sets_path, fn), encoding="utf-8") as f:
+                    for s in json.load(f):
+                        sets[s["id"]] = s
+    cards = {}
+    if os.path.isdir(data_path):
+        for fn in sorted(os.listdir(data_path)):
+            set_obj = sets.get(os.path.splitext(fn)[0])
+            if not fn.endswith(".json") or not set_obj:
+                continue
+            with open(os.path.join(data_path, fn), encoding="utf-8") as f:
+                for card in json.load(f):
+                    card["set"] = set_obj
+                    _add_market_data(card)
+                    cards[card["id"]] = card
+    return cards
+
+def _add_market_data(card):
+    h = zlib.crc32(card["id"].encode())
+    market = round(0.1 + (h % 5000) / 100.0, 2)
+    updated = f"2025/{1 + h % 12:02d}/{1 + (h >> 4) % 28:02d}"
+    card["tcgplayer"] = {
+        "url": f"https://prices.pokemontcg.io/tcgplayer/{card['id']}",
+        "updatedAt": updated,
+        "prices": {"holofoil" if h & 1 else "normal": {
+            "low": round(market * 0.7, 2), "mid": round(market * 1.1, 2), "market": market}},
+    }
+    card["cardmarket"] = {
+        "url": f"https://prices.pokemontcg.io/cardmarket/{card['id']}",
+        "updatedAt": updated,
+        "prices": {"averageSellPrice": round(market * 0.9, 2), "trendPrice": round(market * 0.95, 2)},
+    }
+
+# ---------- Query language (the subset we use) ----------
+# Whitespace-separated terms are ANDed; a term is [-]field:value, field:"a b" or
+# field:(a OR b ...). Values match case-insensitively; * is a wildcard.
+_TERM_RE = re.compile(r'(-?)([\w.]+):(\([^)]*\)|"[^"]*"|\S+)')
+
+def _value_matcher(raw):
+    raw = raw.strip('"')
+    if "*" in raw:
+        rx = re.compile("^" + ".*".join(re.escape(p) for p in raw.split("*")) + "$", re.IGNORECASE)
+        return lambda v: bool(rx.match(v))
+    raw = raw.casefold()
+    return lambda v: v.casefold() == raw
+
+def _field_values(card, field):
+    vals = [card]
+    for part in field.split("."):
+        nxt = []
+        for v in vals:
+            v = v.get(part) if isinstance(v, dict) else None
+            if isinstance(v, list):
+                nxt.extend(v)
+            elif v is not None:
+                nxt.append(v)
+        vals = nxt
+    return [str(v) for v in vals]
+
+def parse_query(q):
+    """Compile q into a predicate over card records."""
+    terms = []
+    for neg, field, value in _TERM_RE.findall(q or ""):
+        if value.startswith("("):
+            options = [_value_matcher(o) for o in re.split(r"\s+OR\s+", value[1:-1].strip()) if o]
+        else:
+            options = [_value_matcher(value)]
+        terms.append((bool(neg), field, options))
+
+    def pred(card):
+        for neg, field, options in terms:
+            hit = any(m(v) for v in _field_values(card, field) for m in options)
+            if hit == neg:
+                return False
+        return True
+    return pred
+
+# ---------- Server ----------
+class FakePokemonTCG:
+    """The fake API: corpus plus injection settings; start() serves it on a thread."""
+
+    def __init__(self, cards=None, latency_ms=0.0, jitter_ms=0.0, error_rate=0.0,
+                 rate_limit=0.0, seed=None):
+        self.cards = cards if cards is not None else _load_cards()
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.rate_limit = rate_limit  # requests/second across all clients, 0 = unlimited
+        self.stats = {"requests": 0, "errors": 0, "rate_limited": 0, "not_found": 0}
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._tokens = rate_limit
+        self._refilled = time.monotonic()
+        self.server = None
+
+    # -- injection --
+    def _admit(self):
+        """'ok', 'error' or 'limited' for the next request."""
+        with self._lock:
+            self.stats["requests"] += 1
+            if self.rate_limit > 0:
+                now = time.monotonic()
+                self._tokens = min(self.rate_limit, self._tokens + (now - self._refilled) * self.rate_limit)
+                self._refilled = now
+                if self._tokens < 1:
+                    self.stats["rate_limited"] += 1
+                    return "limited"
+                self._tokens -= 1
+            if self.error_rate > 0 and self._rng.random() < self.error_rate:
+                self.stats["errors"] += 1
+                return "error"
+            delay = self.latency_ms + (self._rng.uniform(0, self.jitter_ms) if self.jitter_ms else 0.0)
+        if delay > 0:
+            time.sleep(delay / 1000.0)
+        return "ok"
+
+    # -- endpoints --
+    def handle(self, path):
+        """(status, body dict, extra headers) for a GET path."""
+        verdict = self._admit()
+        if verdict == "limited":
+            return 429, {"error": {"code": 429, "message": "Rate limit exceeded"}}, {"Retry-After": "1"}
+        if verdict == "error":
+            return 500, {"error": {"code": 500, "message": "Injected error"}}, {}
+
+        url = urlparse(path)
+        parts = [p for p in url.path.split("/") if p]
+        if parts[:2] != ["v2", "cards"] or len(parts) > 3:
+            return 404, {"error": {"code": 404, "message": "Not found"}}, {}
+        if len(parts) == 3:
+            card = self.cards.get(parts[2])
+            if card is None:
+                with self._lock:
+                    self.stats["not_found"] += 1
+                return 404, {"error": {"code": 404, "message": "Not found"}}, {}
+            return 200, {"data": card}, {}
+
+        args = parse_qs(url.query)
+        try:
+            page = max(1, int(args.get("page", ["1"])[0]))
+            page_size = min(MAX_PAGE_SIZE, max(1, int(args.get("pageSize", [str(MAX_PAGE_SIZE)])[0])))
+        except ValueError:
+            return 400, {"error": {"code": 400, "message": "Bad page or pageSize"}}, {}
+        pred = parse_query(args.get("q", [""])[0])
+        matches = [c for c in self.cards.values() if pred(c)]
+        data = matches[(page - 1) * page_size: page * page_size]
+        return 200, {"data": data, "page": page, "pageSize": page_size,
+                     "count": len(data), "totalCount": len(matches)}, {}
+
+    def start(self, host="127.0.0.1", port=0):
+        """Serve on a daemon thread; returns the base URL to put in BASE_URL."""
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+
+            def do_GET(self):
+                status, body, headers = fake.handle(self.path)
+                payload = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                for k, v in headers.items():
+                    self.send_header(k, v)
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.server.daemon_threads = True
+        threading.Thread(target=self.server.serve_forever, name="fake-pokemontcg", daemon=True).start()
+        return f"http://{host}:{self.server.server_address[1]}/v2"
+
+    def stop(self):
+        if self.server:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+
+def main():
+    ap = argparse.ArgumentParser(description="Local stand-in for api.pokemontcg.io /v2/cards")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8765)
+    ap.add_argument("--latency-ms", type=float, default=0.0)
+    ap.add_argument("--jitter-ms", type=float, default=0.0)
+    ap.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests answered 500")
+    ap.add_argument("--rate-limit", type=float, default=0.0, help="requests/second before 429s (0 = off)")
+    ap.add_argument("--seed", type=int, default=None)
+    args = ap.parse_args()
+
+    fake = FakePokemonTCG(latency_ms=args.latency_ms, jitter_ms=args.jitter_ms, error_rate=args.error_rate,
+                          rate_limit=args.rate_limit, seed=args.seed)
+    base = fake.start(args.host, args.port)
+    print(f"Serving {len(fake.cards)} cards at {base} (set POKEMON_TCG_BASE_URL={base})")
+    try:
+        while True:
+            time.sleep(60)
+            print(f"stats: {fake.stats}")
+    except KeyboardInterrupt:
+        fake.stop()
+
+if __name__ == "__main__":
+    main()
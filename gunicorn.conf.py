@@ -0,0 +1,59 @@
+# gunicorn.conf.py — read automatically by `gunicorn app:app` from the repo root
+# Preload mode (the default here): the master imports app.py once, which loads
+# the cards, price indexes and search indexes; prepare_for_fork() then builds
+# the lazily-loaded stores too, and gc.freeze() moves everything into the
+# permanent generation right before the workers are forked. The workers'
+# cyclic GC never walks (and so never writes to) those objects, so the pages
+# stay shared copy-on-write instead of being copied into every worker.
+#
+#   gunicorn app:app                                  # preload + freeze
+#   GUNICORN_PRELOAD=0 gunicorn app:app               # every worker loads its own copy
+#   GUNICORN_GC_FREEZE=0 gunicorn app:app             # preload without gc.freeze()
+#
+# Worker count, bind address, timeouts etc. come from the usual places
+# (WEB_CONCURRENCY, PORT, GUNICORN_CMD_ARGS, the command line).
+#
+# Note: with preload, code changes need a full restart (SIGHUP reloads workers
+# from the master's already-imported app).
+#
+# Per-worker memory, 4 workers, bundled data, 3000 mixed requests
+# (benchmarks/bench_worker_rss.py; MiB from /proc/<pid>/smaps_rollup):
+#
+#                               boot: Rss   Pss  Private   after: Rss   Pss  Private
+#   separate (no preload)             222   198     193           234   210     205
+#   preload + freeze                  210    46       6           217    88      54
+#   total Pss, 4 workers + master:    separate 854 -> preload 435 after traffic
+#
+# What still gets copied is mostly the workers' own caches (API responses,
+# enrichment) plus the pages of cards a request actually returns; scans go
+# through position arrays instead of card dicts (data_loader). gc.freeze()
+# matters once a worker runs a full collection: one gc.collect() in a worker
+# copies ~95 MiB of the master's heap without it and ~2 MiB with it.
+
+import gc
+import os
+import random
+
+preload_app = os.environ.get("GUNICORN_PRELOAD", "1").strip() != "0"
+GC_FREEZE = preload_app and os.environ.get("GUNICORN_GC_FREEZE", "1").strip() != "0"
+
+if GC_FREEZE:
+    # No collections in the master while the app loads: freed cycles would
+    # leave holes in pages that are about to be shared (see gc.freeze docs).
+    gc.disable()
+
+def when_ready(server):
+    """Runs in the master after the preloaded app is imported, before the first fork."""
+    if not preload_app:
+        return
+    import app as app_module
+    app_module.prepare_for_fork()
+    if GC_FREEZE:
+        gc.freeze()
+        server.log.info("Preloaded app; froze %d objects for copy-on-write sharing", gc.get_freeze_count())
+
+def post_fork(server, worker):
+    if GC_FREEZE:
+        gc.enable()
+    # Workers would otherwise all continue the master's random sequence.
+    random.seed()
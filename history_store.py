@@ -0,0 +1,554 @@
+# history_store.py — consolidated, memory-mapped store for Greek_Prices_History
+# Each daily CSV/XLSX is parsed once and appended as one segment per array:
+#   items  (keyed by normalize_title_for_history): price of the first row in the file
+#   titles (keyed by the raw title):               first/last valid price + valid row count
+# A segment is as long as the dimension was after that file; shorter segments
+# mean "absent" for items first seen later. Segments are appended to flat binary
+# files (memory-mapped on read) and a manifest records which files are in.
+# A file that changes or disappears keeps the segments of the files before it;
+# only its own and the later ones are re-ingested (they may use keys it added).
+
+import glob
+import json
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+import numpy as np
+
+try:
+    import pandas as pd  # type: ignore
+except ImportError:
+    pd = None
+
+try:
+    import fcntl  # gunicorn workers share STORE_DIR; not available on Windows
+except ImportError:
+    fcntl = None
+
+# ---------- Config ----------
+HISTORY_DIR = os.environ.get("GREEK_HISTORY_DIR", "Greek_Prices_History").strip()
+STORE_DIR = os.environ.get(
+    "HISTORY_STORE_DIR",
+    os.path.join(".cache", "history_store")
+).strip()
+# How often (seconds) request paths re-list HISTORY_DIR for new or changed files.
+POLL_SECONDS = float(os.environ.get("HISTORY_POLL_SECONDS", "5"))
+
+# Bump whenever the on-disk layout or the per-file parsing changes.
+_STORE_VERSION = 2
+
+# name -> (dtype, fill value for "absent")
+_ARRAYS = {
+    "item_price":  ("<f8", np.nan),
+    "title_first": ("<f8", np.nan),
+    "title_last":  ("<f8", np.nan),
+    "title_count": ("<i4", 0),
+}
+
+# ---------- State ----------
+# Published as one dict and replaced wholesale, so readers never need the lock.
+_STATE = None
+_LAST_POLL = 0.0
+_LOCK = threading.Lock()
+# Set after a failed write: the binaries may no longer match, so stay in memory.
+_PERSIST_DISABLED = False
+
+# ---------- Parsing helpers (shared with app.py) ----------
+def parse_date_from_filename(name):
+    for fmt in ("%d %m %Y", "%Y-%m-%d", "%d-%m-%Y", "%m-%d-%Y"):
+        try: return datetime.strptime(name, fmt)
+        except ValueError: pass
+    return None
+
+def normalize_title_for_history(title):
+    if not isinstance(title, str): return ""
+    return re.sub(r'[^a-z0-9]', '', title.lower())
+
+def parse_price_to_float(s: str) -> float | None:
+    """Robustly parse a price string that could be in US/UK or European format."""
+    if s is None: return None
+
+    original_str = str(s).strip()
+
+    # Clean up string
+    clean_s = original_str.replace("€", "").replace("$", "")
+    if not clean_s:
+        return None
+
+    last_dot_pos = clean_s.rfind('.')
+    last_comma_pos = clean_s.rfind(',')
+
+    # Determine number format and clean the string
+    if last_comma_pos > last_dot_pos:
+        # European format (e.g., "1.234,56"): dot is thousands, comma is decimal
+        clean_s = clean_s.replace('.', '').replace(',', '.')
+    else:
+        # US format (e.g., "1,234.56"): comma is thousands, dot is decimal
+        clean_s = clean_s.replace(',', '')
+
+    try:
+        price = float(clean_s)
+
+        # Sanity check for a likely scraping error, e.g., "51,99" becomes "51,999".
+        # This heuristic checks if the original string was in the format "dd,ddd".
+        parts = original_str.replace("€", "").replace("$", "").split(',')
+        if (price > 1000 and
+            original_str.count(',') == 1 and
+            original_str.count('.') == 0 and
+            len(parts) == 2 and len(parts[1]) == 3 and
+            len(parts[0]) > 1):
+             # This pattern likely means "xx,yyy" should have been "xx.yy".
+             # We correct this by dividing by 1000.
+             return price / 1000.0
+
+        return price
+    except (ValueError, TypeError):
+        return None
+
+def _valid_price(v):
+    """Parsed price as float, or None for unparseable/NaN values."""
+    v = parse_price_to_float(v)
+    if v is None or v != v:
+        return None
+    return v
+
+def _list_history_files():
+    """{filename: (mtime_ns, size)} for every CSV/XLSX in HISTORY_DIR."""
+    out = {}
+    paths = glob.glob(os.path.join(HISTORY_DIR, "*.xlsx")) + glob.glob(os.path.join(HISTORY_DIR, "*.csv"))
+    for path in paths:
+        try:
+            st = os.stat(path)
+        except OSError:
+            continue
+        out[os.path.basename(path)] = (st.st_mtime_ns, st.st_size)
+    return out
+
+def _read_history_frame(path):
+    """Read one daily file with lower-cased column names, as the endpoints always did."""
+    if path.lower().endswith('.csv'):
+        df = pd.read_csv(path, encoding='utf-8-sig')
+    else:
+        df = pd.read_excel(path)
+    df.columns = [str(c).lower().strip() for c in df.columns]
+    return df
+
+# ---------- Ingestion ----------
+def _empty_state():
+    return {
+        "files": [],            # manifest entries, in ingest order
+        "item_keys": [], "item_ids": {},
+        "title_keys": [], "title_ids": {},
+        "arrays": {name: np.empty(0, dtype=dt) for name, (dt, _) in _ARRAYS.items()},
+        # per file: start and length of its segments
+        "item_offsets": np.empty(0, dtype=np.int64), "item_lens": np.empty(0, dtype=np.int64),
+        "title_offsets": np.empty(0, dtype=np.int64), "title_lens": np.empty(0, dtype=np.int64),
+        "epoch": None,          # changes whenever existing segments are replaced
+    }
+
+def _ingest_file(filename, item_keys, item_ids, title_keys, title_ids):
+    """
+    Parse one daily file. Grows the key lists/maps in place and returns
+    (manifest entry, {array name: segment}).
+    """
+    path = os.path.join(HISTORY_DIR, filename)
+    file_dt = parse_date_from_filename(os.path.splitext(filename)[0])
+    entry = {"name": filename, "date": file_dt.strftime("%Y-%m-%d") if file_dt else None,
+             "has_cols": False}
+    item_vals, first, last, count = {}, {}, {}, {}
+
+    if file_dt:
+        try:
+            df = _read_history_frame(path)
+            title_col = next((c for c in ['item_title', 'title', 'name'] if c in df.columns), None)
+            price_col = next((c for c in ['price', 'current_price'] if c in df.columns), None)
+            if title_col and price_col:
+                entry["has_cols"] = True
+                for title, price in zip(df[title_col].tolist(), df[price_col].tolist()):
+                    key = normalize_title_for_history(title)
+                    i = item_ids.get(key)
+                    if i is None:
+                        i = item_ids[key] = len(item_keys)
+                        item_keys.append(key)
+                    value = _valid_price(str(price))
+                    if i not in item_vals:
+                        item_vals[i] = value
+                    if not isinstance(title, str) or value is None:
+                        continue
+                    t = title_ids.get(title)
+                    if t is None:
+                        t = title_ids[title] = len(title_keys)
+                        title_keys.append(title)
+                    first.setdefault(t, value)
+                    last[t] = value
+                    count[t] = count.get(t, 0) + 1
+        except Exception as e:
+            print(f"[history] Skipping history file {path}: {e}")
+
+    # Files without a date (or unreadable) keep zero-length segments.
+    n_items = len(item_keys) if file_dt else 0
+    n_titles = len(title_keys) if file_dt else 0
+    segs = {name: np.full(n_items if name == "item_price" else n_titles, fill, dtype=dt)
+            for name, (dt, fill) in _ARRAYS.items()}
+    for i, v in item_vals.items():
+        if v is not None:
+            segs["item_price"][i] = v
+    for t, v in first.items():
+        segs["title_first"][t] = v
+        segs["title_last"][t] = last[t]
+        segs["title_count"][t] = count[t]
+    entry["n_items"], entry["n_titles"] = n_items, n_titles
+    return entry, segs
+
+def _with_layout(state):
+    """Recompute per-file offsets/lengths from the manifest entries."""
+    files = state["files"]
+    item_lens = np.array([f["n_items"] for f in files], dtype=np.int64)
+    title_lens = np.array([f["n_titles"] for f in files], dtype=np.int64)
+    state["item_lens"], state["title_lens"] = item_lens, title_lens
+    state["item_offsets"] = np.concatenate(([0], np.cumsum(item_lens)[:-1])).astype(np.int64) if len(files) else item_lens
+    state["title_offsets"] = np.concatenate(([0], np.cumsum(title_lens)[:-1])).astype(np.int64) if len(files) else title_lens
+    return state
+
+# ---------- Persistence ----------
+def _array_path(name):
+    return os.path.join(STORE_DIR, f"{name}.bin")
+
+def _manifest_sig():
+    try:
+        return os.stat(os.path.join(STORE_DIR, "manifest.json")).st_mtime_ns
+    except OSError:
+        return None
+
+@contextmanager
+def _store_file_lock():
+    """Exclusive flock on STORE_DIR so only one process ingests at a time."""
+    f = None
+    if STORE_DIR and fcntl is not None and not _PERSIST_DISABLED:
+        try:
+            os.makedirs(STORE_DIR, exist_ok=True)
+            f = open(os.path.join(STORE_DIR, ".lock"), "a")
+            fcntl.flock(f, fcntl.LOCK_EX)
+        except OSError:
+            f = None
+    try:
+        yield
+    finally:
+        if f is not None:
+            fcntl.flock(f, fcntl.LOCK_UN)
+            f.close()
+
+def _map_arrays(state):
+    """Memory-map the binary segment files, sized to what the manifest covers."""
+    totals = {"item_price": int(state["item_lens"].sum())}
+    for name in ("title_first", "title_last", "title_count"):
+        totals[name] = int(state["title_lens"].sum())
+    arrays = {}
+    for name, (dt, _) in _ARRAYS.items():
+        n = totals[name]
+        if n == 0:
+            arrays[name] = np.empty(0, dtype=dt)
+            continue
+        arrays[name] = np.memmap(_array_path(name), dtype=dt, mode='r', shape=(n,))
+    state["arrays"] = arrays
+    return state
+
+def _load_persisted():
+    """The stored state if its manifest and binaries are intact, else None."""
+    if not STORE_DIR:
+        return None
+    try:
+        with open(os.path.join(STORE_DIR, "manifest.json"), encoding="utf-8") as f:
+            manifest = json.load(f)
+        if manifest.get("version") != _STORE_VERSION or manifest.get("history_dir") != HISTORY_DIR:
+            return None
+        with open(os.path.join(STORE_DIR, "keys.json"), encoding="utf-8") as f:
+            keys = json.load(f)
+        state = _empty_state()
+        state["files"] = manifest["files"]
+        state["epoch"] = manifest["epoch"]
+        state["item_keys"], state["title_keys"] = keys["items"], keys["titles"]
+        state["item_ids"] = {k: i for i, k in enumerate(state["item_keys"])}
+        state["title_ids"] = {k: i for i, k in enumerate(state["title_keys"])}
+        _with_layout(state)
+        # A crash between appending segments and writing the manifest leaves a
+        # longer binary; trim it back to what the manifest covers.
+        state["manifest_sig"] = _manifest_sig()
+        for name, (dt, _) in _ARRAYS.items():
+            lens = state["item_lens"] if name == "item_price" else state["title_lens"]
+            want = int(lens.sum()) * np.dtype(dt).itemsize
+            path = _array_path(name)
+            have = os.path.getsize(path) if os.path.exists(path) else 0
+            if have < want:
+                return None
+            if have > want:
+                os.truncate(path, want)
+        return _map_arrays(state)
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        print(f"[history] Ignoring unreadable store in {STORE_DIR}: {e}")
+        return None
+
+def _persist(state, new_segs, keep=None):
+    """
+    Append the new segments, then atomically replace keys + manifest. With
+    `keep` ({array name: elements}) only that prefix of each binary survives:
+    it is copied with the new segments into a temp file that is swapped in, so
+    live memory maps of the old files stay valid.
+    """
+    global _PERSIST_DISABLED
+    if not STORE_DIR or _PERSIST_DISABLED:
+        return False
+    try:
+        os.makedirs(STORE_DIR, exist_ok=True)
+        for name, (dt, _) in _ARRAYS.items():
+            path = _array_path(name)
+            target = f"{path}.{os.getpid()}.tmp" if keep is not None else path
+            with open(target, "wb" if keep is not None else "ab") as f:
+                if keep is not None and keep[name]:
+                    with open(path, "rb") as old:
+                        _copy_prefix(old, f, keep[name] * np.dtype(dt).itemsize)
+                for segs in new_segs:
+                    f.write(segs[name].tobytes())
+            if keep is not None:
+                os.replace(target, path)
+        for fname, payload in (
+            ("keys.json", {"items": state["item_keys"], "titles": state["title_keys"]}),
+            ("manifest.json", {"version": _STORE_VERSION, "history_dir": HISTORY_DIR,
+                               "epoch": state["epoch"], "files": state["files"]}),
+        ):
+            tmp = os.path.join(STORE_DIR, f"{fname}.{os.getpid()}.tmp")
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(payload, f, ensure_ascii=False)
+            os.replace(tmp, os.path.join(STORE_DIR, fname))
+        state["manifest_sig"] = _manifest_sig()
+        return True
+    except Exception as e:
+        print(f"[history] Could not persist store to {STORE_DIR}, keeping it in memory: {e}")
+        _PERSIST_DISABLED = True
+        return False
+
+def _copy_prefix(src, dst, nbytes):
+    while nbytes > 0:
+        chunk = src.read(min(nbytes, 1 << 20))
+        if not chunk:
+            raise OSError(f"{src.name} is shorter than the manifest")
+        dst.write(chunk)
+        nbytes -= len(chunk)
+
+def _truncated(state, cut):
+    """`state` cut back to its first `cut` files: keys, layout and arrays."""
+    files = state["files"][:cut]
+    n_items = max((f["n_items"] for f in files), default=0)
+    n_titles = max((f["n_titles"] for f in files), default=0)
+    item_keys, title_keys = state["item_keys"][:n_items], state["title_keys"][:n_titles]
+    base = _empty_state()
+    base.update(files=files, item_keys=item_keys, item_ids={k: i for i, k in enumerate(item_keys)},
+                title_keys=title_keys, title_ids={k: i for i, k in enumerate(title_keys)})
+    _with_layout(base)
+    n_item_elems, n_title_elems = int(base["item_lens"].sum()), int(base["title_lens"].sum())
+    base["arrays"] = {name: state["arrays"][name][:n_item_elems if name == "item_price" else n_title_elems]
+                      for name in _ARRAYS}
+    return base
+
+def _refresh(state):
+    """Bring `state` up to date with HISTORY_DIR; returns the state to publish."""
+    on_disk = _list_history_files()
+    known = state["files"] if state else []
+    # The first known file that changed or disappeared: it and every later file
+    # are re-ingested (later files may reuse keys it introduced), earlier ones
+    # keep their segments.
+    cut = next((k for k, f in enumerate(known) if on_disk.get(f["name"]) != (f["mtime_ns"], f["size"])),
+               len(known))
+    replaced = state is None or cut < len(known)
+    known_names = {f["name"] for f in known}
+    new_files = [f["name"] for f in known[cut:] if f["name"] in on_disk] + sorted(
+        (n for n in on_disk if n not in known_names),
+        key=lambda n: (parse_date_from_filename(os.path.splitext(n)[0]) or datetime.min, n))
+    if not new_files and not replaced:
+        return state
+
+    base = _empty_state() if state is None else _truncated(state, cut) if replaced else state
+    item_keys, item_ids = list(base["item_keys"]), dict(base["item_ids"])
+    title_keys, title_ids = list(base["title_keys"]), dict(base["title_ids"])
+    files = list(base["files"])
+    new_segs = []
+    t0 = time.perf_counter()
+    for name in new_files:
+        entry, segs = _ingest_file(name, item_keys, item_ids, title_keys, title_ids)
+        entry["mtime_ns"], entry["size"] = on_disk[name]
+        files.append(entry)
+        new_segs.append(segs)
+
+    new_state = _empty_state()
+    new_state.update(files=files, item_keys=item_keys, item_ids=item_ids,
+                     title_keys=title_keys, title_ids=title_ids,
+                     epoch=f"{time.time_ns()}-{os.getpid()}" if replaced else base["epoch"])
+    _with_layout(new_state)
+    keep = None
+    if replaced:
+        keep = {name: len(base["arrays"][name]) for name in _ARRAYS}
+    if _persist(new_state, new_segs, keep):
+        _map_arrays(new_state)
+    else:
+        new_state["arrays"] = {
+            name: np.concatenate([base["arrays"][name]] + [s[name] for s in new_segs])
+            for name in _ARRAYS
+        }
+    if state is not None and replaced:
+        print(f"[history] {known[cut]['name']} changed or was removed; kept {cut} file(s), "
+              f"re-ingesting from there")
+    print(f"[history] Ingested {len(new_files)} file(s) in {time.perf_counter() - t0:.2f}s "
+          f"({len(files)} files, {len(item_keys)} items, {len(title_keys)} titles)")
+    return new_state
+
+def get_state(force=False):
+    """
+    Current store state, refreshed at most every POLL_SECONDS. Only the first
+    call blocks; later refreshes run on whichever request finds the poll due,
+    while concurrent requests keep reading the published state.
+    """
+    global _STATE, _LAST_POLL
+    state = _STATE
+    if state is not None and not force and time.monotonic() - _LAST_POLL < POLL_SECONDS:
+        return state
+    if not _LOCK.acquire(blocking=state is None or force):
+        return state
+    try:
+        with _store_file_lock():
+            # Pick up segments another worker appended since we last looked.
+            if _STATE is None or (not _PERSIST_DISABLED
+                                  and _STATE.get("manifest_sig") != _manifest_sig()):
+                _STATE = _load_persisted() or _STATE
+            _STATE = _refresh(_STATE)
+        _LAST_POLL = time.monotonic()
+        return _STATE
+    finally:
+        _LOCK.release()
+
+# ---------- Queries ----------
+def price_history(title):
+    """[{"date", "price"}] for one item across all files, sorted by date."""
+    state = get_state()
+    key = normalize_title_for_history(title)
+    i = state["item_ids"].get(key)
+    if i is None:
+        return []
+    files = state["files"]
+    sel = np.nonzero(state["item_lens"] > i)[0]
+    values = state["arrays"]["item_price"][state["item_offsets"][sel] + i]
+    out = [{"date": files[f]["date"], "price": float(v)}
+           for f, v in zip(sel.tolist(), values.tolist()) if v == v]
+    out.sort(key=lambda x: x["date"])
+    return out
+
+def files_since(cutoff):
+    """Manifest entries of dated files with date >= cutoff, oldest first."""
+    state = get_state()
+    return [state["files"][f] for f in _window(state, cutoff)]
+
+def _window(state, cutoff):
+    """Indexes of dated files with date >= cutoff, ordered by (date, name)."""
+    files = state["files"]
+    window = [f for f, e in enumerate(files)
+              if e["date"] and datetime.fromisoformat(e["date"]) >= cutoff]
+    window.sort(key=lambda f: (files[f]["date"], files[f]["name"]))
+    return window
+
+# ---------- Market status aggregates ----------
+# Per category set, the latest aggregate: running start/end/total per title over
+# a window of files. A window that merely gained newer files (the daily case) is
+# extended by folding in just those files; anything else (window slid past its
+# oldest file, backfilled day, store rebuilt) is recomputed from its files.
+_MARKET_AGGS = {}
+_CATEGORY_MASKS = {}
+_AGG_LOCK = threading.Lock()
+
+def _category_masks(state, categories, cat_key):
+    """Boolean title mask per category; only titles added since last time are matched."""
+    cached = _CATEGORY_MASKS.get(cat_key)
+    titles = state["title_keys"]
+    if cached is None or cached["epoch"] != state["epoch"]:
+        cached = {"epoch": state["epoch"], "n": 0,
+                  "masks": {name: np.zeros(0, dtype=bool) for name, _ in categories}}
+    if cached["n"] < len(titles):
+        fresh = titles[cached["n"]:]
+        masks = {}
+        for name, keywords in categories:
+            rx = re.compile('|'.join(keywords), re.IGNORECASE)
+            grown = np.fromiter((bool(rx.search(t)) for t in fresh), dtype=bool, count=len(fresh))
+            masks[name] = np.concatenate((cached["masks"][name], grown))
+        cached = {"epoch": state["epoch"], "n": len(titles), "masks": masks}
+        _CATEGORY_MASKS[cat_key] = cached
+    # A request still holding an older state may have fewer titles.
+    return {name: m[:len(titles)] for name, m in cached["masks"].items()}
+
+def _fold_files(agg, state, file_idxs):
+    """Fold the title segments of `file_idxs` (oldest first) into a copy of `agg`."""
+    n = len(state["title_keys"])
+    start = np.full(n, np.nan)
+    end = np.full(n, np.nan)
+    total = np.zeros(n, dtype=np.int64)
+    if agg is not None:
+        m = len(agg["total"])
+        start[:m], end[:m], total[:m] = agg["start"], agg["end"], agg["total"]
+    arrays = state["arrays"]
+    for f in file_idxs:
+        off, ln = int(state["title_offsets"][f]), int(state["title_lens"][f])
+        count = arrays["title_count"][off:off + ln]
+        present = count > 0
+        fresh = present & (total[:ln] == 0)
+        start[:ln][fresh] = arrays["title_first"][off:off + ln][fresh]
+        end[:ln][present] = arrays["title_last"][off:off + ln][present]
+        total[:ln] += count
+    return {"start": start, "end": end, "total": total}
+
+def category_price_changes(categories, cutoff):
+    """
+    Percent change (first valid price on the earliest day -> last valid price on
+    the latest day) for every title seen more than once in files dated >= cutoff,
+    grouped by category. `categories` is [(name, [keywords])] matched
+    case-insensitively against the raw title.
+
+    Returns {category: [changes]} for the categories that have rows in the window.
+    The result is cached until the window or the store changes.
+    """
+    state = get_state()
+    files = state["files"]
+    window = tuple(files[f]["name"] for f in _window(state, cutoff))
+    cat_key = tuple((name, tuple(kws)) for name, kws in categories)
+
+    agg = _MARKET_AGGS.get(cat_key)
+    if agg and agg["epoch"] == state["epoch"] and agg["window"] == window:
+        return agg["result"]
+
+    with _AGG_LOCK:
+        agg = _MARKET_AGGS.get(cat_key)
+        if agg and agg["epoch"] == state["epoch"] and agg["window"] == window:
+            return agg["result"]
+        by_name = {e["name"]: f for f, e in enumerate(files)}
+        if (agg and agg["epoch"] == state["epoch"]
+                and window[:len(agg["window"])] == agg["window"]):
+            folded = _fold_files(agg, state, [by_name[n] for n in window[len(agg["window"]):]])
+        else:
+            folded = _fold_files(None, state, [by_name[n] for n in window])
+
+        start, end, total = folded["start"], folded["end"], folded["total"]
+        multi = (total > 1) & (start > 0)
+        change = np.zeros(len(total))
+        change[multi] = (end[multi] - start[multi]) / start[multi] * 100
+
+        result = {}
+        for name, mask in _category_masks(state, categories, cat_key).items():
+            if not (mask & (total > 0)).any():
+                continue
+            result[name] = change[mask & multi].tolist()
+
+        folded.update(epoch=state["epoch"], window=window, result=result)
+        _MARKET_AGGS[cat_key] = folded
+        return result
@@ -0,0 +1,177 @@
+# metrics.py — per-route request metrics and a Prometheus text endpoint
+# init_app(app) times every request (latency histogram, request/error counts,
+# in-flight gauge, per route) and serves everything at /metrics in the
+# Prometheus text exposition format (version 0.0.4).
+#
+# Internal events are not pushed here: the modules keep their own counters
+# (scraper_pokemon.API_CACHE_STATS, scraper.RELOAD_STATS, ...) and collectors
+# registered with register_collector() read them when /metrics is scraped, so
+# the hot paths pay nothing extra.
+#
+# Counters are per process; with several gunicorn workers each scrape sees the
+# worker that answered it (the pid label tells them apart).
+
+import os
+import threading
+import time
+from bisect import bisect_left
+
+# ---------- Config ----------
+METRICS_ENABLED = os.environ.get("METRICS_ENABLED", "1").strip().lower() not in ("0", "false", "no", "off")
+METRICS_PATH = os.environ.get("METRICS_PATH", "/metrics")
+PREFIX = "pokegr"
+
+# Upper bounds in seconds; the last (+Inf) bucket is implicit.
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Label values come from fixed sets so scanners can't grow _ROUTES: every URL
+# without a matching rule (404, 405) is one route, unusual methods one method.
+UNMATCHED_ROUTE = "<unmatched>"
+KNOWN_METHODS = frozenset(("GET", "POST", "HEAD", "OPTIONS", "PUT", "DELETE", "PATCH"))
+OTHER_METHOD = "other"
+
+# ---------- State ----------
+_LOCK = threading.Lock()
+_ROUTES = {}       # (route, method) -> _RouteStats
+_COLLECTORS = []   # callables returning [(name, type, help, [(labels dict, value)])]
+_STARTED_AT = time.time()
+
+class _RouteStats:
+    __slots__ = ("buckets", "sum", "count", "errors", "in_flight", "statuses")
+
+    def __init__(self):
+        self.buckets = [0] * (len(LATENCY_BUCKETS) + 1)  # non-cumulative; cumulated on render
+        self.sum = 0.0
+        self.count = 0
+        self.errors = 0
+        self.in_flight = 0
+        self.statuses = {}  # status code -> count
+
+def _method_label(method):
+    return method if method in KNOWN_METHODS else OTHER_METHOD
+
+def _route_stats(route, method):
+    """Caller holds _LOCK."""
+    key = (route, _method_label(method))
+    stats = _ROUTES.get(key)
+    if stats is None:
+        stats = _ROUTES[key] = _RouteStats()
+    return stats
+
+def request_started(route, method):
+    with _LOCK:
+        _route_stats(route, method).in_flight += 1
+
+def request_finished(route, method, status, seconds):
+    """Record one request; 5xx responses count as errors."""
+    i = bisect_left(LATENCY_BUCKETS, seconds)
+    with _LOCK:
+        stats = _route_stats(route, method)
+        stats.in_flight -= 1
+        stats.buckets[i] += 1
+        stats.sum += seconds
+        stats.count += 1
+        stats.statuses[status] = stats.statuses.get(status, 0) + 1
+        if status >= 500:
+            stats.errors += 1
+
+def register_collector(fn):
+    """fn() -> [(name, type, help, [(labels, value), ...])], called on every scrape."""
+    _COLLECTORS.append(fn)
+    return fn
+
+# ---------- Exposition ----------
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in labels.items()) + "}"
+
+def _num(v):
+    if v == float("inf"):
+        return "+Inf"
+    if isinstance(v, float) and not v.is_integer():
+        return repr(v)
+    return str(int(v))
+
+def _family(lines, name, kind, help_text, samples):
+    full = f"{PREFIX}_{name}"
+    lines.append(f"# HELP {full} {help_text}")
+    lines.append(f"# TYPE {full} {kind}")
+    for labels, value in samples:
+        lines.append(f"{full}{_labels(labels)} {_num(value)}")
+
+def _request_families(lines):
+    with _LOCK:
+        snapshot = [(route, method, list(s.buckets), s.sum, s.count, s.errors, s.in_flight, dict(s.statuses))
+                    for (route, method), s in sorted(_ROUTES.items())]
+
+    name = f"{PREFIX}_http_request_duration_seconds"
+    lines.append(f"# HELP {name} Request latency by route, from routing to the response being built.")
+    lines.append(f"# TYPE {name} histogram")
+    for route, method, buckets, total, count, _, _, _ in snapshot:
+        base = {"route": route, "method": method}
+        cumulative = 0
+        for bound, n in zip(LATENCY_BUCKETS + (float("inf"),), buckets):
+            cumulative += n
+            lines.append(f"{name}_bucket{_labels({**base, 'le': _num(bound)})} {cumulative}")
+        lines.append(f"{name}_sum{_labels(base)} {_num(total)}")
+        lines.append(f"{name}_count{_labels(base)} {count}")
+
+    _family(lines, "http_requests_total", "counter", "Requests by route and status code.",
+            [({"route": r, "method": m, "status": code}, n)
+             for r, m, _, _, _, _, _, statuses in snapshot for code, n in sorted(statuses.items())])
+    _family(lines, "http_request_errors_total", "counter", "Requests answered with a 5xx status or an unhandled exception.",
+            [({"route": r, "method": m}, errors) for r, m, _, _, _, errors, _, _ in snapshot])
+    _family(lines, "http_requests_in_flight", "gauge", "Requests currently being handled.",
+            [({"route": r, "method": m}, in_flight) for r, m, _, _, _, _, in_flight, _ in snapshot])
+
+def render():
+    """Everything in Prometheus text format."""
+    lines = []
+    _family(lines, "process_start_time_seconds", "gauge", "Unix time the metrics module was loaded.",
+            [({"pid": os.getpid()}, _STARTED_AT)])
+    _request_families(lines)
+    for collect in _COLLECTORS:
+        try:
+            families = collect()
+        except Exception as e:
+            print(f"[metrics] Collector {getattr(collect, '__name__', collect)} failed: {e}")
+            continue
+        for name, kind, help_text, samples in families:
+            _family(lines, name, kind, help_text, samples)
+    return "\n".join(lines) + "\n"
+
+# ---------- Flask wiring ----------
+def init_app(app):
+    """Time every request and serve METRICS_PATH. No-op when METRICS_ENABLED is off."""
+    if not METRICS_ENABLED:
+        return
+    from flask import Response, g, request
+
+    @app.before_request
+    def _metrics_start():
+        rule = request.url_rule
+        route = rule.rule if rule is not None and request.routing_exception is None else UNMATCHED_ROUTE
+        g._metrics = (route, _method_label(request.method), time.perf_counter())
+        request_started(g._metrics[0], g._metrics[1])
+
+    @app.after_request
+    def _metrics_status(response):
+        g._metrics_status = response.status_code
+        return response
+
+    @app.teardown_request
+    def _metrics_finish(exc):
+        started = g.pop("_metrics", None)
+        if started is None:
+            return
+        route, method, t0 = started
+        status = 500 if exc is not None else g.pop("_metrics_status", 500)
+        request_finished(route, method, status, time.perf_counter() - t0)
+
+    @app.route(METRICS_PATH)
+    def metrics_endpoint():
+        return Response(render(), content_type="text/plain; version=0.0.4; charset=utf-8")
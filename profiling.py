@@ -0,0 +1,146 @@
+# profiling.py — opt-in, token-guarded profiling of single requests
+# Off unless PROFILE_TOKEN is set. A request carrying the token, either as
+#
+#   curl -H "X-Profile: $PROFILE_TOKEN" "http://host/api/market-status"
+#   curl "http://host/api/global-related?title=...&_profile=$PROFILE_TOKEN"
+#
+# runs under cProfile (deterministic, stdlib). The raw stats are saved to
+# PROFILE_DIR as <time>-<endpoint>.prof (open with `python -m pstats` or
+# snakeviz), the top functions are printed to the log, and the response gets
+# an X-Profile-File header. Add _profile_format=text or =json (or the
+# X-Profile-Format header) to get the report back instead of the normal body.
+#
+# A missing or wrong token just serves the request normally. Only the request
+# thread is profiled; work handed to background pools (card enrichment) is not.
+# One request is profiled at a time (Python 3.12+ allows a single active
+# profiler); a token-bearing request that arrives meanwhile is served unprofiled.
+
+import cProfile
+import hmac
+import io
+import os
+import pstats
+import re
+import threading
+import time
+
+# ---------- Config ----------
+PROFILE_TOKEN = os.environ.get("PROFILE_TOKEN", "").strip()
+PROFILE_DIR = os.environ.get("PROFILE_DIR", os.path.join(".cache", "profiles")).strip()
+PROFILE_TOP = int(os.environ.get("PROFILE_TOP", "30"))   # functions in the report
+PROFILE_KEEP = int(os.environ.get("PROFILE_KEEP", "50"))  # newest .prof files kept in PROFILE_DIR
+PROFILE_SORT = "cumulative"
+
+_SAFE_NAME_RE = re.compile(r"[^A-Za-z0-9_.-]+")
+
+# ---------- State ----------
+_PROFILE_LOCK = threading.Lock()  # held from _profile_start until the request's teardown
+
+# ---------- Helpers ----------
+def _requested_token(request):
+    return request.headers.get("X-Profile") or request.args.get("_profile") or ""
+
+def _authorized(request):
+    supplied = _requested_token(request)
+    return bool(PROFILE_TOKEN and supplied) and hmac.compare_digest(supplied.encode(), PROFILE_TOKEN.encode())
+
+def top_functions(stats, limit=PROFILE_TOP, sort=PROFILE_SORT):
+    """[{function, file, line, calls, primitive_calls, tottime_ms, cumtime_ms}] for the top entries."""
+    key = {"cumulative": 3, "tottime": 2}.get(sort, 3)
+    rows = sorted(stats.stats.items(), key=lambda kv: kv[1][key], reverse=True)[:limit]
+    return [{
+        "function": func,
+        "file": filename,
+        "line": line,
+        "calls": nc,
+        "primitive_calls": cc,
+        "tottime_ms": round(tt * 1e3, 3),
+        "cumtime_ms": round(ct * 1e3, 3),
+    } for (filename, line, func), (cc, nc, tt, ct, _) in rows]
+
+def _text_report(stats, limit=PROFILE_TOP):
+    out = io.StringIO()
+    stats.stream = out
+    stats.sort_stats(PROFILE_SORT).print_stats(limit)
+    return out.getvalue()
+
+def _save(profiler, endpoint):
+    """Dump the raw stats and prune old files; returns the path or None."""
+    try:
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        name = f"{time.strftime('%Y%m%d-%H%M%S')}-{int(time.time() * 1e3) % 1000:03d}-{_SAFE_NAME_RE.sub('_', endpoint)}.prof"
+        path = os.path.join(PROFILE_DIR, name)
+        profiler.dump_stats(path)
+        old = sorted(f for f in os.listdir(PROFILE_DIR) if f.endswith(".prof"))[:-PROFILE_KEEP or None]
+        for f in old:
+            os.remove(os.path.join(PROFILE_DIR, f))
+        return path
+    except OSError as e:
+        print(f"[profile] Could not save profile to {PROFILE_DIR}: {e}")
+        return None
+
+# ---------- Flask wiring ----------
+def init_app(app):
+    """Register the profiling hooks. No-op unless PROFILE_TOKEN is set."""
+    if not PROFILE_TOKEN:
+        return
+    from flask import Response, g, jsonify, request
+
+    @app.before_request
+    def _profile_start():
+        if not (request.headers.get("X-Profile") or "_profile" in request.args):
+            return
+        if not _authorized(request):
+            print(f"[profile] Ignoring profile request with a bad token from {request.remote_addr}")
+            return
+        if not _PROFILE_LOCK.acquire(blocking=False):
+            print(f"[profile] Another request is being profiled; serving {request.path} unprofiled")
+            return
+        g._profile_locked = True
+        g._profile_t0 = time.perf_counter()
+        g._profiler = cProfile.Profile()
+        try:
+            g._profiler.enable()
+        except ValueError as e:  # another profiler (e.g. a debugger) is active on 3.12+
+            print(f"[profile] Could not start the profiler: {e}")
+            g.pop("_profiler")
+
+    @app.after_request
+    def _profile_finish(response):
+        profiler = g.pop("_profiler", None)
+        if profiler is None:
+            return response
+        profiler.disable()
+        wall_ms = (time.perf_counter() - g.pop("_profile_t0")) * 1e3
+        endpoint = request.endpoint or "unmatched"
+        path = _save(profiler, endpoint)
+        stats = pstats.Stats(profiler)
+        top = top_functions(stats)
+
+        # request.path, not full_path: the query string may carry the token.
+        print(f"[profile] {request.method} {request.path} -> {response.status_code} "
+              f"in {wall_ms:.1f} ms, saved to {path}")
+        for row in top[:10]:
+            print(f"[profile]   {row['cumtime_ms']:9.2f} ms cum {row['tottime_ms']:9.2f} ms own "
+                  f"{row['calls']:>7}x  {row['function']} ({os.path.basename(row['file'])}:{row['line']})")
+
+        fmt = (request.headers.get("X-Profile-Format") or request.args.get("_profile_format") or "").lower()
+        if fmt == "json":
+            response = jsonify({"endpoint": endpoint, "status": response.status_code, "wall_ms": round(wall_ms, 3),
+                                "total_calls": stats.total_calls, "file": path and os.path.basename(path), "sort": PROFILE_SORT, "top": top})
+        elif fmt == "text":
+            response = Response(f"{request.method} {request.path} -> {response.status_code} in {wall_ms:.1f} ms\n"
+                                + _text_report(stats), mimetype="text/plain")
+        if path:
+            response.headers["X-Profile-File"] = os.path.basename(path)
+        response.headers["X-Profile-Wall-Ms"] = f"{wall_ms:.3f}"
+        return response
+
+    @app.teardown_request
+    def _profile_abandon(exc):
+        # The request failed before after_request ran: stop profiling the thread.
+        profiler = g.pop("_profiler", None)
+        if profiler is not None:
+            profiler.disable()
+        if g.pop("_profile_locked", False):
+            _PROFILE_LOCK.release()
@@ -1,7 +1,9 @@
 # scraper.py — Excel/CSV–backed product source
 # De-duplicates ONLY when (normalized title, canonical URL, price text) are identical.
 
-import os, csv, threading, re
+import os, csv, heapq, threading, time, re
+from bisect import bisect_right
+from collections import OrderedDict
 from urllib.parse import urlparse, unquote
 
 try:
@@ -19,11 +21,33 @@ EXCEL_DIR = os.environ.get(
 # Deduplication is ON
 DEDUP = True
 
+# How often the background watcher checks for a new or changed data file.
+RELOAD_POLL_SECONDS = float(os.environ.get("GREEK_PRICES_POLL_SECONDS", "10"))
+
+# Suggestion candidate sets up to this size are kept so the next keystroke
+# can filter them instead of going back to the index.
+SUGGEST_REUSE_MAX = 2000
+# Token hit sets and suggestion candidates are memoized per loaded file, least
+# recently used out first, bounded by the item ids they hold in total (~40
+# bytes each) and by entry count. A set over a quarter of the budget is not
+# kept, so one very common token can't flush the rest.
+HITS_MEMO_MAX_IDS = int(os.environ.get("GREEK_HITS_MEMO_MAX_IDS", "500000"))
+SUGGEST_MEMO_MAX_IDS = 200000
+MEMO_MAX_ENTRIES = 1024
+# When every query token is common, suggestions are looked for in the first
+# this-many titles of the alphabetical order before intersecting hit sets.
+SUGGEST_WALK_MAX = 2000
+
+# Sort keys with a presorted index order; anything else keeps file order.
+SORT_ORDERS = ("bestsellers", "price_asc", "price_desc", "alpha")
+
 # ---------- State ----------
-_ITEMS = []
-_LAST_PATH = None
-_LAST_MTIME = 0.0
+# Requests read _VIEW without locking; the loader builds a complete new view and
+# publishes it with a single assignment. _LOCK only serializes loaders.
 _LOCK = threading.Lock()
+_WATCHER_PID = None  # pid that owns the watcher thread (threads don't survive fork)
+_MISSING_REPORTED = False
+RELOAD_STATS = {"reloads": 0, "failures": 0}  # per process
 
 # ---------- Helpers ----------
 def _find_latest_file(dirname: str):
@@ -208,86 +232,334 @@ def _load_items_from_file(path: str):
     print(f"[excel] DEBUG loaded {len(items)} items (no dedup) from: {path}")
     return items
 
-def _ensure_loaded():
-    """Ensures the item data is loaded into memory, reloading if the file has changed."""
-    global _ITEMS, _LAST_PATH, _LAST_MTIME
+class _IdMemo:
+    """LRU of query string -> frozenset of item ids, bounded by entries and total ids."""
+    __slots__ = ("entries", "ids", "max_ids", "lock")
+
+    def __init__(self, max_ids):
+        self.entries = OrderedDict()
+        self.ids = 0  # sum of len() over the cached sets
+        self.max_ids = max_ids
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            found = self.entries.get(key)
+            if found is not None:
+                self.entries.move_to_end(key)
+            return found
+
+    def put(self, key, ids):
+        if len(ids) > self.max_ids // 4:
+            return
+        with self.lock:
+            old = self.entries.pop(key, None)
+            if old is not None:
+                self.ids -= len(old)
+            self.entries[key] = ids
+            self.ids += len(ids)
+            while self.ids > self.max_ids or len(self.entries) > MEMO_MAX_ENTRIES:
+                self.ids -= len(self.entries.popitem(last=False)[1])
+
+def _build_view(items, path=None, mtime=0.0):
+    """Casefolded titles, sort orders and a token index, built once per load.
+
+    The sorts are stable, so filtering a presorted order gives exactly what
+    sorting the filtered list did. The index maps each whitespace-separated
+    word of a folded title to the items containing it; a query token has no
+    whitespace, so it is a substring of a title exactly when it is a substring
+    of one of the title's words.
+    """
+    idx = range(len(items))
+    pf = [it.get("price_float") for it in items]
+    folded = [(it["title"] or "").casefold() for it in items]
+    orders = {
+        "bestsellers": idx,
+        "price_asc": sorted(idx, key=lambda i: (pf[i] is None, pf[i] or 1e12)),
+        "price_desc": sorted(idx, key=lambda i: (pf[i] is None, -(pf[i] or 0.0))),
+        "alpha": sorted(idx, key=lambda i: folded[i]),
+    }
+    ranks = {}
+    for name, order in orders.items():
+        rank = [0] * len(items)
+        for r, i in enumerate(order):
+            rank[i] = r
+        ranks[name] = rank
+
+    postings = {}
+    for i, title in enumerate(folded):
+        for word in set(title.split()):
+            postings.setdefault(word, []).append(i)
+    vocab = sorted(postings)
+    offsets, trigrams, at = [], {}, 0
+    for w, word in enumerate(vocab):
+        offsets.append(at)
+        at += len(word) + 1
+        for gram in {word[k:k + 3] for k in range(len(word) - 2)}:
+            trigrams.setdefault(gram, []).append(w)
+
+    return {
+        "items": items,
+        "folded": folded,
+        "canon": [_canon_url(it["url"]) for it in items],
+        "orders": orders,
+        "ranks": ranks,
+        "postings": postings,
+        "vocab": vocab,
+        "vocab_blob": "\n".join(vocab),
+        "vocab_offsets": offsets,
+        "trigrams": trigrams,
+        "hits": _IdMemo(HITS_MEMO_MAX_IDS),  # query token -> frozenset of matching item ids
+        "suggest": _IdMemo(SUGGEST_MEMO_MAX_IDS),  # normalized suggest query -> its matching item ids
+        "path": path,
+        "mtime": mtime,
+        "loaded_at": time.time(),
+    }
+
+_VIEW = _build_view([])
+
+def _reload_if_changed():
+    """Loads the chosen file if it is new or newer, then swaps in the new view."""
+    global _VIEW, _MISSING_REPORTED
     with _LOCK:
         path = _chosen_path()
         if not path or not os.path.isfile(path):
-            print("[excel] No data file found. Set GREEK_PRICES_FILE or GREEK_PRICES_DIR.")
-            return
+            if not _MISSING_REPORTED:
+                print("[excel] No data file found. Set GREEK_PRICES_FILE or GREEK_PRICES_DIR.")
+                _MISSING_REPORTED = True
+            return False
+        _MISSING_REPORTED = False
         try:
             mtime = os.path.getmtime(path)
         except Exception:
             mtime = 0.0
-        if path != _LAST_PATH or mtime > _LAST_MTIME:
-            _ITEMS = _load_items_from_file(path)
-            _LAST_PATH, _LAST_MTIME = path, mtime
-            print(f"[excel] Loaded {len(_ITEMS)} items from: {path}")
-
-def _filter_sort(items, search_term="", sort="bestsellers"):
-    """Filters items by a search term and applies sorting."""
-    q = (search_term or "").casefold().strip()
-    toks = [t for t in q.split() if t]
-
-    def matches(it):
-        if not toks:
-            return True
-        title = (it["title"] or "").casefold()
-        return all(t in title for t in toks)
-
-    out = [it for it in items if matches(it)]
-
-    if sort == "price_asc":
-        out.sort(key=lambda i: (i.get("price_float") is None, i.get("price_float") or 1e12))
-    elif sort == "price_desc":
-        out.sort(key=lambda i: (i.get("price_float") is None, -(i.get("price_float") or 0.0)))
-    elif sort == "alpha":
-        out.sort(key=lambda i: (i.get("title") or "").casefold())
+        current = _VIEW
+        if path == current["path"] and mtime <= current["mtime"]:
+            return False
+        view = _build_view(_load_items_from_file(path), path, mtime)
+        _VIEW = view
+        RELOAD_STATS["reloads"] += 1
+        print(f"[excel] Loaded {len(view['items'])} items from: {path}")
+        return True
+
+def _watch():
+    while True:
+        time.sleep(RELOAD_POLL_SECONDS)
+        try:
+            _reload_if_changed()
+        except Exception as e:
+            RELOAD_STATS["failures"] += 1
+            print(f"[excel] Reload failed, keeping the loaded items: {e}")
+
+def _ensure_loaded():
+    """Loads the data once per process and starts the background reloader; later calls return at once."""
+    global _WATCHER_PID
+    if _WATCHER_PID == os.getpid():
+        return
+    if _VIEW["path"] is None:
+        _reload_if_changed()
+    with _LOCK:
+        if _WATCHER_PID != os.getpid():
+            threading.Thread(target=_watch, name="greek-prices-reloader", daemon=True).start()
+            _WATCHER_PID = os.getpid()
+
+def seconds_since_reload():
+    """Seconds since the current items were loaded, or None if nothing is loaded yet."""
+    view = _VIEW
+    return time.time() - view["loaded_at"] if view["path"] else None
+
+def reload_status():
+    """The loaded file, its item count and when it was loaded."""
+    view = _VIEW
+    loaded = view["path"] is not None
+    return {
+        "path": view["path"],
+        "items": len(view["items"]),
+        "loaded_at": view["loaded_at"] if loaded else None,
+        "seconds_since_reload": time.time() - view["loaded_at"] if loaded else None,
+        "reloads": RELOAD_STATS["reloads"],
+        "reload_failures": RELOAD_STATS["failures"],
+        "memo_ids": view["hits"].ids + view["suggest"].ids,
+    }
+
+def _words_containing(view, tok):
+    """Indexed words that contain `tok` (same test as `tok in word`)."""
+    vocab = view["vocab"]
+    if len(tok) >= 3:
+        # Every trigram of tok must occur in the word; start from the rarest.
+        trigrams = view["trigrams"]
+        lists = sorted((trigrams.get(tok[k:k + 3], ()) for k in range(len(tok) - 2)), key=len)
+        cand = lists[0]
+        for other in lists[1:]:
+            if not cand:
+                break
+            other = set(other)
+            cand = [w for w in cand if w in other]
+        return [vocab[w] for w in cand if tok in vocab[w]]
+    blob, offsets = view["vocab_blob"], view["vocab_offsets"]
+    out = []
+    i = blob.find(tok)
+    while i != -1:
+        w = bisect_right(offsets, i) - 1
+        out.append(vocab[w])
+        # Resume at the next word so each word is reported once.
+        i = blob.find(tok, offsets[w + 1] if w + 1 < len(offsets) else len(blob))
     return out
 
+def _token_hits(view, tok):
+    """Ids of the items whose folded title contains `tok`."""
+    hits = view["hits"]
+    found = hits.get(tok)
+    if found is None:
+        postings = view["postings"]
+        words = _words_containing(view, tok)
+        if len(words) == 1:
+            found = frozenset(postings[words[0]])
+        else:
+            found = frozenset().union(*(postings[w] for w in words))
+        hits.put(tok, found)
+    return found
+
+def _matching_ids(view, toks):
+    """Ids of the items containing every token, intersecting the smallest hit set first."""
+    sets = sorted((_token_hits(view, t) for t in set(toks)), key=len)
+    found = sets[0]
+    for other in sets[1:]:
+        if not found:
+            break
+        found = found & other
+    return found
+
+def _ordered(view, ids, sort, limit=None):
+    """`ids` in the order of `sort`, cut to the first `limit`."""
+    order = view["orders"].get(sort, view["orders"]["bestsellers"])
+    if limit is not None and limit <= 0:
+        return []
+    if limit is not None and len(ids) * 4 > len(order):
+        # Dense result: walking the presorted order hits `limit` matches quickly.
+        out = []
+        for i in order:
+            if i in ids:
+                out.append(i)
+                if len(out) == limit:
+                    break
+        return out
+    rank = view["ranks"].get(sort, view["ranks"]["bestsellers"])
+    if limit is None:
+        return sorted(ids, key=rank.__getitem__)
+    return heapq.nsmallest(limit, ids, key=rank.__getitem__)
+
 # ---------- Public API used by app.py ----------
+def _query_tokens(q):
+    return tuple(t for t in (q or "").casefold().split() if t)
+
 def search_products_all(q, sort="bestsellers"):
     """Searches all loaded products."""
     _ensure_loaded()
-    return _filter_sort(list(_ITEMS), search_term=q, sort=sort)
+    view = _VIEW
+    items = view["items"]
+    toks = _query_tokens(q)
+    if not toks:
+        return [items[i] for i in view["orders"].get(sort, view["orders"]["bestsellers"])]
+    return [items[i] for i in _ordered(view, _matching_ids(view, toks), sort)]
+
+def search_products_page(q, sort="bestsellers", page=1, page_size=24):
+    """One page of search_products_all(q, sort), plus the total number of matches."""
+    _ensure_loaded()
+    view = _VIEW
+    items = view["items"]
+    start = (max(1, page) - 1) * page_size
+    end = start + page_size
+    toks = _query_tokens(q)
+    if not toks:
+        order = view["orders"].get(sort, view["orders"]["bestsellers"])
+        return [items[i] for i in order[start:end]], len(items)
+    ids = _matching_ids(view, toks)
+    if start >= len(ids):
+        return [], len(ids)
+    return [items[i] for i in _ordered(view, ids, sort, end)[start:]], len(ids)
+
+def _suggest_ids(view, toks):
+    """Ids matching `toks`, narrowed from the longest remembered prefix of the query.
+
+    If one query string extends another, its matches are a subset: earlier
+    tokens are unchanged and the last one only grows.
+    """
+    key = " ".join(toks)
+    memo = view["suggest"]
+    ids = memo.get(key)
+    if ids is not None:
+        return ids
+    for cut in range(len(key) - 1, max(0, len(key) - 32), -1):
+        prev = memo.get(key[:cut])
+        if prev is not None:
+            folded = view["folded"]
+            ids = frozenset(i for i in prev if all(t in folded[i] for t in toks))
+            break
+    else:
+        ids = _matching_ids(view, toks)
+    if len(ids) <= SUGGEST_REUSE_MAX:
+        memo.put(key, ids)
+    return ids
 
 def suggest_titles(q, limit=10):
     """Provides title suggestions for search."""
     _ensure_loaded()
-    items = _filter_sort(list(_ITEMS), search_term=q, sort="alpha")
-    return items[:limit]
+    view = _VIEW
+    items = view["items"]
+    toks = _query_tokens(q)
+    alpha = view["orders"]["alpha"]
+    if not toks or limit <= 0:
+        return [items[i] for i in alpha[:max(0, limit)]]
+    sets = sorted((_token_hits(view, t) for t in set(toks)), key=len)
+    if len(sets[0]) * 4 > len(items):
+        # Only common tokens: the first matches in alpha order are usually a few
+        # titles in, which is cheaper than intersecting large hit sets.
+        out = []
+        for i in alpha[:SUGGEST_WALK_MAX]:
+            if all(i in hits for hits in sets):
+                out.append(items[i])
+                if len(out) == limit:
+                    return out
+        if len(alpha) <= SUGGEST_WALK_MAX:
+            return out
+    return [items[i] for i in _ordered(view, _suggest_ids(view, toks), "alpha", limit)]
 
 def get_related_products(title, original_url, limit=6):
-    """Finds items with titles similar to the given one."""
+    """Finds items with titles similar to the given one.
+
+    An item scores one point per keyword (words over 3 chars of `title`) found
+    in its title; the best `limit` come back, ties in file order, excluding the
+    item whose canonical URL matches `original_url`.
+    """
     _ensure_loaded()
-    
+    view = _VIEW
     q = (title or "").casefold().strip()
     # Use significant words (more than 3 chars) for matching
     toks = {t for t in q.split() if len(t) > 3}
-    
-    if not toks:
+    if not toks or limit <= 0:
         return []
 
-    canon_original_url = _canon_url(original_url)
-
-    def score_item(it):
-        if not it or not it.get("title"): return 0
-        # Exclude the exact same item by comparing canonical URLs
-        if _canon_url(it.get("url", "")) == canon_original_url: return 0
-            
-        item_title = (it["title"] or "").casefold()
-        # Score is the number of matching keywords
-        score = sum(1 for t in toks if t in item_title)
-        return score
-
-    # Score all items in the inventory
-    scored_items = [(score_item(it), it) for it in _ITEMS]
-    
-    # Sort by score in descending order
-    scored_items.sort(key=lambda x: x[0], reverse=True)
-    
-    # Filter for items that have a score greater than 0
-    related = [item for score, item in scored_items if score > 0]
-    
-    return related[:limit]
+    canon, exclude = view["canon"], _canon_url(original_url)
+    # Rarest keyword first. Once the first j hit sets are scored, an item in none
+    # of them can still reach at most len(sets) - j points, so stop as soon as
+    # the current top `limit` all score more than that.
+    sets = sorted((_token_hits(view, t) for t in toks), key=len)
+    seen = set()
+    top = []  # min-heap of (score, -id): the weakest kept item is top[0]
+    for j, hits in enumerate(sets, 1):
+        for i in hits:
+            if i in seen:
+                continue
+            seen.add(i)
+            if canon[i] == exclude:
+                continue
+            entry = (sum(1 for h in sets if i in h), -i)
+            if len(top) < limit:
+                heapq.heappush(top, entry)
+            elif entry > top[0]:
+                heapq.heapreplace(top, entry)
+        if len(top) == limit and top[0][0] > len(sets) - j:
+            break
+    items = view["items"]
+    return [items[-neg_i] for _, neg_i in sorted(top, reverse=True)]
@@ -1,16 +1,21 @@
+import os
 import time
 import requests
 import threading
-from requests.exceptions import ReadTimeout, RequestException
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, wait as _wait_futures
+from requests.adapters import HTTPAdapter
+from requests.exceptions import ReadTimeout, RequestException, Timeout
 
 from data_loader import (
     search_local_cards, get_local_card_by_id, get_local_related_cards,
-    get_price_override
+    get_card_price_override
 )
 from fun_facts import get_greek_fun_fact
 
 POKEMON_TCG_API_KEY = "ef66b505-18ad-457e-b4f2-b8ec126dbb7d"
-BASE_URL = "https://api.pokemontcg.io/v2"
+# Point at a stand-in (e.g. fake_pokemontcg.py) for offline runs.
+BASE_URL = os.environ.get("POKEMON_TCG_BASE_URL", "https://api.pokemontcg.io/v2").rstrip("/")
 
 HEADERS = {
     "X-Api-Key": POKEMON_TCG_API_KEY,
@@ -18,31 +23,224 @@ HEADERS = {
     "User-Agent": "POKEGR-TCG-TRACKER/3.3-fast"
 }
 
-# ----- tiny API cache with short timeouts -----
-API_CACHE = {}
+# ----- pooled keep-alive session -----
+API_POOL_SIZE = int(os.environ.get("API_POOL_SIZE", "16"))
+_SESSION = requests.Session()
+_SESSION.headers.update(HEADERS)
+_SESSION.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=API_POOL_SIZE))
+_SESSION.mount("http://", HTTPAdapter(pool_connections=4, pool_maxsize=API_POOL_SIZE))
+
+# ----- bounded LRU + TTL API cache with short timeouts -----
+API_CACHE = OrderedDict()  # cache_key -> (stored_at, data), least recently used first
 API_CACHE_LOCK = threading.Lock()
 API_TTL = 600  # 10 minutes
+API_CACHE_MAX = int(os.environ.get("API_CACHE_MAX", "2048"))
+API_CACHE_STATS = {"hits": 0, "misses": 0, "expired": 0, "evicted": 0, "coalesced": 0, "fetches": 0, "errors": 0, "timeouts": 0}
+
+# Identical fetches in progress: cache_key -> _Flight. Later callers wait for the
+# first one's result instead of issuing their own request.
+_INFLIGHT = {}
+
+class _Flight:
+    __slots__ = ("done", "result")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+
+def api_cache_stats():
+    """Cache counters plus current size, for diagnostics."""
+    with API_CACHE_LOCK:
+        stats = dict(API_CACHE_STATS)
+        stats["size"] = len(API_CACHE)
+        stats["max_size"] = API_CACHE_MAX
+        stats["inflight"] = len(_INFLIGHT)
+    return stats
+
+def _cache_get(cache_key):
+    """Fresh cached data or None; caller holds API_CACHE_LOCK."""
+    entry = API_CACHE.get(cache_key)
+    if entry is None:
+        return None
+    if time.time() - entry[0] >= API_TTL:
+        del API_CACHE[cache_key]
+        API_CACHE_STATS["expired"] += 1
+        return None
+    API_CACHE.move_to_end(cache_key)
+    return entry[1]
+
+def _cache_put(cache_key, data):
+    """Store data, evicting the least recently used entries; caller holds API_CACHE_LOCK."""
+    API_CACHE[cache_key] = (time.time(), data)
+    API_CACHE.move_to_end(cache_key)
+    while len(API_CACHE) > API_CACHE_MAX:
+        API_CACHE.popitem(last=False)
+        API_CACHE_STATS["evicted"] += 1
 
 def _fetch_json(url, params=None, timeout=2.0, retries=0, is_single_item=False):
     cache_key = f"{url}?{str(params)}"
     with API_CACHE_LOCK:
-        if cache_key in API_CACHE:
-            ts, data = API_CACHE[cache_key]
-            if time.time() - ts < API_TTL:
-                return data
-    for attempt in range(retries + 1):
-        try:
-            r = requests.get(url, headers=HEADERS, params=params, timeout=timeout)
-            r.raise_for_status()
-            data = r.json()
-            with API_CACHE_LOCK:
-                API_CACHE[cache_key] = (time.time(), data)
+        data = _cache_get(cache_key)
+        if data is not None:
+            API_CACHE_STATS["hits"] += 1
             return data
-        except (ReadTimeout, RequestException):
-            if attempt < retries:
-                time.sleep(0.15)
+        flight = _INFLIGHT.get(cache_key)
+        if flight is None:
+            API_CACHE_STATS["misses"] += 1
+            flight = _INFLIGHT[cache_key] = _Flight()
+            leader = True
+        else:
+            API_CACHE_STATS["coalesced"] += 1
+            leader = False
+
+    if not leader:
+        # Bounded by what the leader can take; on a miss fall back like a failed fetch.
+        flight.done.wait(timeout * (retries + 1) + 0.15 * retries + 1.0)
+        data = flight.result
+        if data is not None:
+            return data
+        return None if is_single_item else {"data": []}
+
+    data = None
+    try:
+        for attempt in range(retries + 1):
+            try:
+                with API_CACHE_LOCK:
+                    API_CACHE_STATS["fetches"] += 1
+                r = _SESSION.get(url, params=params, timeout=timeout)
+                r.raise_for_status()
+                data = r.json()
+                break
+            except (ReadTimeout, RequestException) as e:
+                with API_CACHE_LOCK:
+                    API_CACHE_STATS["errors"] += 1
+                    if isinstance(e, Timeout):
+                        API_CACHE_STATS["timeouts"] += 1
+                if attempt < retries:
+                    time.sleep(0.15)
+    finally:
+        with API_CACHE_LOCK:
+            if data is not None:
+                _cache_put(cache_key, data)
+            _INFLIGHT.pop(cache_key, None)
+        flight.result = data
+        flight.done.set()
+    if data is not None:
+        return data
+    return None if is_single_item else {"data": []}
+
+# ----- card enrichment (stale-while-revalidate) -----
+# Remote extras for a card (links, updatedAt, market price when there is no
+# override) are served from here; missing or stale entries are refreshed by a
+# small worker pool so card details never wait on the full API timeout.
+ENRICH_TTL = float(os.environ.get("ENRICH_TTL", str(API_TTL)))
+ENRICH_RETRY_SECONDS = float(os.environ.get("ENRICH_RETRY_SECONDS", "60"))
+ENRICH_WORKERS = int(os.environ.get("ENRICH_WORKERS", "4"))
+# Cards without a price override have no local price, so their first view waits
+# this long for the refresh before answering without one.
+ENRICH_WAIT_SECONDS = float(os.environ.get("ENRICH_WAIT_SECONDS", "0.3"))
+# Cards per batched q=id:(a OR b ...) refresh (the API's page size limit is 250).
+ENRICH_BATCH_MAX = 100
+
+_ENRICHMENT = {}  # card_id -> (fetched_at, extras or None); at most one per local card
+_ENRICH_PENDING = {}  # card_id -> Future
+_ENRICH_LOCK = threading.Lock()
+_ENRICH_POOL = ThreadPoolExecutor(max_workers=ENRICH_WORKERS, thread_name_prefix="card-enrich")
+
+def _first_float(*vals):
+    for v in vals:
+        try:
+            if v is None: continue
+            return float(v)
+        except (ValueError, TypeError):
+            continue
+    return None
+
+def _extract_enrichment(d):
+    """The parts of an API card record that get_card_details uses."""
+    tcg = (d.get("tcgplayer")  or {}).get("prices") or {}
+    cmk = (d.get("cardmarket") or {}).get("prices") or {}
+    market = None
+    for k in ("holofoil","reverseHolofoil","normal"):
+        market = market or _first_float(*( (tcg.get(k) or {}).get(x) for x in ("market","directLow","mid") ))
+    market = market or _first_float(cmk.get("averageSellPrice"), cmk.get("trendPrice"))
+    return {
+        "market": market,
+        "cardmarketUrl": (d.get("cardmarket") or {}).get("url"),
+        "tcgPlayerUrl": (d.get("tcgplayer") or {}).get("url"),
+        "updatedAt": (d.get("cardmarket") or {}).get("updatedAt"),
+    }
+
+def _refresh_enrichment(card_ids):
+    """Fetch extras for card_ids: /cards/{id} for one card, one q=id:(a OR b ...) search for several."""
+    try:
+        if len(card_ids) == 1:
+            api = _fetch_json(f"{BASE_URL}/cards/{card_ids[0]}", is_single_item=True, timeout=2.0, retries=1)
+            records = [api["data"]] if api and "data" in api else []
+        else:
+            params = {"q": f"id:({' OR '.join(card_ids)})", "pageSize": len(card_ids)}
+            records = (_fetch_json(f"{BASE_URL}/cards", params=params, timeout=3.0, retries=1) or {}).get("data") or []
+        now = time.time()
+        wanted = set(card_ids)
+        with _ENRICH_LOCK:
+            for d in records:
+                if d.get("id") in wanted:
+                    _ENRICHMENT[d["id"]] = (now, _extract_enrichment(d))
+                    wanted.discard(d["id"])
+            for card_id in wanted:
+                # Keep what we had, and don't ask again for ENRICH_RETRY_SECONDS.
+                old = _ENRICHMENT.get(card_id, (0.0, None))[1]
+                _ENRICHMENT[card_id] = (now - ENRICH_TTL + ENRICH_RETRY_SECONDS, old)
+    finally:
+        with _ENRICH_LOCK:
+            for card_id in card_ids:
+                _ENRICH_PENDING.pop(card_id, None)
+
+def _get_enrichments(card_ids, wait_for=()):
+    """{card_id: (extras or None, state)} from the cache; refreshes missing or stale ones.
+
+    state is "fresh", "stale" (served while refreshing), "pending" (nothing yet)
+    or "unavailable" (the last refresh failed). Cards in `wait_for` that have
+    nothing cached get up to ENRICH_WAIT_SECONDS for their refresh.
+    """
+    now = time.time()
+    futures, todo = {}, []
+    with _ENRICH_LOCK:
+        for card_id in card_ids:
+            entry = _ENRICHMENT.get(card_id)
+            if entry is not None and now - entry[0] < ENRICH_TTL:
                 continue
-            return None if is_single_item else {"data": []}
+            future = _ENRICH_PENDING.get(card_id)
+            if future is None:
+                todo.append(card_id)
+            else:
+                futures[card_id] = future
+        for start in range(0, len(todo), ENRICH_BATCH_MAX):
+            chunk = tuple(todo[start:start + ENRICH_BATCH_MAX])
+            future = _ENRICH_POOL.submit(_refresh_enrichment, chunk)
+            for card_id in chunk:
+                _ENRICH_PENDING[card_id] = futures[card_id] = future
+        blocking = {futures[c] for c in wait_for if c in futures and c not in _ENRICHMENT}
+    if blocking and ENRICH_WAIT_SECONDS > 0:
+        _wait_futures(blocking, timeout=ENRICH_WAIT_SECONDS)
+
+    out = {}
+    with _ENRICH_LOCK:
+        for card_id in card_ids:
+            entry = _ENRICHMENT.get(card_id)
+            if entry is None:
+                out[card_id] = (None, "pending")
+            elif entry[1] is None:
+                out[card_id] = (None, "pending" if card_id in _ENRICH_PENDING else "unavailable")
+            elif card_id in futures and card_id in _ENRICH_PENDING:
+                out[card_id] = (entry[1], "stale")
+            else:
+                out[card_id] = (entry[1], "fresh")
+    return out
+
+def enrichment_stats():
+    with _ENRICH_LOCK:
+        return {"cards": len(_ENRICHMENT), "pending": len(_ENRICH_PENDING)}
 
 def _fallback_search_links(name, set_name, number):
     q = requests.utils.quote(f"{name} {set_name} {number}")
@@ -76,7 +274,26 @@ def get_card_details(card_id):
     card = get_local_card_by_id(card_id)
     if not card:
         return None
+    override = get_card_price_override(card_id)
+    # Cards without an override have no local price, so they may wait briefly for it.
+    extras, enrichment = _get_enrichments([card_id], wait_for=() if override else (card_id,))[card_id]
+    return _card_details(card, override, extras, enrichment)
 
+def get_cards_details(card_ids):
+    """get_card_details for many ids at once, in request order; unknown ids are skipped.
+
+    Enrichment that is missing or stale is refreshed with one batched API search.
+    """
+    found = []
+    for card_id in card_ids:
+        card = get_local_card_by_id(card_id) if card_id else None
+        if card:
+            found.append((card_id, card, get_card_price_override(card_id)))
+    unique = list(dict.fromkeys(card_id for card_id, _, _ in found))
+    enrichments = _get_enrichments(unique, wait_for=[card_id for card_id, _, override in found if not override])
+    return [_card_details(card, override, *enrichments[card_id]) for card_id, card, override in found]
+
+def _card_details(card, override, extras, enrichment):
     set_obj = card.get("set") or {}
     images_obj = card.get("images") or {}
     set_images_obj = set_obj.get("images") or {}
@@ -84,7 +301,6 @@ def get_card_details(card_id):
     tcgPlayerUrl, cardmarketUrl, ebayUrl = _fallback_search_links(card.get("name"), set_obj.get("name"), card.get("number"))
 
     # 1) Use price override (fast & offline)
-    override = get_price_override(card.get("name"), set_obj.get("name"), card.get("number"))
     if override:
         prices = {
             "market": override.get("market"),
@@ -93,48 +309,15 @@ def get_card_details(card_id):
             "currency": override.get("currency") or "EUR",
             "source": "excel"
         }
-        api = _fetch_json(f"{BASE_URL}/cards/{card_id}", is_single_item=True, timeout=1.8, retries=0)
-        updatedAt = None
-        if api and "data" in api:
-            d = api["data"]
-            cardmarketUrl = (d.get("cardmarket") or {}).get("url") or cardmarketUrl
-            tcgPlayerUrl  = (d.get("tcgplayer")  or {}).get("url") or tcgPlayerUrl
-            updatedAt     = (d.get("cardmarket") or {}).get("updatedAt")
-        return {
-            "id": card.get("id"), "name": card.get("name"), "imageUrl": images_obj.get("large"),
-            "ebayUrl": ebayUrl, "set": set_obj.get("name"), "setId": set_obj.get("id"),
-            "setIcon": set_images_obj.get("symbol"), "number": card.get("number"), "rarity": card.get("rarity"),
-            "artist": card.get("artist"), "flavorText": card.get("flavorText"),
-            "pullRate": _get_pull_rate(card.get("rarity")), "cardmarketUrl": cardmarketUrl,
-            "tcgPlayerUrl": tcgPlayerUrl, "updatedAt": updatedAt, "prices": prices or {},
-            "attacks": card.get("attacks"), "abilities": card.get("abilities"), "hp": card.get("hp"),
-            "types": card.get("types"), "funFact": get_greek_fun_fact(card.get("name", ""))
-        }
+    # 2) No override: market price from the API record, when we have one
+    else:
+        prices = {"market": extras["market"], "currency": "USD"} if extras else {}
 
-    # 2) No override: quick API call (short timeout) for prices + links
-    api = _fetch_json(f"{BASE_URL}/cards/{card_id}", is_single_item=True, timeout=2.0, retries=0)
-    prices = {}
     updatedAt = None
-    if api and "data" in api:
-        d = api["data"]
-        tcg = (d.get("tcgplayer")  or {}).get("prices") or {}
-        cmk = (d.get("cardmarket") or {}).get("prices") or {}
-        def first(*vals):
-            for v in vals:
-                try:
-                    if v is None: continue
-                    return float(v)
-                except (ValueError, TypeError):
-                    continue
-            return None
-        market = None
-        for k in ("holofoil","reverseHolofoil","normal"):
-            market = market or first(*( (tcg.get(k) or {}).get(x) for x in ("market","directLow","mid") ))
-        market = market or first(cmk.get("averageSellPrice"), cmk.get("trendPrice"))
-        prices = {"market": market, "currency": "USD"}
-        cardmarketUrl = (d.get("cardmarket") or {}).get("url") or cardmarketUrl
-        tcgPlayerUrl  = (d.get("tcgplayer")  or {}).get("url")  or tcgPlayerUrl
-        updatedAt     = (d.get("cardmarket") or {}).get("updatedAt")
+    if extras:
+        cardmarketUrl = extras["cardmarketUrl"] or cardmarketUrl
+        tcgPlayerUrl  = extras["tcgPlayerUrl"]  or tcgPlayerUrl
+        updatedAt     = extras["updatedAt"]
 
     return {
         "id": card.get("id"), "name": card.get("name"), "imageUrl": images_obj.get("large"),
@@ -144,7 +327,8 @@ def get_card_details(card_id):
         "pullRate": _get_pull_rate(card.get("rarity")), "cardmarketUrl": cardmarketUrl,
         "tcgPlayerUrl": tcgPlayerUrl, "updatedAt": updatedAt, "prices": prices or {},
         "attacks": card.get("attacks"), "abilities": card.get("abilities"), "hp": card.get("hp"),
-        "types": card.get("types"), "funFact": get_greek_fun_fact(card.get("name", ""))
+        "types": card.get("types"), "funFact": get_greek_fun_fact(card.get("name", "")),
+        "enrichment": enrichment
     }
 
 def _get_pull_rate(rarity_str):
@@ -0,0 +1,173 @@
+# tests/test_data_loader.py — local card search and price reloads
+#
+#   python -m pytest -q tests
+
+import itertools
+import os
+import re
+
+import pytest
+
+import data_loader as dl
+
+GOOD_CSV = (
+    "game,card_title,unguided_price,psa9_price,psa10_price\n"
+    "Pokemon Base Set,Charizard #4,\"$350.00\",\"$900.00\",\"$5,000.00\"\n"
+    "Pokemon Base Set,Blastoise #2,\"$120.00\",,\n"
+)
+
+def _card(card_id, name, set_name, number, rarity=None):
+    num = dl._normalize_number(number)
+    return {
+        "id": card_id, "name": name, "number": number, "rarity": rarity,
+        "set": {"id": "base1", "name": set_name},
+        "_normalized_name": dl._name_norm(name),
+        "_normalized_set": dl._normalize_set(set_name),
+        "_normalized_number": num,
+        "_normalized_number_digits": dl._digits_only(num),
+    }
+
+@pytest.fixture
+def prices_dir(tmp_path, monkeypatch):
+    """Two local cards, an empty price table and PRICES_DIR in tmp_path; module state is restored afterwards."""
+    cards = [_card("base1-4", "Charizard", "Base Set", "4"), _card("base1-2", "Blastoise", "Base Set", "2")]
+    monkeypatch.setattr(dl, "_card_data", cards)
+    monkeypatch.setattr(dl, "_card_dict", {c["id"]: c for c in cards})
+    for name, value in (("_price_map", {}), ("_price_index", set()), ("_by_name_num", {}),
+                        ("_price_by_card_id", {}), ("_local_set_norms", frozenset()),
+                        ("_set_alias", {}), ("_unmatched_price_sets", []),
+                        ("PRICE_LOAD_STATS", {"loads": 0, "failures": 0, "rows": 0, "seconds": 0.0})):
+        monkeypatch.setattr(dl, name, value)
+    monkeypatch.setattr(dl, "PRICES_DIR", str(tmp_path))
+    return tmp_path
+
+def _write_newer(path, data):
+    """Write data to path with an mtime after every file already in its directory."""
+    newest = max((os.path.getmtime(os.path.join(path.parent, f)) for f in os.listdir(path.parent)), default=0)
+    path.write_bytes(data)
+    os.utime(path, (newest + 10, newest + 10))
+
+def _load_good(prices_dir):
+    _write_newer(prices_dir / "prices_1.csv", GOOD_CSV.encode("utf-8"))
+    dl._load_price_data()
+    assert dl.get_price_override("Charizard", "Base Set", "4")["market"] == 350.0
+    return dl._price_map, dl._set_alias
+
+@pytest.mark.parametrize("name, data", [
+    # Good header and a row, then bytes that are not UTF-8: the reader fails mid-file.
+    ("prices_2.csv", b"game,card_title,unguided_price\nPokemon Base Set,Charizard #4,$1.00\n\xff\xfe\xfa broken"),
+    # Not a workbook at all.
+    ("prices_2.xlsx", b"PK\x03\x04 truncated"),
+])
+def test_failed_reload_keeps_previous_prices(prices_dir, name, data):
+    old_map, old_alias = _load_good(prices_dir)
+
+    _write_newer(prices_dir / name, data)
+    dl._load_price_data()
+
+    assert dl.PRICE_LOAD_STATS["failures"] == 1
+    assert dl._price_map is old_map and dl._set_alias is old_alias
+    assert dl.get_price_override("Charizard", "Base Set", "4")["market"] == 350.0
+    assert dl.get_card_price_override("base1-4")["market"] == 350.0
+    assert dl.get_card_price_override("base1-2")["market"] == 120.0
+
+def test_successful_reload_replaces_prices(prices_dir):
+    _load_good(prices_dir)
+
+    _write_newer(prices_dir / "prices_2.csv",
+                 b"game,card_title,unguided_price\nPokemon Base Set,Charizard #4,$400.00\n")
+    dl._load_price_data()
+
+    assert dl.PRICE_LOAD_STATS["failures"] == 0
+    assert dl.get_card_price_override("base1-4")["market"] == 400.0
+    assert dl.get_card_price_override("base1-2") is None
+
+# ---------- search_local_cards vs. a linear scan ----------
+SEARCH_CARDS = [
+    # (id, name, set, number, rarity); several share scores so only the tie-break orders them
+    ("a-1", "Charizard", "Base Set", "4", "Rare Holo"),
+    ("a-2", "Charmander", "Base Set", "46", "Common"),
+    ("a-3", "Charmeleon", "Base Set", "24", "Uncommon"),
+    ("b-1", "Charizard", "Base Set 2", "4", "Rare Holo"),
+    ("b-2", "Dark Charizard", "Team Rocket", "4", "Rare Holo"),
+    ("b-3", "Dark Charmeleon", "Team Rocket", "32", "Uncommon"),
+    ("c-1", "Charizard ex", "Obsidian Flames", "125", "Double Rare"),
+    ("c-2", "Charizard ex", "Obsidian Flames", "223", "Special Illustration Rare"),
+    ("c-3", "Charizard ex", "Obsidian Flames", "228", "Hyper Rare"),
+    ("d-1", "Pikachu", "Base Set", "58", "Common"),
+    ("d-2", "Pikachu", "Jungle", "60", "Common"),
+    ("d-3", "Flying Pikachu", "Black Star Promos", "25", "Promo"),
+    ("d-4", "Surfing Pikachu V", "Celebrations", "8", "Rare Ultra"),
+    ("e-1", "Zapdos", "Fossil", "15", None),
+    ("e-2", "Aerodactyl", "Fossil", "1", "Rare Holo"),
+    ("e-3", "Abra", "Base Set", "43", "Common"),
+    ("e-4", "Zubat", "Fossil", "57", "Common"),
+    ("e-5", "Mr. Mime", "Jungle", "6", "Rare Holo"),
+    ("e-6", "Ho-Oh", "Neo Revelation", "H7", "Rare Secret"),
+]
+
+def _reference_search(cards, query, limit=12):
+    """The original linear scan over every card, kept as the ranking oracle."""
+    if not query:
+        return []
+    search_num_digits = "".join(re.findall(r'\d+', query))
+    search_tokens = set(t for t in dl._tokenize(re.sub(r'\d+', ' ', query)).split() if t)
+    if not search_tokens and not search_num_digits:
+        return []
+    results = []
+    for card in cards:
+        name_tokens = set(card['_normalized_name'].split())
+        set_tokens = set(card['_normalized_set'].split())
+        text_match_count = sum(1 for s in search_tokens if any(s in c for c in name_tokens | set_tokens))
+        if search_tokens and text_match_count == 0:
+            continue
+        score = 50.0 * text_match_count
+        score += 30 * len(search_tokens & name_tokens)
+        score += 20 * len(search_tokens & set_tokens)
+        if search_num_digits and card['_normalized_number_digits'] == search_num_digits:
+            score += 50
+        score -= 5 * len(name_tokens - search_tokens)
+        if score > 0:
+            rarity = (card.get('rarity') or '').lower()
+            tie = 0
+            if 'rare' in rarity:  tie = 1
+            if 'holo' in rarity:  tie = 2
+            if 'ultra' in rarity: tie = 3
+            results.append((score, tie, card))
+    results.sort(key=lambda x: (x[0], x[1]), reverse=True)
+    return [c for _, __, c in results[:limit]]
+
+@pytest.fixture
+def search_cards(monkeypatch):
+    cards = [_card(i, n, s, num, r) for i, n, s, num, r in SEARCH_CARDS]
+    monkeypatch.setattr(dl, "_card_data", cards)
+    for name in ("_search_postings", "_search_vocab", "_search_vocab_blob", "_search_vocab_offsets",
+                 "_cards_by_number_digits", "_search_card_tokens", "_search_card_ties"):
+        monkeypatch.setattr(dl, name, getattr(dl, name))
+    dl._build_search_index()
+    return cards
+
+def _search_queries(cards):
+    vocab = sorted({t for c in cards for t in (c['_normalized_name'] + " " + c['_normalized_set']).split()})
+    # Every substring of every token: hits the first and last vocab entries, fragments
+    # spanning several tokens, and single letters that match most of the corpus.
+    fragments = sorted({tok[i:j] for tok in vocab for i in range(len(tok)) for j in range(i + 1, len(tok) + 1)})
+    queries = list(fragments)
+    queries += [f"{a} {b}" for a, b in itertools.combinations(["char", "zard", "base", "set", "pika", "ex", "dark", "o"], 2)]
+    queries += ["4", "04", "#4", "h7", "7", "25", "999", "char 4", "charizard 4", "pikachu 58/102",
+                "Charizard EX", "mr. mime", "ho-oh", "Pokémon", "zzz", "", "   ", "base set 2", "x"]
+    return queries
+
+def test_search_matches_linear_scan(search_cards):
+    for query in _search_queries(search_cards):
+        for limit in (1, 3, 12, len(search_cards)):
+            expected = [c["id"] for c in _reference_search(search_cards, query, limit)]
+            assert [c["id"] for c in dl.search_local_cards(query, limit)] == expected, (query, limit)
+
+def test_search_tie_break_order(search_cards):
+    # Same score for all three Obsidian Flames Charizard ex: rarity ranks them,
+    # Special Illustration Rare and Hyper Rare tie and keep their corpus order.
+    ids = [c["id"] for c in dl.search_local_cards("charizard ex obsidian", limit=3)]
+    assert ids == ["c-1", "c-2", "c-3"]
+    # Every Base Set card scores the same for "base": the holos lead, the rest keep corpus order.
+    assert [c["id"] for c in dl.search_local_cards("base")] == ["a-1", "b-1", "a-2", "a-3", "d-1", "e-3"]
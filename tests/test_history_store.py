@@ -0,0 +1,94 @@
+# tests/test_history_store.py — changed history files replace only their own segments
+#
+#   python -m pytest -q tests
+
+import numpy as np
+import pytest
+
+import history_store as hs
+
+DAYS = {
+    "20 08 2025.csv": "item_title,price\nCharizard Booster Box,\"100,00\"\nPikachu Tin,20\n",
+    "21 08 2025.csv": "item_title,price\nCharizard Booster Box,110\nMew ETB,55\n",
+    "22 08 2025.csv": "item_title,price\nMew ETB,60\nPikachu Tin,22\nEevee Collection,30\n",
+}
+
+@pytest.fixture(params=["persisted", "in-memory"])
+def store(request, tmp_path, monkeypatch):
+    """HISTORY_DIR with DAYS, an empty STORE_DIR (or none); records which files get parsed."""
+    history = tmp_path / "history"
+    history.mkdir()
+    for name, text in DAYS.items():
+        (history / name).write_text(text, encoding="utf-8")
+    monkeypatch.setattr(hs, "HISTORY_DIR", str(history))
+    monkeypatch.setattr(hs, "STORE_DIR", str(tmp_path / "store") if request.param == "persisted" else "")
+    for name, value in (("_STATE", None), ("_LAST_POLL", 0.0), ("_PERSIST_DISABLED", False),
+                        ("_MARKET_AGGS", {}), ("_CATEGORY_MASKS", {})):
+        monkeypatch.setattr(hs, name, value)
+
+    ingested = []
+    real_ingest = hs._ingest_file
+    def recording_ingest(filename, *args):
+        ingested.append(filename)
+        return real_ingest(filename, *args)
+    monkeypatch.setattr(hs, "_ingest_file", recording_ingest)
+
+    hs.get_state(force=True)
+    ingested.clear()
+    return history, ingested
+
+def _fresh_state(tmp_path, monkeypatch):
+    """The same HISTORY_DIR ingested from scratch into another store."""
+    monkeypatch.setattr(hs, "STORE_DIR", str(tmp_path / "fresh"))
+    monkeypatch.setattr(hs, "_STATE", None)
+    return hs.get_state(force=True)
+
+def _assert_same(a, b):
+    strip = lambda files: [{k: v for k, v in f.items() if k not in ("mtime_ns", "size")} for f in files]
+    assert strip(a["files"]) == strip(b["files"])
+    assert a["item_keys"] == b["item_keys"] and a["title_keys"] == b["title_keys"]
+    assert a["item_ids"] == b["item_ids"] and a["title_ids"] == b["title_ids"]
+    for name in hs._ARRAYS:
+        assert np.array_equal(a["arrays"][name], b["arrays"][name], equal_nan=True), name
+
+def test_changed_file_reingests_only_it_and_later_files(store, tmp_path, monkeypatch):
+    history, ingested = store
+    before = hs.get_state()
+    old_prices = np.array(before["arrays"]["item_price"])
+
+    (history / "21 08 2025.csv").write_text("item_title,price\nCharizard Booster Box,120\nLugia Tin,40\n",
+                                            encoding="utf-8")
+    state = hs.get_state(force=True)
+
+    assert ingested == ["21 08 2025.csv", "22 08 2025.csv"]
+    assert state["epoch"] != before["epoch"]
+    assert [p["price"] for p in hs.price_history("Charizard Booster Box")] == [100.0, 120.0]
+    assert [p["price"] for p in hs.price_history("Mew ETB")] == [60.0]
+    # The old state's memory maps still read the old binaries.
+    assert np.array_equal(before["arrays"]["item_price"], old_prices, equal_nan=True)
+
+    if hs.STORE_DIR:
+        _assert_same(hs._load_persisted(), state)
+    _assert_same(state, _fresh_state(tmp_path, monkeypatch))
+
+def test_removed_last_file_needs_no_parsing(store, tmp_path, monkeypatch):
+    history, ingested = store
+
+    (history / "22 08 2025.csv").unlink()
+    state = hs.get_state(force=True)
+
+    assert ingested == []
+    assert [f["name"] for f in state["files"]] == ["20 08 2025.csv", "21 08 2025.csv"]
+    assert "eeveecollection" not in state["item_ids"]
+    if hs.STORE_DIR:
+        _assert_same(hs._load_persisted(), state)
+    _assert_same(state, _fresh_state(tmp_path, monkeypatch))
+
+def test_unchanged_files_are_not_reingested(store):
+    history, ingested = store
+    (history / "23 08 2025.csv").write_text("item_title,price\nPikachu Tin,25\n", encoding="utf-8")
+
+    hs.get_state(force=True)
+
+    assert ingested == ["23 08 2025.csv"]
+    assert [p["price"] for p in hs.price_history("Pikachu Tin")] == [20.0, 22.0, 25.0]
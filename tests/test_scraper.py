@@ -0,0 +1,66 @@
+# tests/test_scraper.py — the per-view search memos stay within their id budget
+#
+#   python -m pytest -q tests
+
+import itertools
+import random
+import string
+
+import pytest
+
+import scraper
+
+def _items(n, seed=7):
+    rng = random.Random(seed)
+    words = ["".join(rng.choice("abcdefgh") for _ in range(rng.randint(3, 7))) for _ in range(400)]
+    return [{"title": " ".join(rng.sample(words, 4)), "url": f"https://example.gr/p/{k}",
+             "price_float": float(k % 97)} for k in range(n)]
+
+@pytest.fixture
+def view(monkeypatch):
+    monkeypatch.setattr(scraper, "HITS_MEMO_MAX_IDS", 20000)
+    monkeypatch.setattr(scraper, "SUGGEST_MEMO_MAX_IDS", 5000)
+    v = scraper._build_view(_items(4000))
+    monkeypatch.setattr(scraper, "_VIEW", v)
+    monkeypatch.setattr(scraper, "_WATCHER_PID", scraper.os.getpid())  # no loader, no watcher
+    return v
+
+def _two_letter_queries():
+    return ["".join(p) for p in itertools.product(string.ascii_lowercase[:10], repeat=2)]
+
+def test_hit_memo_is_bounded_by_total_ids(view):
+    memo = view["hits"]
+    for q in _two_letter_queries() * 2:
+        scraper.search_products_page(q)
+        scraper.suggest_titles(q)
+        assert memo.ids <= memo.max_ids
+        assert memo.ids == sum(len(ids) for ids in memo.entries.values())
+        assert len(memo.entries) <= scraper.MEMO_MAX_ENTRIES
+        assert all(len(ids) <= memo.max_ids // 4 for ids in memo.entries.values())
+    assert memo.entries  # the budget still holds something
+    suggest = view["suggest"]
+    assert suggest.ids <= suggest.max_ids
+    assert scraper.reload_status()["memo_ids"] == memo.ids + suggest.ids
+
+def test_memo_evicts_least_recently_used(view):
+    memo = scraper._IdMemo(10)
+    memo.put("a", frozenset(range(2)))
+    memo.put("b", frozenset(range(2)))
+    memo.put("c", frozenset(range(2)))
+    memo.get("a")
+    memo.put("d", frozenset(range(2, 4)))
+    memo.put("e", frozenset(range(4, 6)))
+    memo.put("f", frozenset(range(6, 8)))  # 12 ids > 10: "b" is the least recently used
+    assert list(memo.entries) == ["c", "a", "d", "e", "f"] and memo.ids == 10
+    memo.put("big", frozenset(range(3)))  # over a quarter of the budget: not kept
+    assert "big" not in memo.entries
+
+def test_memoized_results_match_a_scan(view):
+    folded = view["folded"]
+    for q in _two_letter_queries()[:40] + ["abc def", "ha", "ab ab"]:
+        toks = q.split()
+        expected = [i for i in range(len(folded)) if all(t in folded[i] for t in toks)]
+        for _ in range(2):  # cold, then from the memo
+            page, total = scraper.search_products_page(q, page_size=len(folded))
+            assert total == len(expected)
+            assert [it["url"] for it in page] == [view["items"][i]["url"] for i in expected]
@@ -0,0 +1,139 @@
+# tests/test_scraper_pokemon.py — _fetch_json: single-flight, LRU + TTL cache, pooled session
+#
+#   python -m pytest -q tests
+#
+# Runs against a local stand-in HTTP server; no network needed.
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import scraper_pokemon as sp
+
+class _StandIn(BaseHTTPRequestHandler):
+    """/v2/cards/<id>: 200 with the id; ids starting with "fail" answer 500, "slow" ones sleep first."""
+    protocol_version = "HTTP/1.1"  # keep-alive, like the real API
+    counts = {"requests": 0, "connections": 0}
+    delay = {"s": 0.0}
+    lock = threading.Lock()
+
+    def setup(self):
+        super().setup()
+        with self.lock:
+            self.counts["connections"] += 1
+
+    def do_GET(self):
+        with self.lock:
+            self.counts["requests"] += 1
+        card_id = self.path.split("?")[0].rsplit("/", 1)[-1]
+        time.sleep(1.0 if card_id.startswith("slow") else self.delay["s"])
+        status = 500 if card_id.startswith("fail") else 200
+        body = json.dumps({"data": {"id": card_id}}).encode()
+        try:
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        except OSError:  # the client gave up (timeout test)
+            pass
+
+    def log_message(self, *args):
+        pass
+
+@pytest.fixture(scope="module")
+def server():
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), _StandIn)
+    httpd.daemon_threads = True
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}/v2"
+    httpd.shutdown()
+    httpd.server_close()
+
+@pytest.fixture
+def api(server, monkeypatch):
+    """Empty cache and counters, fresh pooled connections; returns the stand-in's base URL."""
+    monkeypatch.setattr(sp, "API_CACHE", type(sp.API_CACHE)())
+    monkeypatch.setattr(sp, "API_CACHE_STATS", dict.fromkeys(sp.API_CACHE_STATS, 0))
+    monkeypatch.setattr(sp, "_INFLIGHT", {})
+    sp._SESSION.close()  # drop pooled connections left by other tests
+    _StandIn.delay["s"] = 0.0
+    with _StandIn.lock:
+        _StandIn.counts.update(requests=0, connections=0)
+    return server
+
+def _card(base, card_id, **kw):
+    return sp._fetch_json(f"{base}/cards/{card_id}", is_single_item=True, **kw)
+
+def test_concurrent_identical_calls_make_one_request(api):
+    _StandIn.delay["s"] = 0.3
+    start = threading.Barrier(8)
+    results = []
+    def call():
+        start.wait()
+        results.append(_card(api, "xy1-1"))
+    threads = [threading.Thread(target=call) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert _StandIn.counts["requests"] == 1
+    assert results == [{"data": {"id": "xy1-1"}}] * 8
+    stats = sp.api_cache_stats()
+    assert stats["fetches"] == 1 and stats["misses"] == 1 and stats["coalesced"] == 7
+    assert stats["inflight"] == 0
+
+def test_lru_evicts_at_api_cache_max(api, monkeypatch):
+    monkeypatch.setattr(sp, "API_CACHE_MAX", 3)
+    for card_id in ("a", "b", "c"):
+        _card(api, card_id)
+    _card(api, "a")  # hit: "b" is now the least recently used
+    _card(api, "d")
+
+    assert [k.split("?")[0].rsplit("/", 1)[-1] for k in sp.API_CACHE] == ["c", "a", "d"]
+    assert sp.api_cache_stats()["evicted"] == 1
+    assert _StandIn.counts["requests"] == 4
+    _card(api, "b")
+    assert _StandIn.counts["requests"] == 5
+    assert len(sp.API_CACHE) == 3
+
+def test_entries_expire_after_ttl(api, monkeypatch):
+    monkeypatch.setattr(sp, "API_TTL", 0.2)
+    _card(api, "ttl")
+    _card(api, "ttl")
+    assert _StandIn.counts["requests"] == 1
+
+    time.sleep(0.3)
+    _card(api, "ttl")
+    assert _StandIn.counts["requests"] == 2
+    assert sp.api_cache_stats()["expired"] == 1
+
+def test_failed_responses_are_not_cached(api):
+    assert _card(api, "fail-1") is None
+    assert sp._fetch_json(f"{api}/cards/fail-2") == {"data": []}
+    assert _card(api, "fail-1") is None
+
+    assert _StandIn.counts["requests"] == 3
+    assert not sp.API_CACHE
+    stats = sp.api_cache_stats()
+    assert stats["errors"] == 3 and stats["timeouts"] == 0 and stats["inflight"] == 0
+
+def test_timed_out_responses_are_not_cached(api):
+    t0 = time.perf_counter()
+    assert _card(api, "slow-1", timeout=0.2) is None
+    assert time.perf_counter() - t0 < 0.9
+
+    assert not sp.API_CACHE
+    stats = sp.api_cache_stats()
+    assert stats["timeouts"] == 1 and stats["errors"] == 1 and stats["inflight"] == 0
+
+def test_calls_share_one_pooled_connection(api):
+    for k in range(20):
+        assert _card(api, f"pooled-{k}") == {"data": {"id": f"pooled-{k}"}}
+
+    assert _StandIn.counts["requests"] == 20
+    assert _StandIn.counts["connections"] == 1